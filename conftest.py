@@ -5,13 +5,14 @@ import subprocess
 import time
 import threading
 from datetime import datetime
-from appium import webdriver
-from appium.options.android import UiAutomator2Options
-import requests
-from dotenv import load_dotenv
 
-# Cargar variables del .env
-load_dotenv()
+# Los helpers de utils (lxml, Pillow...) y dotenv se importan dentro de los
+# fixtures y hooks que los usan: colectar o listar tests no debe pagarlos.
+# python -m pytest unit_tests/test_conftest_import.py vigila este presupuesto.
+
+# Plugins: eventos en vivo al runner (solo si PYTEST_EVENTS_PORT está definido)
+# y dependencias entre tests (@pytest.mark.depends_on)
+pytest_plugins = ["utils.live_events", "utils.test_dependencies"]
 
 # Configuración del logging
 logging.basicConfig(
@@ -25,28 +26,128 @@ logger = logging.getLogger(__name__)
 # Clase centralizada para manejar la configuración del entorno de testing
 class TestEnvironment:
     def __init__(self):
+        self.load_from_env()
+
+    def load_from_env(self):
+        """Lee la configuración del entorno (se repite en cada módulo del worker persistente)"""
         self.apk_path = os.getenv('APK_PATH', r"C:\Users\smora\Documents\Poc\appium-poc\app-release.apk")
         self.platform_version = os.getenv('PLATFORM_VERSION', "15")
         self.device_name = os.getenv('DEVICE_NAME', "emulator-5554")
         self.appium_server = os.getenv('APPIUM_SERVER', "http://127.0.0.1:4723")
+        self.adb_path = os.getenv('ADB_PATH', "adb")
+        # Puerto de UiAutomator2 distinto por dispositivo cuando se ejecuta en paralelo
+        self.system_port = os.getenv('APPIUM_SYSTEM_PORT')
         self.platform_name = "Android"
         self.automation_name = "UiAutomator2"
 
         # Directorios organizados por módulo
         self.module_name = os.getenv('PYTEST_MODULE_NAME', 'general')
+        self.run_id = os.getenv('PYTEST_RUN_ID', datetime.now().strftime("%Y%m%d_%H%M%S"))
         self.reports_dir = os.getenv('PYTEST_REPORTS_DIR', 'pytest_reports')
 
         # Crear subdirectorios específicos para este módulo
         self.videos_dir = os.path.join("pytest_videos", self.module_name)
         self.logs_dir = os.path.join("pytest_logs", self.module_name)
+        self.screenshots_dir = os.path.join("pytest_screenshots", self.module_name)
 
         self.implicit_wait = 5
         self.command_timeout = 120
+        # Tiempo máximo de las esperas por condición (utils/waits.py)
+        self.wait_timeout = float(os.getenv('WAIT_TIMEOUT', 10))
+
+        # Presupuestos de timeout aprendidos: clamp(p99 × factor, suelo, techo)
+        self.timeout_budget_factor = float(os.getenv('TIMEOUT_BUDGET_FACTOR', 2.0))
+        self.timeout_budget_floor = float(os.getenv('TIMEOUT_BUDGET_FLOOR', 1.0))
+        self.timeout_budget_ceiling = float(os.getenv('TIMEOUT_BUDGET_CEILING', 30.0))
+        # Calibración: esperar hasta el techo y sustituir las latencias guardadas
+        self.timeout_calibration = os.getenv('TIMEOUT_CALIBRATION') == '1'
+
+        # Broker de sesiones: adjuntarse a una sesión caliente en vez de crear una nueva
+        self.session_broker = os.getenv('APPIUM_SESSION_BROKER')
+
+        # Credenciales de prueba que usa el navegador de pantallas para llegar a una pantalla
+        self.login_email = os.getenv('LOGIN_EMAIL', "emailFalso@gmail.com")
+        self.login_user = os.getenv('LOGIN_USER', "Alejandro.Morales")
+        self.login_password = os.getenv('LOGIN_PASSWORD', "Admin123")
+
+        # Estado autenticado cacheado para los tests @pytest.mark.logged_in
+        self.app_package = os.getenv('APP_PACKAGE')
+        self.app_state_cache = os.getenv('APP_STATE_CACHE', '1') != '0'
+
+        # Backend de video: "device" (screenrecord a /sdcard + pull) o "stream" (H.264 por exec-out)
+        self.video_backend = os.getenv('VIDEO_BACKEND', 'device')
+        self.video_stream_segment_seconds = int(os.getenv('VIDEO_STREAM_SEGMENT_SECONDS', 170))
+
+        # Retención: "all" guarda todos los videos; "failures" solo los últimos
+        # VIDEO_WINDOW_SECONDS de los tests que fallan, grabados en segmentos rotatorios
+        self.video_retention = os.getenv('VIDEO_RETENTION', 'all')
+        self.video_window_seconds = int(os.getenv('VIDEO_WINDOW_SECONDS', 30))
+        self.video_segment_seconds = int(os.getenv('VIDEO_SEGMENT_SECONDS', 10))
+
+        # Capturas de pantalla: "steps" (fronteras de paso, final y fallo), "failures" u "off"
+        self.screenshot_mode = os.getenv('SCREENSHOTS', 'steps')
+
+        # Índice y almacén de evidencias (videos y capturas) para reportes y Xray
+        self.evidence_store_dir = os.getenv('EVIDENCE_STORE_DIR', 'evidence_store')
+
+        # Descarga de videos en segundo plano (hilos y descargas en curso como máximo)
+        self.video_pull_workers = int(os.getenv('VIDEO_PULL_WORKERS', 2))
+        self.video_pull_max_pending = int(os.getenv('VIDEO_PULL_MAX_PENDING', 6))
+        self.video_pull_timeout = float(os.getenv('VIDEO_PULL_TIMEOUT', 120))
+
+        # Worker persistente: mantener la sesión de Appium viva entre módulos
+        self.persistent_worker = os.getenv('PYTEST_PERSISTENT_WORKER') == '1'
 
 
 # Instancia global del entorno
 test_env = TestEnvironment()
 
+# Sesiones de Appium que sobreviven entre módulos en el worker persistente
+_warm_drivers = {}
+# Entornos ya verificados en este proceso (servidor, dispositivo, APK)
+_verified_environments = set()
+
+
+def close_warm_drivers():
+    """Cierra las sesiones mantenidas por el worker persistente"""
+    for key, driver_instance in list(_warm_drivers.items()):
+        try:
+            driver_instance.quit()
+            logger.info(f"🏁 Sesión de Appium cerrada: {key[1]}")
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo cerrar la sesión de {key[1]}: {e}")
+        _warm_drivers.pop(key, None)
+
+
+def _get_warm_driver(key):
+    """Devuelve la sesión guardada si sigue respondiendo"""
+    driver_instance = _warm_drivers.get(key)
+    if driver_instance is None:
+        return None
+    try:
+        driver_instance.current_package  # Comando barato para comprobar que la sesión vive
+        return driver_instance
+    except Exception:
+        _warm_drivers.pop(key, None)
+        return None
+
+
+# Descargas de video en segundo plano, una cola por dispositivo
+_video_pull_queues = {}
+# Videos cuya descarga falló en la sesión: (ruta local, error)
+_video_failures = []
+
+
+def get_video_pull_queue():
+    queue = _video_pull_queues.get(test_env.device_name)
+    if queue is None:
+        from utils.video_pipeline import VideoPullQueue
+
+        queue = VideoPullQueue(test_env.adb_path, test_env.device_name,
+                               workers=test_env.video_pull_workers, max_pending=test_env.video_pull_max_pending)
+        _video_pull_queues[test_env.device_name] = queue
+    return queue
+
 
 class VideoRecorder:
     """Clase para manejar la grabación de video durante los tests"""
@@ -70,20 +171,29 @@ class VideoRecorder:
         self.video_path_local = os.path.join(module_video_dir, f"{test_name}_{timestamp}.mp4")
 
         # Comando para grabar video
-        cmd = ['adb', '-s', self.device_name, 'shell', 'screenrecord', self.video_path_device]
+        cmd = [test_env.adb_path, '-s', self.device_name, 'shell', 'screenrecord', self.video_path_device]
 
         try:
             self.recording_process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
             self.is_recording = True
             logger.info(f"🎥 [{self.module_name}] Iniciando grabación: {self.video_path_device}")
-            time.sleep(1)  # Pequeña pausa para asegurar que la grabación inicie
+            self._wait_until_started()
             return True
         except Exception as e:
             logger.error(f"❌ [{self.module_name}] Error al iniciar grabación: {e}")
             return False
 
+    def _wait_until_started(self, timeout=1.0):
+        """Espera a que screenrecord cree el archivo (como mucho lo que antes se dormía)"""
+        queue = get_video_pull_queue()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and self.recording_process.poll() is None:
+            if queue.device_file_size(self.video_path_device) is not None:
+                return
+            time.sleep(0.1)
+
     def stop_recording(self):
-        """Detiene la grabación y descarga el video"""
+        """Detiene la grabación y encola la descarga; devuelve un Future con la ruta local"""
         if not self.is_recording or not self.recording_process:
             return None
 
@@ -93,27 +203,39 @@ class VideoRecorder:
             self.recording_process.wait(timeout=10)
             self.is_recording = False
 
-            time.sleep(2)  # Esperar que el archivo se guarde completamente
+            # El cierre del archivo, el pull y el rm ocurren en segundo plano
+            return get_video_pull_queue().submit(self.video_path_device, self.video_path_local)
 
-            # Descargar el video del dispositivo
-            pull_cmd = ['adb', '-s', self.device_name, 'pull', self.video_path_device, self.video_path_local]
-            result = subprocess.run(pull_cmd, capture_output=True, text=True)
+        except Exception as e:
+            logger.error(f"❌ [{self.module_name}] Error al detener grabación: {e}")
+            return None
 
-            if result.returncode == 0:
-                logger.info(f"✅ [{self.module_name}] Video descargado: {self.video_path_local}")
 
-                # Limpiar el video del dispositivo
-                cleanup_cmd = ['adb', '-s', self.device_name, 'shell', 'rm', self.video_path_device]
-                subprocess.run(cleanup_cmd, capture_output=True)
+def video_config_error(video_retention, video_backend):
+    """Mensaje si VIDEO_RETENTION y VIDEO_BACKEND piden grabadores incompatibles"""
+    if video_retention == "failures" and video_backend == "stream":
+        # El buffer circular rota segmentos en /sdcard; el streaming no deja nada en el dispositivo
+        return ("❌ VIDEO_RETENTION=failures no se puede combinar con VIDEO_BACKEND=stream: "
+                "el buffer circular graba en el dispositivo. Usa VIDEO_BACKEND=device o VIDEO_RETENTION=all.")
+    return None
 
-                return self.video_path_local
-            else:
-                logger.error(f"❌ [{self.module_name}] Error al descargar video: {result.stderr}")
-                return None
 
-        except Exception as e:
-            logger.error(f"❌ [{self.module_name}] Error al detener grabación: {e}")
-            return None
+def create_video_recorder():
+    """Grabador según VIDEO_RETENTION y VIDEO_BACKEND"""
+    if test_env.video_retention == "failures":
+        from utils.video_ring import RingBufferVideoRecorder
+
+        return RingBufferVideoRecorder(test_env.adb_path, test_env.device_name, test_env.module_name,
+                                       test_env.videos_dir, get_video_pull_queue(),
+                                       window_seconds=test_env.video_window_seconds,
+                                       segment_seconds=test_env.video_segment_seconds)
+    if test_env.video_backend == "stream":
+        from utils.video_stream import StreamingVideoRecorder
+
+        return StreamingVideoRecorder(test_env.adb_path, test_env.device_name, test_env.module_name,
+                                      test_env.videos_dir, get_video_pull_queue(),
+                                      segment_seconds=test_env.video_stream_segment_seconds)
+    return VideoRecorder(test_env.device_name, test_env.module_name)
 
 
 # Función helper para ejecutar comandos ADB y manejar errores
@@ -136,14 +258,15 @@ def check_device_is_ready(device_name, timeout=30):
     last_known_output = "No se pudo obtener la lista de dispositivos."
 
     while time.time() < end_time:
-        result = _run_adb_command(['adb', 'devices'])
+        result = _run_adb_command([test_env.adb_path, 'devices'])
         if result:
             devices_output = result.stdout.strip()
             last_known_output = devices_output
             logger.debug(f"Salida de 'adb devices':\n{devices_output}")
 
             for line in devices_output.splitlines():
-                if device_name in line and 'device' in line:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == device_name and parts[1] == 'device':
                     logger.info(f"✅ Dispositivo '{device_name}' está en línea y autorizado.")
                     time.sleep(2)
                     return
@@ -163,6 +286,7 @@ def check_device_is_ready(device_name, timeout=30):
 # Hook de pytest para personalizar el nombre de la suite según el módulo
 def pytest_configure(config):
     """Configura pytest con información del módulo actual"""
+    test_env.load_from_env()
     module_name = test_env.module_name
 
     # Configurar junit suite name dinámicamente
@@ -172,10 +296,28 @@ def pytest_configure(config):
     logger.info(f"🏷️ Configurando tests para módulo: {module_name}")
 
 
+def pytest_collection_modifyitems(config, items):
+    """Añade la clave de Xray como propiedad del testcase en el JUnit XML"""
+    for item in items:
+        marker = item.get_closest_marker("xray")
+        if marker and marker.args:
+            item.user_properties.append(("test_key", marker.args[0]))
+
+
 # Fixture de configuración del entorno - Se ejecuta UNA VEZ por sesión
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_environment():
     """Fixture que se ejecuta UNA VEZ por sesión para preparar todo el entorno."""
+    from dotenv import load_dotenv
+
+    # Cargar variables del .env (aquí y no al importar conftest.py)
+    load_dotenv()
+    test_env.load_from_env()
+
+    config_error = video_config_error(test_env.video_retention, test_env.video_backend)
+    if config_error:
+        pytest.exit(config_error)
+
     logger.info("=" * 60)
     logger.info(f"🚀 CONFIGURANDO ENTORNO PARA MÓDULO: {test_env.module_name}")
 
@@ -184,6 +326,14 @@ def setup_test_environment():
     os.makedirs(test_env.reports_dir, exist_ok=True)
     os.makedirs(test_env.logs_dir, exist_ok=True)
 
+    environment_key = (test_env.appium_server, test_env.device_name, test_env.apk_path)
+    if environment_key in _verified_environments:
+        logger.info(f"♻️ Entorno ya verificado en este worker para: {test_env.device_name}")
+        yield
+        return
+
+    import requests  # Import diferido: listar/colectar tests no necesita requests
+
     try:
         requests.get(f"{test_env.appium_server}/status", timeout=5)
         logger.info(f"✅ Appium server está corriendo en {test_env.appium_server}")
@@ -194,6 +344,8 @@ def setup_test_environment():
         pytest.exit(f"❌ APK no encontrado en la ruta: {test_env.apk_path}")
 
     check_device_is_ready(test_env.device_name)
+    if test_env.persistent_worker:
+        _verified_environments.add(environment_key)
 
     logger.info(f"✅ Entorno configurado para módulo: {test_env.module_name}")
     logger.info("=" * 60)
@@ -203,12 +355,44 @@ def setup_test_environment():
     logger.info("=" * 60)
 
 
+@pytest.fixture(scope="session", autouse=True)
+def video_pull_barrier():
+    """Al terminar la sesión espera las descargas de video pendientes y anota las fallidas."""
+    yield
+    queue = _video_pull_queues.get(test_env.device_name)
+    if queue is None:
+        return
+    pending = queue.pending()
+    if pending:
+        logger.info(f"⏳ [{test_env.module_name}] Esperando {pending} descargas de video...")
+    failures = queue.drain(timeout=test_env.video_pull_timeout)
+    for video_path, error in failures:
+        logger.error(f"❌ [{test_env.module_name}] Video no descargado: {video_path} ({error})")
+    _video_failures.extend(failures)
+
+
 # Smoke test - Valida que el driver se inicie correctamente
 @pytest.fixture(scope="session")
 def driver(request):
-    """Fixture que crea el driver de Appium UNA SOLA VEZ por sesión de pruebas."""
+    """Fixture que crea el driver de Appium UNA SOLA VEZ por sesión de pruebas.
+
+    El driver se devuelve instrumentado para medir la duración de cada comando.
+    """
+    from utils.driver_instrumentation import instrument_driver
+
+    driver_instance = _create_driver(request)
+    instrument_driver(driver_instance)
+    return driver_instance
+
+
+def _create_driver(request):
+    """Crea (o reutiliza) la sesión de Appium según el modo de ejecución"""
     logger.info(f"🚀 [{test_env.module_name}] Iniciando driver de Appium...")
 
+    # Imports diferidos: appium y selenium solo se cargan cuando un test pide el driver
+    from appium import webdriver
+    from appium.options.android import UiAutomator2Options
+
     options = UiAutomator2Options()
     options.platform_name = test_env.platform_name
     options.device_name = test_env.device_name
@@ -219,6 +403,19 @@ def driver(request):
     options.auto_grant_permissions = True
     options.full_reset = False
     options.no_reset = True
+    if test_env.system_port:
+        options.system_port = int(test_env.system_port)
+
+    warm_key = (test_env.appium_server, test_env.device_name)
+    if test_env.persistent_worker:
+        driver_instance = _get_warm_driver(warm_key)
+        if driver_instance:
+            driver_instance.implicitly_wait(test_env.implicit_wait)
+            logger.info(f"♻️ [{test_env.module_name}] Reutilizando sesión de Appium: {driver_instance.session_id}")
+            return driver_instance
+
+    if test_env.session_broker:
+        return _lease_brokered_driver(request, options)
 
     driver_instance = None
     try:
@@ -226,6 +423,11 @@ def driver(request):
         driver_instance.implicitly_wait(test_env.implicit_wait)
         logger.info(f"✅ [{test_env.module_name}] Driver iniciado exitosamente")
 
+        if test_env.persistent_worker:
+            # El worker cierra la sesión al terminar todos los módulos
+            _warm_drivers[warm_key] = driver_instance
+            return driver_instance
+
         def finalizer():
             if driver_instance:
                 try:
@@ -241,14 +443,317 @@ def driver(request):
         pytest.fail(f"❌ CRÍTICO [{test_env.module_name}]: No se pudo inicializar el driver. Error: {e}")
 
 
+def _attach_to_session(appium_server, session_id, options):
+    """Crea un driver que usa una sesión ya existente en vez de abrir una nueva"""
+    from appium import webdriver
+
+    class AttachedRemote(webdriver.Remote):
+        def start_session(self, capabilities, *args, **kwargs):
+            self.session_id = session_id
+            self.caps = capabilities
+
+    return AttachedRemote(appium_server, options=options)
+
+
+def _lease_brokered_driver(request, options):
+    """Toma prestada la sesión caliente del dispositivo desde el broker de sesiones"""
+    from utils.session_broker import BrokerClient
+
+    client = BrokerClient(test_env.session_broker)
+    try:
+        lease = client.lease(test_env.device_name, test_env.appium_server, options.to_capabilities())
+        driver_instance = _attach_to_session(test_env.appium_server, lease['session_id'], options)
+        driver_instance.implicitly_wait(test_env.implicit_wait)
+    except Exception as e:
+        pytest.fail(f"❌ CRÍTICO [{test_env.module_name}]: No se pudo obtener la sesión del broker. Error: {e}")
+
+    logger.info(f"🔌 [{test_env.module_name}] Sesión prestada por el broker: {lease['session_id']}")
+
+    def release():
+        try:
+            client.release(lease['lease_id'])
+            logger.info(f"🔓 [{test_env.module_name}] Sesión devuelta al broker")
+        except Exception as e:
+            logger.warning(f"⚠️ [{test_env.module_name}] No se pudo liberar la sesión del broker: {e}")
+
+    request.addfinalizer(release)
+    return driver_instance
+
+
+@pytest.fixture
+def locator_engine(driver):
+    """Motor que evalúa los XPaths candidatos sobre una instantánea de page_source."""
+    from utils.locator_engine import get_locator_engine
+
+    return get_locator_engine(driver, default_timeout=test_env.implicit_wait)
+
+
+@pytest.fixture(scope="session")
+def locator_stats():
+    """Estadísticas de localizadores de la sesión; se suman a las del disco al terminar."""
+    from utils.locator_registry import LocatorStats
+
+    stats = LocatorStats()
+    yield stats
+    try:
+        stats.save()
+    except OSError as e:
+        logger.warning(f"⚠️ [{test_env.module_name}] No se pudieron guardar las estadísticas de localizadores: {e}")
+
+
+@pytest.fixture(scope="session")
+def timeout_budgets():
+    """Timeouts por localizador y pantalla aprendidos de las latencias observadas."""
+    from utils.timeout_budgets import TimeoutBudgets
+
+    budgets = TimeoutBudgets(factor=test_env.timeout_budget_factor, floor=test_env.timeout_budget_floor,
+                             ceiling=test_env.timeout_budget_ceiling, calibrate=test_env.timeout_calibration,
+                             run_id=test_env.run_id)
+    if budgets.calibrate:
+        logger.info(f"📏 [{test_env.module_name}] Calibración de timeouts: esperas hasta {budgets.ceiling:.0f}s")
+    yield budgets
+    try:
+        budgets.save()
+    except OSError as e:
+        logger.warning(f"⚠️ [{test_env.module_name}] No se pudieron guardar los presupuestos de timeout: {e}")
+
+
+@pytest.fixture
+def locators(driver, locator_engine, locator_stats, timeout_budgets):
+    """Registro de elementos lógicos que prueba primero la estrategia históricamente más rápida."""
+    from utils.locator_registry import LocatorRegistry
+
+    return LocatorRegistry(driver, stats=locator_stats, engine=locator_engine,
+                           default_timeout=test_env.implicit_wait, budgets=timeout_budgets)
+
+
+@pytest.fixture
+def gestures(driver, locators):
+    """Gestos con nombre y scroll hasta un elemento, con la geometría cacheada por sesión."""
+    from utils.gestures import get_gestures
+
+    return get_gestures(driver, registry=locators)
+
+
+@pytest.fixture
+def text_input(driver):
+    """Escritura de texto en un solo comando, con alternativas por adb e IME y verificación."""
+    from utils.text_input import TextInput
+
+    return TextInput(driver, adb_path=test_env.adb_path, device_name=test_env.device_name)
+
+
+@pytest.fixture
+def navigator(driver, locator_engine, locators, waits, text_input, gestures):
+    """Detecta la pantalla actual y navega por el camino más corto a la pedida."""
+    from utils.screen_navigator import ScreenNavigator
+
+    return ScreenNavigator(driver, locator_engine, locators, waits, text_input=text_input, gestures=gestures,
+                           credentials={"email": test_env.login_email, "user": test_env.login_user,
+                                        "password": test_env.login_password})
+
+
+# Pantallas que solo se ven con la sesión iniciada
+LOGGED_IN_SCREENS = ("inicio", "productos", "pdc", "menu")
+
+
+@pytest.fixture(scope="session")
+def app_state(driver):
+    """Caché del data dir de la app con sesión iniciada, ligada al hash del APK."""
+    from utils.app_state import AppStateCache
+    from utils.result_cache import file_sha256
+
+    apk_hash = file_sha256(test_env.apk_path) if os.path.exists(test_env.apk_path) else None
+    package = test_env.app_package or driver.current_package
+    return AppStateCache(test_env.adb_path, device_name=test_env.device_name, package=package, apk_hash=apk_hash)
+
+
+def _login_through_ui(navigator, cache):
+    from utils.app_state import AppStateError
+
+    navigator.navigate_to("inicio")
+    if not test_env.app_state_cache:
+        return
+    try:
+        seconds = cache.capture()
+        logger.info(f"📦 [{test_env.module_name}] Estado autenticado capturado en {seconds:.1f}s")
+    except AppStateError as e:
+        logger.warning(f"⚠️ [{test_env.module_name}] No se pudo capturar el estado autenticado: {e}")
+
+
+@pytest.fixture(autouse=True)
+def app_login_state(request):
+    """Con @pytest.mark.logged_in el test empieza con sesión iniciada, restaurada de caché si existe."""
+    if request.node.get_closest_marker("logged_in") is None:
+        return
+    navigator = request.getfixturevalue("navigator")
+    cache = request.getfixturevalue("app_state")
+
+    if navigator.current_screen() in LOGGED_IN_SCREENS:
+        if test_env.app_state_cache and not cache.exists():
+            _login_through_ui(navigator, cache)
+        return
+    if not (test_env.app_state_cache and cache.exists()):
+        _login_through_ui(navigator, cache)
+        return
+
+    driver_instance = request.getfixturevalue("driver")
+    waits = request.getfixturevalue("waits")
+    try:
+        seconds = cache.restore()
+        driver_instance.activate_app(cache.package)
+        waits.until_screen(navigator.screens["inicio"], screen="inicio")
+        logger.info(f"♻️ [{test_env.module_name}] Sesión restaurada de caché en {seconds:.1f}s")
+    except Exception as e:
+        # Estado caducado (token expirado, migración de datos...): se descarta y se hace login real
+        logger.warning(f"⚠️ [{test_env.module_name}] Estado en caché no válido, login por UI: {e}")
+        cache.invalidate()
+        _login_through_ui(navigator, cache)
+
+
+@pytest.fixture(autouse=True)
+def screen_precondition(request, app_login_state):
+    """Con @pytest.mark.screen("pantalla") el test empieza en esa pantalla aunque se ejecute solo."""
+    marker = request.node.get_closest_marker("screen")
+    if marker is None:
+        return
+    navigator = request.getfixturevalue("navigator")
+    path = navigator.navigate_to(marker.args[0])
+    if len(path) > 1:
+        logger.info(f"🧭 [{test_env.module_name}] {request.node.name}: {' → '.join(path)}")
+
+
+# Sleep fijo sustituido frente a espera real, por test
+_wait_reports = []
+
+
+@pytest.fixture
+def waits(request, driver, locators, locator_engine, timeout_budgets):
+    """Esperas por condición (until_visible, until_gone, until_screen, until_stable)."""
+    from utils.waits import Waiter
+
+    waiter = Waiter(driver, registry=locators, engine=locator_engine, budgets=timeout_budgets,
+                    default_timeout=test_env.wait_timeout, implicit_wait=test_env.implicit_wait)
+    if test_env.screenshot_mode == "steps":
+        waiter.on_step = lambda screen: _capture_screenshot(request.node, driver, screen)
+    yield waiter
+
+    legacy, actual = waiter.totals()
+    request.node.user_properties.append(("wait_legacy_seconds", f"{legacy:.3f}"))
+    request.node.user_properties.append(("wait_actual_seconds", f"{actual:.3f}"))
+    _wait_reports.append((request.node.name, legacy, actual, len(waiter.records)))
+
+
+# Instantáneas de la jerarquía de UI de la ejecución actual
+_hierarchy_archive = None
+
+
+def _get_hierarchy_archive():
+    global _hierarchy_archive
+    run_dir = os.path.join(test_env.logs_dir, "hierarchy", test_env.run_id)
+    if _hierarchy_archive is None or _hierarchy_archive.run_dir != run_dir:
+        from utils.hierarchy_snapshots import HierarchyArchive
+
+        _hierarchy_archive = HierarchyArchive(test_env.logs_dir, test_env.run_id)
+    return _hierarchy_archive
+
+
+@pytest.fixture
+def hierarchy(request, driver):
+    """Guarda la jerarquía de UI del paso actual (un solo page_source comprimido)."""
+    def snapshot(step):
+        path = _get_hierarchy_archive().capture(driver, request.node.name, step)
+        logger.info(f"🌳 [{test_env.module_name}] Jerarquía guardada: {path}")
+        return path
+
+    return snapshot
+
+
+def _evidence_metadata(item):
+    """Datos del test con los que se indexa cada evidencia"""
+    marker = item.get_closest_marker("xray")
+    function = getattr(item, "function", None)
+    doc = (function.__doc__ or "").strip() if function is not None else ""
+    return {
+        "xray": marker.args[0] if marker and marker.args else None,
+        "nodeid": item.nodeid,
+        "test": item.name,
+        "title": doc.splitlines()[0].strip() if doc else item.name,
+        "outcome": "failed" if _test_failed(item) else "passed",
+    }
+
+
+_evidence_index = None
+
+
+def get_evidence_index():
+    global _evidence_index
+    if _evidence_index is None or _evidence_index.path != os.path.join(test_env.evidence_store_dir, "index.jsonl"):
+        from utils.evidence_index import EvidenceIndex
+
+        _evidence_index = EvidenceIndex(test_env.evidence_store_dir)
+    return _evidence_index
+
+
+def _test_failed(item):
+    """Si el setup o el call del test fallaron (según los reportes de makereport)"""
+    return any(getattr(getattr(item, f"rep_{when}", None), "failed", False) for when in ("setup", "call"))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Guarda el reporte de cada fase en el item; captura y jerarquía de UI al final o al fallar"""
+    outcome = yield
+    report = outcome.get_result()
+    setattr(item, f"rep_{report.when}", report)
+    if report.when not in ("setup", "call"):
+        return
+    driver_instance = item.funcargs.get("driver") if hasattr(item, "funcargs") else None
+    if driver_instance is None:
+        return
+    if not report.failed:
+        if report.when == "call" and test_env.screenshot_mode == "steps":
+            _capture_screenshot(item, driver_instance, "final")
+        return
+
+    if test_env.screenshot_mode != "off":
+        path = _capture_screenshot(item, driver_instance, f"fallo_{report.when}")
+        if path:
+            report.user_properties.append(("failure_screenshot", path))
+    try:
+        path = _get_hierarchy_archive().capture(driver_instance, item.name, f"fallo_{report.when}")
+    except Exception as e:
+        logger.warning(f"⚠️ [{test_env.module_name}] No se pudo guardar la jerarquía del fallo: {e}")
+        return
+    logger.info(f"🌳 [{test_env.module_name}] Jerarquía del fallo: {path}")
+    report.user_properties.append(("hierarchy_snapshot", path))
+
+
+def _capture_screenshot(item, driver_instance, step):
+    """Captura del paso indexada por clave de Xray y run id; None si no se pudo"""
+    recorder = getattr(item, "_screenshot_recorder", None)
+    if recorder is None:
+        from utils.screenshots import ScreenshotRecorder
+
+        recorder = ScreenshotRecorder(driver_instance, test_env.screenshots_dir, test_env.run_id,
+                                      test_env.module_name, _evidence_metadata(item), index=get_evidence_index())
+        item._screenshot_recorder = recorder
+    try:
+        return recorder.capture(step, outcome="failed" if _test_failed(item) else "passed")
+    except Exception as e:
+        logger.warning(f"⚠️ [{test_env.module_name}] No se pudo tomar la captura '{step}': {e}")
+        return None
+
+
 # Fixture para grabar videos organizados por módulo
 @pytest.fixture
 def video_recorder(request, driver):
     """Fixture para grabar video durante la ejecución del test, organizado por módulo."""
 
-    recorder = VideoRecorder(test_env.device_name, test_env.module_name)
+    recorder = create_video_recorder()
     test_name = request.node.name
-    video_path = None
+    video_future = None
+    metadata = {}
 
     # Iniciar grabación al comenzar el test
     if recorder.start_recording(test_name):
@@ -257,27 +762,123 @@ def video_recorder(request, driver):
         logger.warning(f"⚠️ [{test_env.module_name}] No se pudo iniciar grabación para: {test_name}")
 
     def stop_and_save():
-        nonlocal video_path
-        video_path = recorder.stop_recording()
-        if video_path:
-            logger.info(f"✅ [{test_env.module_name}] Video guardado: {video_path}")
+        nonlocal video_future
+        if test_env.video_retention == "failures":
+            failed = _test_failed(request.node)
+            video_future = recorder.stop_recording(keep=failed)
+            if not failed:
+                logger.info(f"🗑️ [{test_env.module_name}] Test exitoso, video descartado: {test_name}")
+                return
         else:
+            video_future = recorder.stop_recording()
+        if video_future is None:
             logger.warning(f"⚠️ [{test_env.module_name}] No se pudo guardar video de: {test_name}")
-        return video_path
+            return
+        # Los metadatos se toman aquí: el callback corre en otro hilo, con el item ya terminado
+        metadata.update(_evidence_metadata(request.node))
+        video_future.add_done_callback(on_pulled)
+
+    def on_pulled(future):
+        # Se ejecuta en el hilo de descarga, normalmente durante el test siguiente
+        from utils import live_events
+        from utils.evidence_index import VIDEO
+
+        try:
+            video_path = future.result()
+        except Exception as e:
+            logger.error(f"❌ [{test_env.module_name}] Error al descargar video de {test_name}: {e}")
+            return
+        logger.info(f"✅ [{test_env.module_name}] Video guardado: {video_path}")
+        live_events.emit("video", nodeid=request.node.nodeid, path=video_path)
+        get_evidence_index().add(VIDEO, video_path, test_env.run_id, test_env.module_name, **metadata)
 
     # Registrar función para detener grabación al final del test
     request.addfinalizer(stop_and_save)
 
-    # Retornar función para obtener la ruta del video
-    return lambda: video_path
+    def get_video(wait=False):
+        """None mientras se graba; luego la ruta si ya se descargó o el Future de la descarga.
 
+        Con wait=True espera a la descarga y devuelve la ruta (o None si falló).
+        """
+        if video_future is None:
+            return None
+        if wait or video_future.done():
+            try:
+                return video_future.result()
+            except Exception:
+                return None
+        return video_future
 
-# Hook para agregar información del módulo a los reportes
+    # Retornar función para obtener la ruta del video
+    return get_video
+
+
+# Desglose de tiempo por test (network / waiting / sleeping / local)
+_time_breakdowns = []
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    """Mide los comandos del driver y los time.sleep durante la fase call del test"""
+    driver_instance = item.funcargs.get("driver") if hasattr(item, "funcargs") else None
+    if driver_instance is None:
+        yield
+        return
+    from utils.driver_instrumentation import CATEGORIES, get_instrumentation
+
+    instrumentation = get_instrumentation(driver_instance)
+    if instrumentation is None:
+        yield
+        return
+
+    with instrumentation.measure():
+        yield
+
+    breakdown = instrumentation.breakdown()
+    for category in CATEGORIES:
+        item.user_properties.append((f"time_{category}", f"{breakdown[category]:.3f}"))
+    item.user_properties.append(("driver_commands", str(breakdown["commands"])))
+    instrumentation.write_log(os.path.join(test_env.logs_dir, f"commands_{test_env.run_id}.jsonl"), item.nodeid)
+    _time_breakdowns.append((item.name, breakdown))
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Imprime en qué se fue el tiempo de cada test"""
+    if _time_breakdowns:
+        from utils.driver_instrumentation import CATEGORIES
+
+        terminalreporter.section(f"Desglose de tiempo por test - {test_env.module_name}")
+        terminalreporter.write_line(f"{'test':<45} {'cmds':>5} " + " ".join(f"{c:>9}" for c in CATEGORIES))
+        for name, breakdown in _time_breakdowns:
+            values = " ".join(f"{breakdown[c]:>8.2f}s" for c in CATEGORIES)
+            terminalreporter.write_line(f"{name[:45]:<45} {breakdown['commands']:>5} {values}")
+        _time_breakdowns.clear()
+
+    if _wait_reports:
+        terminalreporter.section(f"Esperas por condición vs sleeps fijos - {test_env.module_name}")
+        terminalreporter.write_line(f"{'test':<45} {'esperas':>7} {'sleep fijo':>11} {'real':>9}")
+        for name, legacy, actual, count in _wait_reports:
+            terminalreporter.write_line(f"{name[:45]:<45} {count:>7} {legacy:>10.2f}s {actual:>8.2f}s")
+        total_legacy = sum(r[1] for r in _wait_reports)
+        total_actual = sum(r[2] for r in _wait_reports)
+        terminalreporter.write_line(f"{'TOTAL':<45} {'':>7} {total_legacy:>10.2f}s {total_actual:>8.2f}s")
+        _wait_reports.clear()
+
+    if _video_failures:
+        terminalreporter.section(f"Videos no descargados - {test_env.module_name}")
+        for video_path, error in _video_failures:
+            terminalreporter.write_line(f"❌ {video_path}: {error}")
+        _video_failures.clear()
+
+
+# Hook para agregar información del módulo a los reportes (solo con pytest-html instalado)
+@pytest.hookimpl(optionalhook=True)
 def pytest_html_report_title(report):
     """Personaliza el título del reporte HTML"""
     report.title = f"Reporte de Tests - Módulo: {test_env.module_name}"
 
 
+@pytest.hookimpl(optionalhook=True)
 def pytest_html_results_summary(prefix, summary, postfix):
     """Personaliza el resumen del reporte HTML"""
     prefix.extend([f"<p><strong>Módulo:</strong> {test_env.module_name}</p>"])
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Generador de reportes de evidencia por ejecución
+Lee el índice de evidencias (evidence_store/index.jsonl, lo escribe conftest.py)
+y genera en evidence_reports/<run_id>/ un índice de la ejecución y una página
+por test. Los videos y capturas no se incrustan: se guardan una sola vez en el
+almacén por contenido (evidence_store/objects/) y las páginas los enlazan con
+``<video preload="none">`` y un póster en miniatura, así la página se abre al
+instante y el video solo se descarga al reproducirlo.
+
+Con --bundle se genera además un HTML autocontenido por clave de Xray
+(``APPTEST-10_evidence.html``, video en base64) para adjuntarlo en Xray; el
+base64 se escribe por bloques, sin cargar el video entero en memoria.
+
+Solo los .mp4 van en ``<video>`` (o incrustados con --bundle). El H.264 crudo
+que deja VIDEO_BACKEND=stream sin ffmpeg no lo reproduce ningún navegador: se
+lista como enlace de descarga (VLC o ffplay) y no se incrusta.
+
+Uso:
+    python evidence_report.py                          # última ejecución
+    python evidence_report.py --run 20250916_235953 --execution APPTEST-22
+    python evidence_report.py --bundle --xray APPTEST-10
+"""
+
+import argparse
+import base64
+import html
+import os
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from utils.evidence_index import DEFAULT_STORE_DIR, SCREENSHOT, VIDEO, EvidenceIndex, EvidenceStore
+
+OUTPUT_DIR = "evidence_reports"
+POSTER_WIDTH = 360
+POSTER_SECOND = 1
+# Múltiplo de 3: cada bloque se codifica sin relleno y los trozos se pueden concatenar
+BASE64_CHUNK = 3 * 256 * 1024
+
+CSS = """
+        body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; margin: 0; padding: 20px;
+               background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%); min-height: 100vh; }
+        .container { max-width: 900px; margin: 0 auto; background: white; border-radius: 15px;
+                     box-shadow: 0 10px 30px rgba(0,0,0,0.1); overflow: hidden; }
+        .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white;
+                  padding: 30px; text-align: center; }
+        .test-badge { background: rgba(255,255,255,0.2); padding: 5px 15px; border-radius: 20px;
+                      font-size: 0.9em; display: inline-block; margin-bottom: 10px; }
+        .test-title { margin: 0; font-size: 2em; font-weight: 300; }
+        .metadata { background: #f8f9fa; padding: 20px; border-bottom: 1px solid #dee2e6; }
+        .meta-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 15px; }
+        .meta-item { text-align: center; }
+        .meta-label { color: #6c757d; font-size: 0.85em; margin-bottom: 5px; }
+        .meta-value { font-weight: bold; color: #495057; word-break: break-all; }
+        .section { padding: 30px; text-align: center; }
+        .video-wrapper { background: #000; border-radius: 10px; overflow: hidden;
+                         box-shadow: 0 5px 20px rgba(0,0,0,0.3); margin-bottom: 20px; }
+        video { width: 100%; height: auto; display: block; }
+        .shots { display: grid; grid-template-columns: repeat(auto-fill, minmax(180px, 1fr)); gap: 15px; }
+        .shots figure { margin: 0; }
+        .shots img { width: 100%; border-radius: 8px; box-shadow: 0 2px 8px rgba(0,0,0,0.2); }
+        .shots figcaption { color: #6c757d; font-size: 0.85em; margin-top: 5px; }
+        table { width: 100%; border-collapse: collapse; }
+        td, th { padding: 10px; border-bottom: 1px solid #dee2e6; text-align: left; }
+        td img { width: 120px; border-radius: 6px; }
+        a.btn { background: #007bff; color: white; padding: 10px 20px; border-radius: 25px; text-decoration: none; }
+        .footer { background: #f8f9fa; text-align: center; padding: 20px; color: #6c757d; font-size: 0.9em;
+                  border-top: 1px solid #dee2e6; }
+        .status-pass { color: #28a745; font-weight: bold; }
+        .status-fail { color: #dc3545; font-weight: bold; }
+"""
+
+
+def group_by_test(entries):
+    """Evidencias de la ejecución agrupadas por clave de Xray (o nodeid si no tiene)"""
+    tests = {}
+    for entry in entries:
+        key = entry.get("xray") or entry.get("nodeid") or entry["path"]
+        test = tests.setdefault(key, {
+            "key": key, "xray": entry.get("xray"), "test": entry.get("test"), "module": entry.get("module"),
+            "title": entry.get("title") or entry.get("test") or key, "outcome": "passed",
+            "time": entry.get("time"), "videos": [], "screenshots": [],
+        })
+        if entry.get("outcome") == "failed":
+            test["outcome"] = "failed"
+        if entry["kind"] == VIDEO:
+            test["videos"].append(dict(entry))
+        elif entry["kind"] == SCREENSHOT:
+            test["screenshots"].append(dict(entry))
+    return list(tests.values())
+
+
+def make_poster(store, digest, video_path, ffmpeg="ffmpeg"):
+    """Miniatura JPEG del video, una por contenido; None si no hay ffmpeg"""
+    poster_path = os.path.join(store.root, "posters", f"{digest}.jpg")
+    if os.path.exists(poster_path):
+        return poster_path
+    ffmpeg_path = shutil.which(ffmpeg)
+    if ffmpeg_path is None:
+        return None
+    os.makedirs(os.path.dirname(poster_path), exist_ok=True)
+    tmp_path = f"{poster_path}.{os.getpid()}.tmp.jpg"
+    result = subprocess.run([ffmpeg_path, "-y", "-loglevel", "error", "-ss", str(POSTER_SECOND), "-i", video_path,
+                             "-frames:v", "1", "-vf", f"scale={POSTER_WIDTH}:-2", tmp_path], capture_output=True)
+    if result.returncode != 0 or not os.path.exists(tmp_path):
+        return None
+    os.replace(tmp_path, poster_path)
+    return poster_path
+
+
+def prepare_test(test, store):
+    """Lleva las evidencias del test al almacén y genera los pósters"""
+    for media in test["videos"] + test["screenshots"]:
+        if not os.path.exists(media["path"]):
+            media["stored"] = None
+            continue
+        media["sha256"], media["stored"] = store.put(media["path"])
+        media["size"] = os.path.getsize(media["stored"])
+        if media["kind"] == VIDEO and _playable(media["stored"]):
+            media["poster"] = make_poster(store, media["sha256"], media["stored"])
+    test["videos"] = [m for m in test["videos"] if m["stored"]]
+    test["screenshots"] = [m for m in test["screenshots"] if m["stored"]]
+    return test
+
+
+def _href(path, page_dir):
+    return html.escape(os.path.relpath(path, page_dir).replace(os.sep, "/"), quote=True)
+
+
+def _playable(path):
+    """Solo el mp4 se reproduce en el navegador; el .h264 crudo no"""
+    return path.lower().endswith(".mp4")
+
+
+def write_base64(f, path):
+    """Escribe el archivo en base64 por bloques (sin cargarlo entero en memoria)"""
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(BASE64_CHUNK), b""):
+            f.write(base64.b64encode(chunk).decode("ascii"))
+
+
+def _write_header(f, test, execution):
+    badge = html.escape(test["xray"] or test["module"] or "")
+    outcome_class = "status-fail" if test["outcome"] == "failed" else "status-pass"
+    outcome = "FALLÓ" if test["outcome"] == "failed" else "EJECUTADO"
+    video = test["videos"][-1] if test["videos"] else None
+    f.write(f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Evidencia - {html.escape(test['key'])}</title>
+    <style>{CSS}    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <div class="test-badge">{badge}</div>
+            <h1 class="test-title">{html.escape(test['title'])}</h1>
+            <div style="margin-top: 10px; opacity: 0.9;">
+                Evidencia de Ejecución Automatizada{f' • Test Execution: {html.escape(execution)}' if execution else ''}
+            </div>
+        </div>
+
+        <div class="metadata">
+            <div class="meta-grid">
+                <div class="meta-item"><div class="meta-label">📊 Estado</div><div class="meta-value {outcome_class}">{outcome}</div></div>
+                <div class="meta-item"><div class="meta-label">🧪 Test</div><div class="meta-value">{html.escape(test['test'] or '')}</div></div>
+                <div class="meta-item"><div class="meta-label">📏 Video</div><div class="meta-value">{f"{video['size'] / 1024 / 1024:.1f} MB" if video else '—'}</div></div>
+                <div class="meta-item"><div class="meta-label">🕒 Ejecutado</div><div class="meta-value">{html.escape((test['time'] or '').replace('T', ' '))}</div></div>
+            </div>
+        </div>
+""")
+
+
+def _write_footer(f):
+    f.write(f"""
+        <div class="footer">
+            Evidencia generada automáticamente por pytest + Appium<br>
+            🤖 Framework de Testing Mobile | 📅 {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+
+def write_test_page(test, page_path, execution=None, bundle=False):
+    """Página de un test; con bundle los medios van incrustados en base64"""
+    page_dir = os.path.dirname(page_path)
+    with open(page_path, "w", encoding="utf-8") as f:
+        _write_header(f, test, execution)
+        for video in test["videos"]:
+            f.write('        <div class="section">\n            <h3>📹 Video de Evidencia</h3>\n')
+            if not _playable(video["stored"]):
+                note = " (no incluido en este HTML)" if bundle else ""
+                f.write(f'            <p>Video H.264 sin contenedor: ábrelo con VLC o ffplay{note}.</p>\n'
+                        f'            <a class="btn" href="{_href(video["stored"], page_dir)}" '
+                        f'download="{html.escape(os.path.basename(video["path"]), quote=True)}">💾 Descargar Video</a>\n'
+                        '        </div>\n')
+                continue
+            f.write('            <div class="video-wrapper">\n')
+            if bundle:
+                f.write('                <video controls preload="metadata">\n'
+                        '                    <source src="data:video/mp4;base64,')
+                write_base64(f, video["stored"])
+                f.write('" type="video/mp4">\n')
+            else:
+                poster = f' poster="{_href(video["poster"], page_dir)}"' if video.get("poster") else ""
+                f.write(f'                <video controls preload="none"{poster}>\n'
+                        f'                    <source src="{_href(video["stored"], page_dir)}" type="video/mp4">\n')
+            f.write('                    Tu navegador no soporta la reproducción de video.\n'
+                    '                </video>\n            </div>\n')
+            if not bundle:
+                f.write(f'            <a class="btn" href="{_href(video["stored"], page_dir)}" '
+                        f'download="{html.escape(os.path.basename(video["path"]), quote=True)}">💾 Descargar Video</a>\n')
+            f.write('        </div>\n')
+
+        if test["screenshots"]:
+            f.write('        <div class="section">\n            <h3>📸 Capturas</h3>\n            <div class="shots">\n')
+            for shot in test["screenshots"]:
+                f.write('                <figure><img loading="lazy" alt="" src="')
+                if bundle:
+                    f.write("data:image/png;base64,")
+                    write_base64(f, shot["stored"])
+                else:
+                    f.write(_href(shot["stored"], page_dir))
+                f.write(f'"><figcaption>{html.escape(shot.get("step") or "")}</figcaption></figure>\n')
+            f.write('            </div>\n        </div>\n')
+        _write_footer(f)
+    return page_path
+
+
+def write_run_index(tests, pages, index_path, run_id, execution=None):
+    index_dir = os.path.dirname(index_path)
+    failed = sum(1 for test in tests if test["outcome"] == "failed")
+    with open(index_path, "w", encoding="utf-8") as f:
+        f.write(f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Evidencias - {html.escape(run_id)}</title>
+    <style>{CSS}    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <div class="test-badge">{html.escape(execution or run_id)}</div>
+            <h1 class="test-title">Evidencias de la ejecución {html.escape(run_id)}</h1>
+            <div style="margin-top: 10px; opacity: 0.9;">{len(tests)} tests • {failed} fallidos</div>
+        </div>
+        <div class="section">
+            <table>
+                <tr><th></th><th>Test</th><th>Estado</th><th>Evidencias</th></tr>
+""")
+        for test, page in zip(tests, pages):
+            poster = next((v["poster"] for v in test["videos"] if v.get("poster")), None)
+            if poster is None and test["screenshots"]:
+                poster = test["screenshots"][-1]["stored"]
+            thumbnail = f'<img loading="lazy" alt="" src="{_href(poster, index_dir)}">' if poster else ""
+            outcome = ('<span class="status-fail">FALLÓ</span>' if test["outcome"] == "failed"
+                       else '<span class="status-pass">PASÓ</span>')
+            f.write(f'                <tr><td>{thumbnail}</td>'
+                    f'<td><a href="{_href(page, index_dir)}">{html.escape(test["xray"] or "")} '
+                    f'{html.escape(test["title"])}</a></td><td>{outcome}</td>'
+                    f'<td>📹 {len(test["videos"])} • 📸 {len(test["screenshots"])}</td></tr>\n')
+        f.write("            </table>\n        </div>\n")
+        _write_footer(f)
+    return index_path
+
+
+def _page_name(test):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in test["key"]) + ".html"
+
+
+def generate(run_id, store_dir=DEFAULT_STORE_DIR, output_dir=OUTPUT_DIR, execution=None,
+             xray=None, bundle=False, workers=4):
+    """Genera el índice y las páginas de la ejecución; devuelve la ruta del índice"""
+    index = EvidenceIndex(store_dir)
+    store = EvidenceStore(store_dir)
+    tests = group_by_test(index.entries(run_id=run_id, xray=xray))
+    if not tests:
+        return None
+    run_dir = os.path.join(output_dir, run_id)
+    os.makedirs(run_dir, exist_ok=True)
+
+    def build(test):
+        prepare_test(test, store)
+        page = write_test_page(test, os.path.join(run_dir, _page_name(test)), execution)
+        if bundle and test["xray"]:
+            write_test_page(test, os.path.join(run_dir, "bundle", f"{test['xray']}_evidence.html"), execution,
+                            bundle=True)
+        return page
+
+    if bundle:
+        os.makedirs(os.path.join(run_dir, "bundle"), exist_ok=True)
+    # Hash, copia al almacén, pósters (ffmpeg) y escritura son E/S: hilos en paralelo
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pages = list(executor.map(build, tests))
+    return write_run_index(tests, pages, os.path.join(run_dir, "index.html"), run_id, execution)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reportes de evidencia con medios externos")
+    parser.add_argument("--run", help="Run id (por defecto la última ejecución del índice)")
+    parser.add_argument("--execution", help="Clave del Test Execution de Xray que se muestra en las páginas")
+    parser.add_argument("--xray", help="Solo este test (clave de Xray)")
+    parser.add_argument("--bundle", action="store_true", help="Además, un HTML autocontenido por test para Xray")
+    parser.add_argument("--store", default=os.getenv("EVIDENCE_STORE_DIR", DEFAULT_STORE_DIR))
+    parser.add_argument("--output", default=OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    run_id = args.run or EvidenceIndex(args.store).latest_run()
+    if run_id is None:
+        print(f"❌ No hay evidencias en {args.store}")
+        sys.exit(1)
+
+    print(f"🗂️ Generando evidencias de la ejecución {run_id}...")
+    index_path = generate(run_id, args.store, args.output, args.execution, args.xray, args.bundle, args.workers)
+    if index_path is None:
+        print(f"❌ No hay evidencias para la ejecución {run_id}" + (f" y {args.xray}" if args.xray else ""))
+        sys.exit(1)
+    print(f"✅ Índice: {index_path}")
+    if shutil.which("ffmpeg") is None:
+        print("ℹ️ ffmpeg no está en el PATH: las páginas se generan sin pósters")
+
+
+if __name__ == "__main__":
+    main()
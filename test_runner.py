@@ -9,9 +9,34 @@ import sys
 import subprocess
 import argparse
 import glob
+import json
+import queue
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+from utils.discovery import TestCatalog
+from utils.durations import CACHED_RESULT_SUFFIX, DurationHistory
+from utils.junit_merge import merge_junit_reports
+from utils.live_events import EVENTS_PORT_ENV, LiveEventCollector
+from utils.pytest_worker import PersistentWorker
+from utils.session_broker import BROKER_ENV, SessionBrokerServer
+from utils.result_cache import ResultCache, file_sha256
+from utils.run_history import RunHistory
+from utils.timeout_budgets import CALIBRATION_ENV
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()  # APK_PATH y PLATFORM_VERSION se necesitan para la caché
+except ImportError:
+    pass
+
+# Puerto base de UiAutomator2 para asignar uno distinto a cada dispositivo en paralelo
+BASE_SYSTEM_PORT = 8200
+
 
 class TestRunner:
     def __init__(self):
@@ -20,29 +45,29 @@ class TestRunner:
         self.base_videos_dir = "pytest_videos"
         self.base_logs_dir = "pytest_logs"
         self.tests_dir = "tests"
+        self.adb_path = os.getenv('ADB_PATH', "adb")
+        self.appium_server = os.getenv('APPIUM_SERVER', "http://127.0.0.1:4723")
+        self.apk_path = os.getenv('APK_PATH')
+        self.device_profile = os.getenv('DEVICE_PROFILE') or f"android-{os.getenv('PLATFORM_VERSION', '15')}"
+        self.cache = None
+        self.history_runs = 10
+        self.live = False
+        self.events_port = None
+        self._print_lock = threading.Lock()
+        self.catalog = TestCatalog(self.tests_dir, os.path.join(self.base_reports_dir, ".cache", "discovery.json"))
+
+        # Worker persistente de pytest (uno por dispositivo) cuando se usa --persistent
+        self.persistent = False
+        self._workers = {}
+        self._workers_lock = threading.Lock()
 
         # Crear directorios base
         for dir_path in [self.base_reports_dir, self.base_videos_dir, self.base_logs_dir]:
             os.makedirs(dir_path, exist_ok=True)
 
     def get_test_modules(self):
-        """Obtiene lista de módulos de test disponibles"""
-        test_files = []
-        test_dirs = []
-
-        # Buscar archivos de test en el directorio raíz de tests
-        for pattern in ["test_*.py", "*_test.py"]:
-            test_files.extend(glob.glob(f"{self.tests_dir}/{pattern}"))
-
-        # Buscar subdirectorios con tests
-        for root, dirs, files in os.walk(self.tests_dir):
-            if root != self.tests_dir:  # Evitar el directorio raíz
-                for pattern in ["test_*.py", "*_test.py"]:
-                    if glob.glob(f"{root}/{pattern}"):
-                        test_dirs.append(root)
-                        break
-
-        return test_files, test_dirs
+        """Obtiene lista de módulos de test disponibles (un solo recorrido de tests/)"""
+        return self.catalog.find_modules()
 
     def get_module_name(self, path):
         """Convierte ruta a nombre de módulo para reportes"""
@@ -55,8 +80,57 @@ class TestRunner:
             # Para directorios: tests/login -> login
             return os.path.basename(path)
 
-    def run_single_module(self, module_path, module_name=None, verbose=True, capture=False):
-        """Ejecuta un módulo específico con reporte individual"""
+    def discover_devices(self):
+        """Obtiene los dispositivos en línea y autorizados según 'adb devices'"""
+        try:
+            result = subprocess.run([self.adb_path, "devices"], capture_output=True, text=True, check=True)
+        except (FileNotFoundError, subprocess.CalledProcessError) as e:
+            print(f"❌ No se pudo ejecutar 'adb devices': {e}")
+            return []
+
+        devices = []
+        for line in result.stdout.splitlines()[1:]:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1] == "device":
+                devices.append(parts[0])
+        return devices
+
+    def build_device_pool(self, device_specs=None, workers=None):
+        """Construye la lista de dispositivos a usar en paralelo.
+
+        Cada especificación tiene la forma ``serial`` o ``serial@http://host:puerto``.
+        Si no se indica servidor Appium se usa APPIUM_SERVER para todos, con un
+        ``systemPort`` de UiAutomator2 distinto por dispositivo.
+        """
+        if device_specs:
+            specs = [spec.strip() for spec in device_specs.split(",") if spec.strip()]
+        else:
+            specs = self.discover_devices()
+
+        if workers:
+            specs = specs[:workers]
+
+        pool = []
+        for index, spec in enumerate(specs):
+            device_name, _, appium_server = spec.partition("@")
+            pool.append({
+                'device_name': device_name,
+                'appium_server': appium_server or self.appium_server,
+                'system_port': str(BASE_SYSTEM_PORT + index),
+            })
+
+        if workers and len(pool) < workers:
+            print(f"⚠️ Se pidieron {workers} workers pero solo hay {len(pool)} dispositivo(s) disponible(s)")
+
+        return pool
+
+    def run_single_module(self, module_path, module_name=None, verbose=True, capture=False, device=None):
+        """Ejecuta un módulo específico con reporte individual.
+
+        Si se indica ``device`` los valores DEVICE_NAME/APPIUM_SERVER se inyectan en el
+        entorno del proceso hijo y su salida se guarda en pytest_logs/<módulo>/ para
+        no mezclarla con la de otros dispositivos.
+        """
         if not module_name:
             module_name = self.get_module_name(module_path)
 
@@ -68,9 +142,8 @@ class TestRunner:
         html_report = os.path.join(module_reports_dir, f"report_{module_name}_{self.timestamp}.html")
         xml_report = os.path.join(module_reports_dir, f"result_{module_name}_{self.timestamp}.xml")
 
-        # Comando pytest personalizado con opciones de debug
-        cmd = [
-            "python", "-m", "pytest",
+        # Argumentos de pytest personalizados con opciones de debug
+        pytest_args = [
             module_path,
             f"--html={html_report}",
             "--self-contained-html",
@@ -80,92 +153,279 @@ class TestRunner:
 
         # Agregar opciones de verbosidad y captura
         if verbose:
-            cmd.extend(["-v", "-vv"])  # Doble verbosidad para más detalle
+            pytest_args.extend(["-v", "-vv"])  # Doble verbosidad para más detalle
 
         if not capture:
-            cmd.append("-s")  # No capturar output para ver prints
+            pytest_args.append("-s")  # No capturar output para ver prints
 
         # Opciones adicionales de debug
-        cmd.extend([
+        pytest_args.extend([
             "--tb=short",  # Traceback corto pero informativo
             "--show-capture=all",  # Mostrar todo el output capturado
             "--capture=no" if not capture else "--capture=sys",  # Control de captura
         ])
-
-        print(f"\n{'=' * 60}")
-        print(f"🚀 EJECUTANDO TESTS: {module_name}")
-        print(f"📁 Módulo: {module_path}")
-        print(f"📄 HTML: {html_report}")
-        print(f"📄 XML: {xml_report}")
-        print(f"🔍 Verbosidad: {'Alta' if verbose else 'Normal'}")
-        print(f"📺 Debug output: {'Visible' if not capture else 'Capturado'}")
-        print(f"{'=' * 60}")
+        cmd = ["python", "-m", "pytest"] + pytest_args
+
+        log_file = None
+        if device:
+            module_logs_dir = os.path.join(self.base_logs_dir, module_name)
+            os.makedirs(module_logs_dir, exist_ok=True)
+            log_file = os.path.join(module_logs_dir, f"pytest_{module_name}_{self.timestamp}.log")
+
+        with self._print_lock:
+            print(f"\n{'=' * 60}")
+            print(f"🚀 EJECUTANDO TESTS: {module_name}")
+            print(f"📁 Módulo: {module_path}")
+            print(f"📄 HTML: {html_report}")
+            print(f"📄 XML: {xml_report}")
+            print(f"🔍 Verbosidad: {'Alta' if verbose else 'Normal'}")
+            print(f"📺 Debug output: {'Visible' if not capture else 'Capturado'}")
+            if device:
+                print(f"📱 Dispositivo: {device['device_name']} ({device['appium_server']})")
+                print(f"📝 Log: {log_file}")
+            print(f"{'=' * 60}")
 
         # Establecer variables de entorno para organizar videos por módulo
+        module_env = {
+            'PYTEST_MODULE_NAME': module_name,
+            'PYTEST_REPORTS_DIR': module_reports_dir,
+            'PYTEST_RUN_ID': self.timestamp,
+        }
+        if self.events_port:
+            module_env[EVENTS_PORT_ENV] = str(self.events_port)
         env = os.environ.copy()
-        env['PYTEST_MODULE_NAME'] = module_name
-        env['PYTEST_REPORTS_DIR'] = module_reports_dir
+        env.update(module_env)
+        env.update(self._device_env(device))
 
         try:
             # Mostrar comando completo cuando está en modo debug
-            if verbose and not capture:
+            if verbose and not capture and not device:
                 print(f"🔧 Comando ejecutándose:")
                 print(f"   {' '.join(cmd)}")
                 print()
 
-            result = subprocess.run(cmd, env=env, capture_output=False)
-
-            if result.returncode == 0:
-                print(f"✅ Tests de {module_name} completados exitosamente")
+            if self.persistent:
+                returncode = self._get_worker(device).run(pytest_args, env=module_env, log_file=log_file)
+            elif log_file:
+                with open(log_file, 'w', encoding='utf-8') as log:
+                    returncode = subprocess.run(cmd, env=env, stdout=log, stderr=subprocess.STDOUT).returncode
             else:
-                print(f"⚠️ Tests de {module_name} completados con fallos")
+                returncode = subprocess.run(cmd, env=env, capture_output=False).returncode
+
+            with self._print_lock:
+                if returncode == 0:
+                    print(f"✅ Tests de {module_name} completados exitosamente")
+                else:
+                    print(f"⚠️ Tests de {module_name} completados con fallos")
 
-            return result.returncode, html_report, xml_report
+            return returncode, html_report, xml_report
 
         except Exception as e:
             print(f"❌ Error ejecutando tests de {module_name}: {e}")
             return 1, None, None
 
-    def run_all_modules(self, verbose=True, capture=False):
-        """Ejecuta todos los módulos por separado"""
+    def _device_env(self, device):
+        """Variables de entorno que fijan el dispositivo de un proceso pytest"""
+        if not device:
+            return {}
+        return {
+            'DEVICE_NAME': device['device_name'],
+            'APPIUM_SERVER': device['appium_server'],
+            'APPIUM_SYSTEM_PORT': device['system_port'],
+        }
+
+    def _get_worker(self, device):
+        """Devuelve (y arranca si hace falta) el worker persistente del dispositivo"""
+        key = device['device_name'] if device else None
+        with self._workers_lock:
+            if key not in self._workers:
+                env = os.environ.copy()
+                env.update(self._device_env(device))
+                self._workers[key] = PersistentWorker(env).start()
+            return self._workers[key]
+
+    def close_workers(self):
+        """Detiene los workers persistentes y sus sesiones de Appium"""
+        for worker in self._workers.values():
+            worker.close()
+        self._workers.clear()
+
+    def run_all_modules(self, verbose=True, capture=False, devices=None, changed_only=False, use_cache=True):
+        """Ejecuta todos los módulos por separado.
+
+        Con más de un dispositivo en ``devices`` los módulos se reparten entre ellos
+        y se ejecutan en paralelo, un proceso pytest por dispositivo. Con
+        ``changed_only`` se saltan los módulos cuya clave de caché ya pasó.
+        """
         test_files, test_dirs = self.get_test_modules()
-        all_results = []
 
         print(f"\n🔍 MÓDULOS ENCONTRADOS:")
         print(f"📄 Archivos: {[self.get_module_name(f) for f in test_files]}")
         print(f"📁 Directorios: {[self.get_module_name(d) for d in test_dirs]}")
 
-        # Ejecutar archivos individuales
-        for test_file in test_files:
-            module_name = self.get_module_name(test_file)
-            returncode, html_report, xml_report = self.run_single_module(
-                test_file, module_name, verbose=verbose, capture=capture
-            )
-            all_results.append({
-                'module': module_name,
-                'path': test_file,
-                'returncode': returncode,
-                'html_report': html_report,
-                'xml_report': xml_report
-            })
-
-        # Ejecutar directorios
-        for test_dir in test_dirs:
-            module_name = self.get_module_name(test_dir)
-            returncode, html_report, xml_report = self.run_single_module(
-                test_dir, module_name, verbose=verbose, capture=capture
-            )
-            all_results.append({
-                'module': module_name,
-                'path': test_dir,
-                'returncode': returncode,
-                'html_report': html_report,
-                'xml_report': xml_report
-            })
-
+        # Archivos individuales primero y luego directorios
+        jobs = [(path, self.get_module_name(path)) for path in test_files + test_dirs]
+
+        self._init_cache(use_cache)
+        cache_keys = {}
+        cached_results = []
+        if self.cache:
+            cache_keys = {module_path: self.cache.module_key(module_path, self.apk_path, self.device_profile)
+                          for module_path, _ in jobs}
+            if changed_only:
+                pending = []
+                for module_path, module_name in jobs:
+                    cached = self.cache.lookup(cache_keys[module_path])
+                    if cached:
+                        cached_results.append(self._reuse_cached_result(module_path, module_name, cached))
+                    else:
+                        pending.append((module_path, module_name))
+                jobs = pending
+        elif changed_only:
+            print("⚠️ --changed-only requiere la caché; se ejecutan todos los módulos")
+
+        parallel = bool(devices and len(devices) > 1)
+        history = None
+        predicted = None
+        if parallel or self.live:
+            history = DurationHistory(self.base_reports_dir).load(exclude_timestamp=self.timestamp)
+
+        if parallel:
+            # Ordenar por duración histórica para no dejar un módulo largo al final
+            jobs, predicted = history.schedule(jobs, len(devices))
+            print(f"\n🗓️ Orden por duración estimada ({history.runs_loaded} reportes históricos):")
+            for _path, module_name in jobs:
+                known = "" if module_name in history.module_estimates else " (sin historial)"
+                print(f"  - {module_name}: ~{history.module_estimate(module_name):.1f}s{known}")
+
+        # Panel en vivo: siempre en paralelo (la salida de cada módulo va a su log) o con --live
+        collector = None
+        if parallel or self.live:
+            collector = LiveEventCollector([name for _, name in jobs], history,
+                                           workers=len(devices) if parallel else 1).start()
+            self.events_port = collector.port
+
+        start = time.monotonic()
+        try:
+            if parallel:
+                all_results = self._run_modules_parallel(jobs, devices, verbose=verbose, capture=capture)
+            else:
+                device = devices[0] if devices else None
+                all_results = []
+                for module_path, module_name in jobs:
+                    all_results.append(self._run_job(module_path, module_name, verbose, capture, device))
+        finally:
+            if collector:
+                collector.stop()
+                self.events_port = None
+
+        if parallel:
+            print(f"⏱️ Makespan previsto: {predicted:.1f}s | real: {time.monotonic() - start:.1f}s")
+
+        if self.cache:
+            for result in all_results:
+                if result['returncode'] == 0 and result['xml_report'] and os.path.exists(result['xml_report']):
+                    self.cache.store(cache_keys[result['path']], result['module'], result['xml_report'])
+
+        all_results = cached_results + all_results
+        self.write_run_manifest(all_results)
+        self.record_history(all_results)
         self.generate_summary_report(all_results)
         return all_results
 
+    def record_history(self, results):
+        """Guarda los testcases de esta ejecución en el historial SQLite"""
+        apk_hash = None
+        if self.apk_path and os.path.exists(self.apk_path):
+            apk_hash = self.cache.apk_hash(self.apk_path) if self.cache else file_sha256(self.apk_path)
+
+        history = RunHistory(os.path.join(self.base_reports_dir, "history.sqlite"))
+        try:
+            for result in results:
+                # Los resultados de caché no son una ejecución nueva
+                if result.get('cached') or not result['xml_report'] or not os.path.exists(result['xml_report']):
+                    continue
+                try:
+                    history.record_junit(result['xml_report'], self.timestamp, result['module'],
+                                         device=result.get('device') or os.getenv('DEVICE_NAME'),
+                                         apk_hash=apk_hash)
+                except Exception as e:
+                    print(f"⚠️ No se pudo guardar el historial de {result['module']}: {e}")
+        finally:
+            history.close()
+
+    def _init_cache(self, use_cache):
+        """Activa la caché de resultados si está permitida y el APK existe"""
+        self.cache = None
+        if not use_cache:
+            print("🚫 Caché de resultados desactivada (--no-cache)")
+            return
+        if not self.apk_path or not os.path.exists(self.apk_path):
+            print(f"⚠️ APK no encontrado ({self.apk_path}); caché de resultados desactivada")
+            return
+        self.cache = ResultCache(os.path.join(self.base_reports_dir, ".cache"))
+
+    def _reuse_cached_result(self, module_path, module_name, cached):
+        """Copia el XML cacheado como resultado de esta ejecución para que entre en el merge
+
+        La copia lleva el sufijo CACHED_RESULT_SUFFIX: no es una ejecución real, así que
+        ni DurationHistory ni el historial de duraciones la cuentan.
+        """
+        module_reports_dir = os.path.join(self.base_reports_dir, module_name)
+        os.makedirs(module_reports_dir, exist_ok=True)
+        xml_report = os.path.join(module_reports_dir,
+                                  f"result_{module_name}_{self.timestamp}{CACHED_RESULT_SUFFIX}")
+        shutil.copyfile(cached['xml'], xml_report)
+        print(f"♻️ {module_name} sin cambios desde {cached['stored_at']}; se reutiliza el resultado")
+        return {
+            'module': module_name,
+            'path': module_path,
+            'returncode': 0,
+            'html_report': None,
+            'xml_report': xml_report,
+            'device': None,
+            'duration': 0.0,
+            'cached': True,
+        }
+
+    def _run_job(self, module_path, module_name, verbose, capture, device=None):
+        """Ejecuta un módulo y devuelve el diccionario de resultado usado en el resumen"""
+        start = time.monotonic()
+        returncode, html_report, xml_report = self.run_single_module(
+            module_path, module_name, verbose=verbose, capture=capture, device=device
+        )
+        return {
+            'module': module_name,
+            'path': module_path,
+            'returncode': returncode,
+            'html_report': html_report,
+            'xml_report': xml_report,
+            'device': device['device_name'] if device else None,
+            'duration': time.monotonic() - start,
+        }
+
+    def _run_modules_parallel(self, jobs, devices, verbose=True, capture=False):
+        """Reparte los módulos entre los dispositivos: cada worker toma un dispositivo
+        libre, ejecuta un módulo y lo devuelve al pool."""
+        free_devices = queue.Queue()
+        for device in devices:
+            free_devices.put(device)
+
+        print(f"\n📱 Ejecución en paralelo con {len(devices)} dispositivo(s): "
+              f"{[d['device_name'] for d in devices]}")
+
+        def worker(job):
+            module_path, module_name = job
+            device = free_devices.get()
+            try:
+                return self._run_job(module_path, module_name, verbose, capture, device)
+            finally:
+                free_devices.put(device)
+
+        # executor.map entrega los trabajos en orden: cada worker libre toma el siguiente
+        with ThreadPoolExecutor(max_workers=len(devices)) as executor:
+            return list(executor.map(worker, jobs))
+
     def generate_summary_report(self, results):
         """Genera un reporte resumen de todos los módulos"""
         summary_file = os.path.join(self.base_reports_dir, f"summary_{self.timestamp}.md")
@@ -184,12 +444,20 @@ class TestRunner:
             f.write(f"- **Módulos exitosos:** {passed_modules}\n")
             f.write(f"- **Módulos con fallos:** {failed_modules}\n\n")
 
+            self._write_latency_section(f)
+
             # Detalles por módulo
             f.write(f"## 📋 Detalles por Módulo\n\n")
             for result in results:
                 status = "✅ EXITOSO" if result['returncode'] == 0 else "❌ FALLÓ"
+                if result.get('cached'):
+                    status += " (caché)"
                 f.write(f"### {result['module']} - {status}\n")
                 f.write(f"- **Ruta:** `{result['path']}`\n")
+                if result.get('device'):
+                    f.write(f"- **Dispositivo:** `{result['device']}`\n")
+                if result.get('duration') is not None:
+                    f.write(f"- **Duración:** {result['duration']:.1f}s\n")
                 if result['html_report']:
                     f.write(f"- **Reporte HTML:** `{result['html_report']}`\n")
                 if result['xml_report']:
@@ -198,80 +466,132 @@ class TestRunner:
 
         print(f"\n📋 Reporte resumen generado: {summary_file}")
 
+    def _write_latency_section(self, f):
+        """Tabla de duración por test frente a las últimas ejecuciones del historial"""
+        history_path = os.path.join(self.base_reports_dir, "history.sqlite")
+        if not os.path.exists(history_path):
+            return
+
+        history = RunHistory(history_path)
+        try:
+            stats = history.test_stats(self.timestamp, last_n=self.history_runs)
+        finally:
+            history.close()
+        if not stats:
+            return
+
+        def seconds(value):
+            return f"{value:.1f}s" if value is not None else "-"
+
+        f.write(f"## ⏱️ Duración por Test (últimas {self.history_runs} ejecuciones)\n\n")
+        f.write("| Test | Xray | Resultado | Duración | p50 | p95 | Δ vs p50 |\n")
+        f.write("|------|------|-----------|----------|-----|-----|----------|\n")
+        for stat in stats:
+            regression = f"{stat['regression']:+.0%}" if stat['regression'] is not None else "-"
+            if stat['regression'] is not None and stat['regression'] > 0.2:
+                regression += " ⚠️"
+            f.write(f"| `{stat['test_id']}` | {stat['xray_key'] or '-'} | {stat['outcome']} "
+                    f"| {seconds(stat['duration'])} | {seconds(stat['p50'])} | {seconds(stat['p95'])} "
+                    f"| {regression} |\n")
+        f.write("\n")
+
+        instrumented = [stat for stat in stats if stat['breakdown']]
+        if instrumented:
+            f.write("## 🔬 Desglose de Tiempo por Test\n\n")
+            f.write("| Test | Red (Appium) | Esperando (implicit wait) | Sleeps | Local |\n")
+            f.write("|------|--------------|---------------------------|--------|-------|\n")
+            for stat in instrumented:
+                breakdown = stat['breakdown']
+                f.write(f"| `{stat['test_id']}` | {seconds(breakdown['network'])} | {seconds(breakdown['waiting'])} "
+                        f"| {seconds(breakdown['sleeping'])} | {seconds(breakdown['local'])} |\n")
+            f.write("\n")
+
     def list_modules(self):
-        """Lista todos los módulos disponibles"""
+        """Lista todos los módulos disponibles con sus tests (análisis estático, sin importar)"""
         test_files, test_dirs = self.get_test_modules()
 
         print(f"\n📋 MÓDULOS DISPONIBLES:")
         print(f"\n📄 Archivos de test:")
         for test_file in test_files:
-            module_name = self.get_module_name(test_file)
-            print(f"  - {module_name} ({test_file})")
+            self._print_module(test_file)
 
         print(f"\n📁 Directorios de test:")
         for test_dir in test_dirs:
-            module_name = self.get_module_name(test_dir)
-            print(f"  - {module_name} ({test_dir})")
-
-    def merge_xml_reports(self, output_file="merged_results.xml"):
-        """Combina todos los reportes XML en uno solo para Xray"""
-        xml_files = glob.glob(f"{self.base_reports_dir}/**/result_*.xml", recursive=True)
+            self._print_module(test_dir)
+
+        self.catalog.save()
+
+    def _print_module(self, module_path):
+        module_name = self.get_module_name(module_path)
+        tests = self.catalog.tests_in_module(module_path)
+        print(f"  - {module_name} ({module_path}) - {len(tests)} test(s)")
+        for test in tests:
+            keys = f" [{', '.join(test['xray'])}]" if test['xray'] else ""
+            print(f"      · {test['name']}{keys}")
+
+    def write_run_manifest(self, results):
+        """Guarda la lista de reportes XML de esta ejecución (la usa merge_xml_reports)"""
+        manifest_dir = os.path.join(self.base_reports_dir, "runs")
+        os.makedirs(manifest_dir, exist_ok=True)
+        manifest_path = os.path.join(manifest_dir, f"run_{self.timestamp}.json")
+
+        manifest = {
+            'run_id': self.timestamp,
+            'modules': [
+                {'module': r['module'], 'xml_report': r['xml_report'], 'returncode': r['returncode']}
+                for r in results if r.get('xml_report')
+            ],
+        }
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        return manifest_path
+
+    def _latest_run_id(self):
+        manifests = sorted(glob.glob(os.path.join(self.base_reports_dir, "runs", "run_*.json")))
+        if not manifests:
+            return None
+        return os.path.basename(manifests[-1])[len("run_"):-len(".json")]
+
+    def get_run_xml_reports(self, run_id):
+        """Reportes XML de una ejecución según su manifiesto o, si no existe, por timestamp"""
+        manifest_path = os.path.join(self.base_reports_dir, "runs", f"run_{run_id}.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            return [m['xml_report'] for m in manifest['modules'] if os.path.exists(m['xml_report'])]
+
+        return sorted(glob.glob(f"{self.base_reports_dir}/**/result_*_{run_id}.xml", recursive=True) +
+                      glob.glob(f"{self.base_reports_dir}/**/result_*_{run_id}{CACHED_RESULT_SUFFIX}",
+                                recursive=True))
+
+    def merge_xml_reports(self, output_file="merged_results.xml", run_id=None):
+        """Combina los reportes XML de una ejecución en uno solo para Xray.
+
+        Por defecto se usa la ejecución actual y, si no tiene reportes, la última con
+        manifiesto. Los testcases repetidos se deduplican por clave de Xray quedando
+        el más reciente.
+        """
+        if run_id is None:
+            run_id = self.timestamp
+            if not self.get_run_xml_reports(run_id):
+                run_id = self._latest_run_id() or run_id
+
+        xml_files = self.get_run_xml_reports(run_id)
 
         if not xml_files:
-            print("⚠️ No se encontraron reportes XML para combinar")
+            print(f"⚠️ No se encontraron reportes XML para combinar (ejecución {run_id})")
             return
 
-        print(f"\n🔗 Combinando {len(xml_files)} reportes XML...")
+        print(f"\n🔗 Combinando {len(xml_files)} reportes XML de la ejecución {run_id}...")
 
         try:
-            import xml.etree.ElementTree as ET
-
-            # Crear elemento raíz combinado
-            root = ET.Element("testsuites")
-            root.set("name", "CombinedAppiumTests")
-            root.set("time", "0")
-            root.set("tests", "0")
-            root.set("failures", "0")
-            root.set("errors", "0")
-
-            total_tests = 0
-            total_failures = 0
-            total_errors = 0
-            total_time = 0.0
-
-            for xml_file in xml_files:
-                try:
-                    tree = ET.parse(xml_file)
-                    testsuite = tree.getroot()
-
-                    # Agregar testsuite al root combinado
-                    root.append(testsuite)
-
-                    # Sumar estadísticas
-                    total_tests += int(testsuite.get("tests", 0))
-                    total_failures += int(testsuite.get("failures", 0))
-                    total_errors += int(testsuite.get("errors", 0))
-                    total_time += float(testsuite.get("time", 0))
-
-                except Exception as e:
-                    print(f"⚠️ Error procesando {xml_file}: {e}")
-
-            # Actualizar estadísticas totales
-            root.set("tests", str(total_tests))
-            root.set("failures", str(total_failures))
-            root.set("errors", str(total_errors))
-            root.set("time", str(total_time))
-
-            # Guardar archivo combinado
             output_path = os.path.join(self.base_reports_dir, output_file)
-            tree = ET.ElementTree(root)
-            tree.write(output_path, encoding="utf-8", xml_declaration=True)
+            totals = merge_junit_reports(xml_files, output_path)
 
             print(f"✅ Reporte XML combinado generado: {output_path}")
-            print(f"📊 Total tests: {total_tests}, Fallos: {total_failures}, Errores: {total_errors}")
+            print(f"📊 Total tests: {totals['tests']}, Fallos: {totals['failures']}, "
+                  f"Errores: {totals['errors']}, Saltados: {totals['skipped']}")
 
-        except ImportError:
-            print("❌ xml.etree.ElementTree no disponible para combinar reportes")
         except Exception as e:
             print(f"❌ Error combinando reportes XML: {e}")
 
@@ -282,6 +602,31 @@ def main():
     parser.add_argument('--all', '-a', action='store_true', help='Ejecutar todos los módulos')
     parser.add_argument('--list', '-l', action='store_true', help='Listar módulos disponibles')
     parser.add_argument('--merge', action='store_true', help='Combinar reportes XML existentes')
+    parser.add_argument('--run-id', help='Ejecución (timestamp) a combinar con --merge; por defecto la última')
+
+    # Opciones de ejecución en paralelo
+    parser.add_argument('--devices',
+                        help='Dispositivos para ejecutar en paralelo: serial[@servidor_appium],... '
+                             '(por defecto los de "adb devices" cuando se usa --workers)')
+    parser.add_argument('--workers', '-w', type=int,
+                        help='Número de dispositivos/workers a usar en paralelo con --all')
+
+    # Opciones de caché de resultados
+    parser.add_argument('--changed-only', action='store_true',
+                        help='Saltar módulos sin cambios (mismo APK, fuentes y dispositivo) que ya pasaron')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='No consultar ni actualizar la caché de resultados')
+    parser.add_argument('--history-runs', type=int, default=10,
+                        help='Ejecuciones previas usadas para p50/p95 en el resumen (por defecto 10)')
+    parser.add_argument('--session-broker', action='store_true',
+                        help='Compartir una sesión de Appium caliente por dispositivo entre procesos pytest')
+    parser.add_argument('--live', action='store_true',
+                        help='Mostrar el panel de progreso en vivo también en ejecución secuencial')
+    parser.add_argument('--persistent', action='store_true',
+                        help='Ejecutar los módulos en un worker pytest persistente con la sesión de Appium caliente')
+    parser.add_argument('--calibrate', action='store_true',
+                        help='Calibrar los timeouts: esperar hasta el techo y recalcular los presupuestos por '
+                             'localizador y pantalla (ignora --changed-only)')
 
     # Opciones de debug y verbosidad
     parser.add_argument('--quiet', '-q', action='store_true',
@@ -309,11 +654,34 @@ def main():
         print("🔍 MODO NORMAL - Verbosidad alta, output visible (equivalente a -v -s)")
 
     runner = TestRunner()
-
+    runner.persistent = args.persistent
+    runner.history_runs = args.history_runs
+    runner.live = args.live
+
+    if args.calibrate:
+        os.environ[CALIBRATION_ENV] = '1'
+        print("📏 Calibración de timeouts: las latencias observadas sustituirán los presupuestos guardados")
+
+    broker = None
+    if args.session_broker:
+        broker = SessionBrokerServer().start()
+        os.environ[BROKER_ENV] = broker.url
+        print(f"🔌 Broker de sesiones de Appium en {broker.url}")
+
+    try:
+        run_command(runner, args, parser, verbose, capture)
+    finally:
+        runner.close_workers()
+        if broker:
+            broker.stop()
+
+
+def run_command(runner, args, parser, verbose, capture):
+    """Ejecuta la acción pedida por línea de comandos"""
     if args.list:
         runner.list_modules()
     elif args.merge:
-        runner.merge_xml_reports()
+        runner.merge_xml_reports(run_id=args.run_id)
     elif args.module:
         # Buscar el módulo específico
         test_files, test_dirs = runner.get_test_modules()
@@ -327,12 +695,25 @@ def main():
                 break
 
         if target_path:
-            runner.run_single_module(target_path, verbose=verbose, capture=capture)
+            returncode, html_report, xml_report = runner.run_single_module(
+                target_path, verbose=verbose, capture=capture)
+            runner.write_run_manifest([{
+                'module': runner.get_module_name(target_path),
+                'xml_report': xml_report,
+                'returncode': returncode,
+            }])
         else:
             print(f"❌ Módulo '{args.module}' no encontrado")
             print("💡 Usa --list para ver módulos disponibles")
     elif args.all:
-        runner.run_all_modules(verbose=verbose, capture=capture)
+        devices = None
+        if args.devices or args.workers:
+            devices = runner.build_device_pool(args.devices, args.workers)
+            if not devices:
+                print("❌ No hay dispositivos disponibles para ejecutar en paralelo")
+                sys.exit(1)
+        runner.run_all_modules(verbose=verbose, capture=capture, devices=devices,
+                               changed_only=args.changed_only and not args.calibrate, use_cache=not args.no_cache)
     else:
         parser.print_help()
         print("\n💡 Configuración por defecto: equivalente a pytest -v -s")
@@ -1,17 +1,36 @@
 import pytest
-import time
-from appium.webdriver.common.appiumby import AppiumBy
-from selenium.common.exceptions import NoSuchElementException
+from utils.hierarchy_snapshots import load as load_snapshot, print_summary
+from utils.waits import WaitTimeout
 
 
 class Login:
     # El flujo completo de pruebas es una prueba de regresión
     # que abarca desde la pantalla inicial hasta el cierre de sesión.
+    #
+    # Los elementos se buscan por nombre lógico en el registro de localizadores
+    # (utils/locator_registry.py), que prueba primero la estrategia que
+    # históricamente los encontró más rápido.
+    #
+    # No hay pausas fijas: cada paso espera una condición (utils/waits.py) y
+    # declara con legacy_sleep cuánto dormía antes, para comparar en el reporte.
+    #
+    # @pytest.mark.screen indica la pantalla en la que empieza cada test: si el
+    # test anterior falló o se ejecuta solo, el navegador llega a ella por el
+    # camino más corto (utils/screen_navigator.py).
+    #
+    # @pytest.mark.logged_in restaura la sesión guardada tras el primer login
+    # real (utils/app_state.py) en vez de repetir el login por UI.
+    #
+    # @pytest.mark.depends_on encadena los pasos del login (01-06): si un paso
+    # falla sus dependientes se saltan al instante (utils/test_dependencies.py).
+    # Productos y menú no dependen de ellos: logged_in y screen les dan su
+    # propia precondición, así que corren (y se reejecutan) solos.
 
     # UI Tests
     # Test 1: Hacer click en el botón 'Registrarme'
     @pytest.mark.xray("APPTEST-10")
-    def test_01_click_registrarme(self, driver, video_recorder):
+    @pytest.mark.screen("bienvenida")
+    def test_01_click_registrarme(self, driver, waits, video_recorder):
 
         print("\n=== TEST 1: Click en Registrarme ===")
 
@@ -19,21 +38,12 @@ class Login:
             # Buscar el botón "Registrarme" (es el botón con borde blanco)
             print("Buscando botón 'Registrarme'...")
 
-            # Estrategia 1: Por texto exacto
-            registrarme_button = None
-            try:
-                registrarme_button = driver.find_element(AppiumBy.XPATH, "//*[@content-desc='Registrarme']")
-                print("Encontrado por texto exacto")
-            except NoSuchElementException:
-                pass
-
-            assert registrarme_button is not None, "No se pudo encontrar el botón 'Registrarme'"
+            registrarme_button = waits.until_visible("Registrarme", legacy_sleep=1)
 
             # Hacer click
-            time.sleep(1)
             print("Haciendo click en Registrarme...")
             registrarme_button.click()
-            time.sleep(1)
+            waits.until_gone("Registrarme", legacy_sleep=1)
 
             print("✅ TEST 1 COMPLETADO: Click en Registrarme exitoso")
 
@@ -48,7 +58,8 @@ class Login:
     # UI Tests
     # Test 2: Usar botón atrás del teléfono para volver
     @pytest.mark.xray("APPTEST-11")
-    def test_02_go_back_with_phone_button(self, driver, video_recorder):
+    @pytest.mark.depends_on("test_01_click_registrarme")
+    def test_02_go_back_with_phone_button(self, driver, waits, video_recorder):
 
         print("\n=== TEST 2: Botón atrás del teléfono ===")
 
@@ -57,19 +68,17 @@ class Login:
 
             # Usar el botón back del dispositivo
             driver.back()
-            time.sleep(1)  # Reducido de 2 a 1
 
             # Verificar que volvimos a la pantalla principal
             # buscando el texto "¡Bienvenido!" o "Iniciar sesión"
             try:
-                bienvenido_text = driver.find_element(AppiumBy.XPATH, "//*[contains(@text,'Bienvenido')]")
-                print("Confirmado: Volvimos a la pantalla principal (texto 'Bienvenido' encontrado)")
-            except NoSuchElementException:
-                try:
-                    iniciar_sesion_button = driver.find_element(AppiumBy.XPATH, "//*[contains(@text,'Iniciar sesión')]")
-                    print("Confirmado: Volvimos a la pantalla principal (botón 'Iniciar sesión' encontrado)")
-                except NoSuchElementException:
-                    print("⚠️ No se pudo confirmar que volvimos, pero el test continúa...")
+                confirmacion = waits.until_screen([
+                    "//*[contains(@text,'Bienvenido')]",
+                    "//*[contains(@text,'Iniciar sesión')]",
+                ], legacy_sleep=1, screen="Bienvenida")
+                print(f"Confirmado: Volvimos a la pantalla principal (encontrado: {confirmacion})")
+            except WaitTimeout:
+                print("⚠️ No se pudo confirmar que volvimos, pero el test continúa...")
 
             print("✅ TEST 2 COMPLETADO: Botón atrás funcionó correctamente")
 
@@ -84,36 +93,20 @@ class Login:
     # UI Tests
     # Test 3: Hacer click en el botón azul 'Iniciar sesión'
     @pytest.mark.xray("APPTEST-12")
-    def test_03_click_iniciar_sesion(self, driver, video_recorder):
+    @pytest.mark.screen("bienvenida")
+    def test_03_click_iniciar_sesion(self, driver, waits, video_recorder):
 
         print("\n=== TEST 3: Click en Iniciar sesión ===")
 
         try:
             print("Buscando botón 'Iniciar sesión'...")
 
-            # Estrategia 1: Por texto exacto
-            iniciar_sesion_button = None
-            try:
-                iniciar_sesion_button = driver.find_element(AppiumBy.XPATH, "//*[@content-desc='Iniciar sesión']")
-                print("Encontrado por content desc exacto")
-            except NoSuchElementException:
-                pass
-
-            # Estrategia 2: Por content description que contenga "Iniciar"
-            if not iniciar_sesion_button:
-                try:
-                    iniciar_sesion_button = driver.find_element(AppiumBy.XPATH,
-                                                                "//*[contains(@content-desc,'Iniciar')]")
-                    print("Encontrado por description con contains Iniciar'")
-                except NoSuchElementException:
-                    pass
-
-            assert iniciar_sesion_button is not None, "No se pudo encontrar el botón 'Iniciar sesión'"
+            iniciar_sesion_button = waits.until_visible("Iniciar sesión")
 
             # Hacer click
             print("Haciendo click en 'Iniciar sesión'...")
             iniciar_sesion_button.click()
-            time.sleep(2)  # Reducido de 3 a 2
+            waits.until_stable(legacy_sleep=2, screen="Correo empresarial")
 
             print("✅ TEST 3 COMPLETADO: Click en 'Iniciar sesión' exitoso")
 
@@ -128,7 +121,9 @@ class Login:
     # UI Tests
     # Test 4: Escribir email falso y presionar continuar
     @pytest.mark.xray("APPTEST-13")
-    def test_04_escribir_email_y_continuar(self, driver, video_recorder):
+    @pytest.mark.screen("login_correo")
+    @pytest.mark.depends_on("test_03_click_iniciar_sesion")
+    def test_04_escribir_email_y_continuar(self, driver, waits, text_input, video_recorder):
 
         print("\n=== TEST 4: Escribir email y continuar ===")
 
@@ -136,82 +131,39 @@ class Login:
             # Buscar el campo de texto con hint "Correo empresarial"
             print("Buscando campo de correo empresarial...")
 
-            email_field = None
-            try:
-                email_field = driver.find_element(AppiumBy.XPATH, "//*[@hint='Correo empresarial']")
-                print("Encontrado campo por hint exacto")
-            except NoSuchElementException:
-                try:
-                    email_field = driver.find_element(AppiumBy.XPATH, "//*[contains(@hint,'Correo')]")
-                    print("Encontrado campo por hint que contiene 'Correo'")
-                except NoSuchElementException:
-                    try:
-                        # Buscar cualquier EditText
-                        email_field = driver.find_element(AppiumBy.XPATH, "//android.widget.EditText")
-                        print("Encontrado como EditText genérico")
-                    except NoSuchElementException:
-                        pass
-
-            assert email_field is not None, "No se pudo encontrar el campo de correo"
-
-            # Hacer click en el campo para asegurar que esté enfocado
-            print("Haciendo click en el campo de email...")
-            email_field.click()
-            time.sleep(0.5)  # Reducido de 1 a 0.5
+            email_field = waits.until_visible("Correo empresarial")
 
-            # Limpiar el campo
-            email_field.clear()
-            time.sleep(0.3)  # Reducido de 0.5 a 0.3
-
-            # Escribir el email más rápido
+            # Escribir el email completo en un solo comando (reemplaza el contenido)
             email_text = "emailFalso@gmail.com"
-            print("Escribiendo email más rápido...")
-
-            # Escribir de 3 en 3 caracteres para acelerar
-            for i in range(0, len(email_text), 3):
-                chunk = email_text[i:i + 3]
-                email_field.send_keys(chunk)
-                print(f"Escribiendo: {chunk}")
-                time.sleep(0.1)  # Reducido significativamente
-
-            # Pausa después de terminar de escribir
-            time.sleep(1)  # Reducido de 2 a 1
-            print("Email escrito completamente. Ocultando teclado...")
+            print("Escribiendo email...")
+            estrategia = text_input.set_text(email_field, email_text)
+            print(f"Email escrito completamente con: {estrategia}")
 
-            # Ocultar el teclado
-            try:
-                driver.hide_keyboard()
-                print("Teclado ocultado con hide_keyboard()")
-            except:
+            # Ocultar el teclado (solo si alguna estrategia lo abrió)
+            if driver.is_keyboard_shown():
                 try:
-                    # Alternativa: usar botón atrás para cerrar teclado
-                    driver.back()
-                    print("Teclado ocultado con botón atrás")
+                    driver.hide_keyboard()
+                    print("Teclado ocultado con hide_keyboard()")
                 except:
-                    print("⚠️ No se pudo ocultar el teclado, continuando...")
+                    try:
+                        # Alternativa: usar botón atrás para cerrar teclado
+                        driver.back()
+                        print("Teclado ocultado con botón atrás")
+                    except:
+                        print("⚠️ No se pudo ocultar el teclado, continuando...")
 
-            time.sleep(0.5)  # Reducido de 1 a 0.5
+            # Esperar a que termine la animación del teclado (sustituye las pausas
+            # de foco, limpieza, escritura por partes y post-escritura)
+            waits.until_stable(legacy_sleep=0.5 + 0.3 + 0.7 + 1, screen="Teclado correo")
 
             # Buscar el botón "Continuar"
             print("Buscando botón 'Continuar'...")
-
-            continuar_button = None
-            try:
-                continuar_button = driver.find_element(AppiumBy.XPATH, "//*[@content-desc='Continuar']")
-                print("Encontrado por content-desc exacto")
-            except NoSuchElementException:
-                try:
-                    continuar_button = driver.find_element(AppiumBy.XPATH, "//*[contains(@content-desc,'Continuar')]")
-                    print("Encontrado por content-desc que contiene 'Continuar'")
-                except NoSuchElementException:
-                    pass
-
-            assert continuar_button is not None, "No se pudo encontrar el botón 'Continuar'"
+            continuar_button = waits.until_visible("Continuar", legacy_sleep=0.5)
 
             # Hacer click en continuar
             print("Haciendo click en 'Continuar'...")
             continuar_button.click()
-            time.sleep(2)  # Reducido de 3 a 2
+            waits.until_stable(legacy_sleep=2, screen="Métodos de acceso")
 
             print("✅ TEST 4 COMPLETADO: Email escrito más rápido y botón continuar presionado")
 
@@ -226,63 +178,31 @@ class Login:
     # UI Tests
     # Test 5: Hacer click en el botón 'Usuario y contraseña'
     @pytest.mark.xray("APPTEST-14")
-    def test_05_click_usuario_y_contrasena(self, driver, video_recorder):
+    @pytest.mark.screen("metodos_acceso")
+    @pytest.mark.depends_on("test_04_escribir_email_y_continuar")
+    def test_05_click_usuario_y_contrasena(self, driver, waits, locator_engine, video_recorder):
 
         print("\n=== TEST 5: Click en Usuario y contraseña ===")
 
         try:
             print("Buscando botón 'Usuario y contraseña'...")
 
-            # Estrategia 1: Por content description exacto
-            usuario_contrasena_button = None
             try:
-                usuario_contrasena_button = driver.find_element(AppiumBy.XPATH,
-                                                                "//*[@content-desc='Usuario y contraseña']")
-                print("Encontrado por content-desc exacto")
-            except NoSuchElementException:
-                pass
-
-            # Estrategia 2: Por content description que contenga
-            if not usuario_contrasena_button:
-                try:
-                    usuario_contrasena_button = driver.find_element(AppiumBy.XPATH,
-                                                                    "//*[contains(@content-desc,'Usuario')]")
-                    print("Encontrado por content-desc que contiene 'Usuario'")
-                except NoSuchElementException:
-                    pass
-
-            # Estrategia 3: Por content description que contenga "contraseña"
-            if not usuario_contrasena_button:
-                try:
-                    usuario_contrasena_button = driver.find_element(AppiumBy.XPATH,
-                                                                    "//*[contains(@content-desc,'contraseña')]")
-                    print("Encontrado por content-desc que contiene 'contraseña'")
-                except NoSuchElementException:
-                    pass
-
-            # Debug: Si no encontramos nada, mostrar elementos disponibles
-            if not usuario_contrasena_button:
+                usuario_contrasena_button = waits.until_visible("Usuario y contraseña")
+            except WaitTimeout:
+                # Debug: mostrar los elementos clickeables de la misma instantánea
                 print("🔍 DEBUG: Elementos clickeables encontrados:")
-                clickable_elements = driver.find_elements(AppiumBy.XPATH, "//*[@clickable='true']")
-                for i, elem in enumerate(clickable_elements):
-                    try:
-                        text = elem.get_attribute("text") or "(sin texto)"
-                        content_desc = elem.get_attribute("content-desc") or "(sin descripción)"
-                        print(f"  {i}: Texto: '{text}' | Desc: '{content_desc}'")
-                    except:
-                        print(f"  {i}: Error obteniendo info del elemento")
-
-            assert usuario_contrasena_button is not None, "No se pudo encontrar el botón 'Usuario y contraseña'"
+                for i, node in enumerate(locator_engine.nodes("//*[@clickable='true']")):
+                    text = node.get("text") or "(sin texto)"
+                    content_desc = node.get("content-desc") or "(sin descripción)"
+                    print(f"  {i}: Texto: '{text}' | Desc: '{content_desc}'")
+                raise
 
             # Hacer click
             print("Haciendo click en 'Usuario y contraseña'...")
             usuario_contrasena_button.click()
-            time.sleep(2)  # Reducido de 3 a 2
 
             # Verificar que cambió de pantalla buscando elementos de login típicos
-            pantalla_cambio = False
-
-            # Buscar elementos típicos de pantalla de login con usuario/contraseña
             elementos_login_usuario = [
                 "//*[contains(@hint,'usuario') or contains(@hint,'Usuario')]",
                 "//*[contains(@hint,'contraseña') or contains(@hint,'Contraseña')]",
@@ -292,16 +212,10 @@ class Login:
                 "//android.widget.EditText"
             ]
 
-            for selector in elementos_login_usuario:
-                try:
-                    driver.find_element(AppiumBy.XPATH, selector)
-                    pantalla_cambio = True
-                    print(f"Confirmado: Cambió de pantalla (encontrado elemento: {selector})")
-                    break
-                except NoSuchElementException:
-                    continue
-
-            if not pantalla_cambio:
+            try:
+                selector = waits.until_screen(elementos_login_usuario, legacy_sleep=2, screen="Usuario y contraseña")
+                print(f"Confirmado: Cambió de pantalla (encontrado elemento: {selector})")
+            except WaitTimeout:
                 print("⚠️ No se pudo confirmar el cambio de pantalla, pero el click se ejecutó")
 
             print("✅ TEST 5 COMPLETADO: Click en 'Usuario y contraseña' exitoso")
@@ -317,7 +231,9 @@ class Login:
     # UI Tests
     # Test 6: Escribir usuario y contraseña y presionar siguiente
     @pytest.mark.xray("APPTEST-15")
-    def test_06_escribir_usuario_y_contrasena(self, driver, video_recorder):
+    @pytest.mark.screen("usuario_contrasena")
+    @pytest.mark.depends_on("test_05_click_usuario_y_contrasena")
+    def test_06_escribir_usuario_y_contrasena(self, driver, waits, text_input, video_recorder):
 
         print("\n=== TEST 6: Escribir usuario y contraseña ===")
 
@@ -325,145 +241,49 @@ class Login:
             # Buscar el campo de usuario
             print("Buscando campo de usuario...")
 
-            usuario_field = None
-            try:
-                usuario_field = driver.find_element(AppiumBy.XPATH, "//*[@hint='Usuario']")
-                print("Encontrado campo de usuario por hint exacto")
-            except NoSuchElementException:
-                try:
-                    usuario_field = driver.find_element(AppiumBy.XPATH, "//*[contains(@hint,'usuario')]")
-                    print("Encontrado campo de usuario por hint que contiene 'usuario'")
-                except NoSuchElementException:
-                    # Buscar como primer EditText
-                    try:
-                        edit_fields = driver.find_elements(AppiumBy.XPATH, "//android.widget.EditText")
-                        if edit_fields:
-                            usuario_field = edit_fields[0]
-                            print("Encontrado como primer campo EditText")
-                    except:
-                        pass
-
-            assert usuario_field is not None, "No se pudo encontrar el campo de usuario"
+            usuario_field = waits.until_visible("Campo usuario")
 
             # Buscar el campo de contraseña
             print("Buscando campo de contraseña...")
 
-            contrasena_field = None
-            try:
-                contrasena_field = driver.find_element(AppiumBy.XPATH, "//*[@hint='Contraseña']")
-                print("Encontrado campo de contraseña por hint exacto")
-            except NoSuchElementException:
-                try:
-                    contrasena_field = driver.find_element(AppiumBy.XPATH, "//*[contains(@hint,'contraseña')]")
-                    print("Encontrado campo de contraseña por hint que contiene 'contraseña'")
-                except NoSuchElementException:
-                    # Buscar como segundo EditText
-                    try:
-                        edit_fields = driver.find_elements(AppiumBy.XPATH, "//android.widget.EditText")
-                        if len(edit_fields) >= 2:
-                            contrasena_field = edit_fields[1]
-                            print("Encontrado como segundo campo EditText")
-                    except:
-                        pass
-
-            assert contrasena_field is not None, "No se pudo encontrar el campo de contraseña"
+            contrasena_field = waits.until_visible("Campo contraseña")
 
-            # Escribir usuario más rápido
+            # Escribir usuario en un solo comando (reemplaza el contenido)
             print("Escribiendo usuario...")
-            usuario_field.click()
-            time.sleep(0.5)  # Reducido de 1 a 0.5
-            usuario_field.clear()
-            time.sleep(0.3)  # Reducido de 0.5 a 0.3
-
-            # Escribir usuario directamente (más rápido)
             usuario_text = "Alejandro.Morales"
-            usuario_field.send_keys(usuario_text)
-            time.sleep(0.5)  # Reducido de 1 a 0.5
-            print("Usuario escrito completamente")
+            estrategia = text_input.set_text(usuario_field, usuario_text)
+            print(f"Usuario escrito completamente con: {estrategia}")
 
-            # Escribir contraseña
+            # Escribir contraseña (campo enmascarado: se verifica la longitud)
             print("Escribiendo contraseña...")
-            contrasena_field.click()
-            time.sleep(0.5)  # Reducido de 1 a 0.5
-            contrasena_field.clear()
-            time.sleep(0.3)  # Reducido de 0.5 a 0.3
-
-            # Pegar la contraseña completa de una vez
-            contrasena_field.send_keys("Admin123")
-            time.sleep(0.5)  # Reducido de 1 a 0.5
-            print("Contraseña pegada completamente")
-
-            # Ocultar el teclado
-            print("Ocultando teclado...")
-            try:
-                driver.hide_keyboard()
-                print("Teclado ocultado con hide_keyboard()")
-            except:
+            estrategia = text_input.set_text(contrasena_field, "Admin123", secret=True)
+            print(f"Contraseña pegada completamente con: {estrategia}")
+
+            # Ocultar el teclado (solo si alguna estrategia lo abrió)
+            if driver.is_keyboard_shown():
+                print("Ocultando teclado...")
                 try:
-                    driver.back()
-                    print("Teclado ocultado con botón atrás")
+                    driver.hide_keyboard()
+                    print("Teclado ocultado con hide_keyboard()")
                 except:
-                    print("⚠️ No se pudo ocultar el teclado, continuando...")
+                    try:
+                        driver.back()
+                        print("Teclado ocultado con botón atrás")
+                    except:
+                        print("⚠️ No se pudo ocultar el teclado, continuando...")
 
-            time.sleep(0.5)  # Reducido de 1 a 0.5
+            # Esperar a que termine la animación del teclado (sustituye las pausas
+            # tras cada click, limpieza y escritura de los dos campos)
+            waits.until_stable(legacy_sleep=2 * (0.5 + 0.3 + 0.5), screen="Teclado usuario")
 
             # Buscar el botón "Siguiente"
             print("Buscando botón 'Siguiente'...")
-
-            siguiente_button = None
-
-            # Estrategia 2: Por content description
-            if not siguiente_button:
-                try:
-                    siguiente_button = driver.find_element(AppiumBy.XPATH, "//*[@content-desc='Siguiente']")
-                    print("Encontrado por content-desc exacto")
-                except NoSuchElementException:
-                    pass
-
-            # Estrategia 3: Por texto que contenga
-            if not siguiente_button:
-                try:
-                    siguiente_button = driver.find_element(AppiumBy.XPATH, "//*[contains(@content-desc,'Siguiente')]")
-                    print("Encontrado por texto que contiene 'Siguiente'")
-                except NoSuchElementException:
-                    pass
-
-            # Estrategia 4: Buscar botones habilitados recientemente
-            if not siguiente_button:
-                try:
-                    # Buscar elementos clickeables que podrían ser el botón siguiente
-                    clickable_elements = driver.find_elements(AppiumBy.XPATH, "//*[@clickable='true']")
-                    for elem in clickable_elements:
-                        try:
-                            text = elem.get_attribute("text") or ""
-                            content_desc = elem.get_attribute("content-desc") or ""
-                            if ("siguiente" in text.lower() or "siguiente" in content_desc.lower() or
-                                    "continuar" in text.lower() or "continuar" in content_desc.lower() or
-                                    "login" in text.lower() or "entrar" in text.lower()):
-                                siguiente_button = elem
-                                print(f"Encontrado por contenido relacionado: '{text}' / '{content_desc}'")
-                                break
-                        except:
-                            continue
-                except:
-                    pass
-
-            # Estrategia 5: Como último recurso, usar el último botón clickeable
-            if not siguiente_button:
-                try:
-                    clickable_elements = driver.find_elements(AppiumBy.XPATH, "//*[@clickable='true']")
-                    if clickable_elements:
-                        siguiente_button = clickable_elements[-1]
-                        print("Encontrado como último elemento clickeable")
-                except:
-                    pass
-
-            assert siguiente_button is not None, "No se pudo encontrar el botón 'Siguiente'"
+            siguiente_button = waits.until_visible("Siguiente", legacy_sleep=0.5)
 
             # Hacer click en siguiente
             print("Haciendo click en 'Siguiente'...")
             siguiente_button.click()
-            time.sleep(2)  # Reducido de 3 a 2
+            waits.until_stable(legacy_sleep=2, screen="Inicio")
 
             print("✅ TEST 6 COMPLETADO: Usuario y contraseña escritos más rápido, botón siguiente presionado")
 
@@ -478,7 +298,9 @@ class Login:
     # UI Tests + Gestos
     # Test 7: Flujo productos - Ver productos → PDC → FFA
     @pytest.mark.xray("APPTEST-16")
-    def test_07_flujo_productos(self, driver, video_recorder):
+    @pytest.mark.logged_in
+    @pytest.mark.screen("inicio")
+    def test_07_flujo_productos(self, driver, waits, video_recorder):
 
         print("\n=== TEST 7: Flujo productos (Ver productos → PDC → FFA) ===")
 
@@ -486,80 +308,29 @@ class Login:
             # Paso 1: Click en "Ver productos"
             print("Paso 1: Buscando botón 'Ver productos'...")
 
-            ver_productos_button = None
-            try:
-                ver_productos_button = driver.find_element(AppiumBy.XPATH, "//*[@content-desc='Ver productos']")
-                print("Encontrado 'Ver productos' por content-desc exacto")
-            except NoSuchElementException:
-                try:
-                    ver_productos_button = driver.find_element(AppiumBy.XPATH,
-                                                               "//*[contains(@content-desc,'Ver productos')]")
-                    print("Encontrado 'Ver productos' por content-desc que contiene")
-                except NoSuchElementException:
-                    try:
-                        ver_productos_button = driver.find_element(AppiumBy.XPATH,
-                                                                   "//*[contains(@content-desc,'productos')]")
-                        print("Encontrado por content-desc que contiene 'productos'")
-                    except NoSuchElementException:
-                        pass
-
-            assert ver_productos_button is not None, "No se pudo encontrar el botón 'Ver productos'"
+            ver_productos_button = waits.until_visible("Ver productos")
 
             print("Haciendo click en 'Ver productos'...")
             ver_productos_button.click()
-            time.sleep(1.5)  # Reducido de 2 a 1.5
 
             # Paso 2: Click en "PDC"
             print("Paso 2: Buscando botón 'PDC'...")
-
-            pdc_button = None
-            try:
-                pdc_button = driver.find_element(AppiumBy.XPATH, "//*[@text='PDC']")
-                print("Encontrado 'PDC' por texto exacto")
-            except NoSuchElementException:
-                try:
-                    pdc_button = driver.find_element(AppiumBy.XPATH, "//*[@content-desc='PDC']")
-                    print("Encontrado 'PDC' por content-desc exacto")
-                except NoSuchElementException:
-                    try:
-                        pdc_button = driver.find_element(AppiumBy.XPATH, "//*[contains(@text,'PDC')]")
-                        print("Encontrado 'PDC' por texto que contiene")
-                    except NoSuchElementException:
-                        try:
-                            pdc_button = driver.find_element(AppiumBy.XPATH, "//*[contains(@content-desc,'PDC')]")
-                            print("Encontrado 'PDC' por content-desc que contiene")
-                        except NoSuchElementException:
-                            pass
-
-            assert pdc_button is not None, "No se pudo encontrar el botón 'PDC'"
+            pdc_button = waits.until_visible("PDC", legacy_sleep=1.5)
 
             print("Haciendo click en 'PDC'...")
             pdc_button.click()
-            time.sleep(1.5)  # Reducido de 2 a 1.5
 
-            # Paso 3: Esperar menos tiempo
+            # Paso 3: Esperar a que la pantalla termine de cargar
             print("Paso 3: Esperando...")
-            time.sleep(0.5)  # Reducido de 1 a 0.5
+            waits.until_stable(legacy_sleep=1.5 + 0.5, screen="PDC")
 
             # Paso 4: Click en FFA
             print("Paso 4: Buscando botón 'FFA'...")
-            ffa_button = None
-            try:
-                ffa_button = driver.find_element(AppiumBy.XPATH, "//*[@content-desc='FFA']")
-                print("Encontrado 'FFA' por content-desc exacto")
-            except NoSuchElementException:
-                try:
-                    ffa_button = driver.find_element(AppiumBy.XPATH, "//*[contains(@text,'FFA')]")
-                    print("Encontrado 'FFA' por texto que contiene")
-                except NoSuchElementException:
-                    print("⚠️ No se pudo encontrar el botón 'FFA'")
-                    pass
-
-            assert ffa_button is not None, "No se pudo encontrar el botón 'FFA'"
+            ffa_button = waits.until_visible("FFA")
 
             print("Haciendo click en 'FFA'...")
             ffa_button.click()
-            time.sleep(1.5)  # Reducido de 2 a 1.5
+            waits.until_stable(legacy_sleep=1.5, screen="FFA")
 
             print("✅ TEST 7 COMPLETADO: Flujo Ver productos → PDC → FFA exitoso")
 
@@ -574,7 +345,9 @@ class Login:
     # UI Tests + Gestos
     # Test 8: Flujo menú y salir - Menu → Scroll → Salir
     @pytest.mark.xray("APPTEST-17")
-    def test_08_flujo_menu_y_salir(self, driver, video_recorder):
+    @pytest.mark.logged_in
+    @pytest.mark.screen("inicio")
+    def test_08_flujo_menu_y_salir(self, driver, waits, gestures, video_recorder):
 
         print("\n=== TEST 8: Flujo menú y salir (Menu → Scroll → Salir) ===")
 
@@ -582,79 +355,22 @@ class Login:
             # Paso 1: Click en "menu"
             print("Paso 1: Buscando botón 'menu'...")
 
-            menu_button = None
-            try:
-                menu_button = driver.find_element(AppiumBy.XPATH, "//*[@content-desc='Menú']")
-                print("Encontrado 'Menú' por content-desc exacto")
-            except NoSuchElementException:
-                try:
-                    menu_button = driver.find_element(AppiumBy.XPATH, "//*[@text='Menú']")
-                    print("Encontrado 'Menú' por texto exacto")
-                except NoSuchElementException:
-                    try:
-                        menu_button = driver.find_element(AppiumBy.XPATH, "//*[contains(@text,'Menú')]")
-                        print("Encontrado 'Menú' por texto que contiene")
-                    except NoSuchElementException:
-                        try:
-                            menu_button = driver.find_element(AppiumBy.XPATH, "//*[contains(@content-desc,'Menú')]")
-                            print("Encontrado 'menu' por content-desc que contiene")
-                        except NoSuchElementException:
-                            try:
-                                menu_button = driver.find_element(AppiumBy.XPATH, "//*[@text='Menú']")
-                                print("Encontrado 'Menú' con mayúscula")
-                            except NoSuchElementException:
-                                pass
-
-            assert menu_button is not None, "No se pudo encontrar el botón 'Menú'"
+            menu_button = waits.until_visible("Menú")
 
             print("Haciendo click en 'Menú'...")
             menu_button.click()
-            time.sleep(1.5)  # Reducido de 2 a 1.5
-
-            # Paso 2: Hacer scroll hacia abajo
-            print("Paso 2: Haciendo scroll hacia abajo...")
-
-            # Obtener dimensiones de la pantalla para el scroll
-            screen_size = driver.get_window_size()
-            screen_width = screen_size['width']
-            screen_height = screen_size['height']
+            # El menú se despliega con animación: esperar antes de hacer scroll
+            waits.until_stable(legacy_sleep=1.5, screen="Menú")
 
-            # Scroll desde 80% hasta 20% de la altura de la pantalla
-            start_x = screen_width // 2
-            start_y = int(screen_height * 0.8)
-            end_x = screen_width // 2
-            end_y = int(screen_height * 0.2)
-
-            driver.swipe(start_x, start_y, end_x, end_y, 800)  # Reducido de 1000 a 800ms
-            time.sleep(0.5)  # Reducido de 1 a 0.5
+            # Paso 2 y 3: Hacer scroll hacia abajo hasta que aparezca "salir"
+            print("Paso 2: Haciendo scroll hacia abajo hasta 'salir'...")
+            salir_button = gestures.scroll_to("Salir")
+            assert salir_button is not None, "No se pudo encontrar el botón 'salir' tras hacer scroll"
             print("Scroll hacia abajo completado")
 
-            # Paso 3: Presionar "salir"
-            print("Paso 3: Buscando botón 'salir'...")
-
-            salir_button = None
-            try:
-                salir_button = driver.find_element(AppiumBy.XPATH, "//*[@content-desc='Salir']")
-                print("Encontrado 'salir' por content-desc exacto")
-            except NoSuchElementException:
-                try:
-                    salir_button = driver.find_element(AppiumBy.XPATH, "//*[@text='Salir']")
-                    print("Encontrado 'salir' por texto exacto")
-                except NoSuchElementException:
-                    try:
-                        salir_button = driver.find_element(AppiumBy.XPATH, "//*[contains(@text,'Salir')]")
-                        print("Encontrado 'salir' por texto que contiene")
-                    except NoSuchElementException:
-                        pass
-
-            assert salir_button is not None, "No se pudo encontrar el botón 'salir'"
-
-            print("Haciendo click en coordenadas específicas del botón Salir...")
-            screen_size = driver.get_window_size()
-            click_x = int(screen_size['width'] * 0.25)
-            click_y = int(screen_size['height'] * 0.95)
-            driver.tap([(click_x, click_y)])
-            time.sleep(2)  # Reducido de 3 a 2
+            print("Paso 3: Haciendo click en coordenadas específicas del botón Salir...")
+            gestures.tap_at(0.25, 0.95)
+            waits.until_stable(legacy_sleep=2, screen="Salir")
 
             print("✅ TEST 8 COMPLETADO: Flujo Menu → Scroll → Salir exitoso")
 
@@ -668,7 +384,7 @@ class Login:
 
     # Test de Inspección de Elementos
     @pytest.mark.xray("APPTEST-18")
-    def test_debug_current_screen(self, driver, video_recorder):
+    def test_debug_current_screen(self, driver, hierarchy, video_recorder):
         """ Debug - Mostrar todos los elementos de la pantalla actual"""
         print("\n=== DEBUG - Elementos actuales ===")
 
@@ -677,42 +393,10 @@ class Login:
             print(f"Package actual: {driver.current_package}")
             print(f"Activity actual: {driver.current_activity}")
 
-            # Mostrar todos los elementos con texto
-            print("\n📝 Elementos con texto:")
-            text_elements = driver.find_elements(AppiumBy.XPATH, "//*[@content-desc]")
-            for i, elem in enumerate(text_elements):
-                try:
-                    text = elem.get_attribute("content-desc")
-                    clickable = elem.get_attribute("clickable")
-                    print(f"  {i + 1}. '{text}' (clickable: {clickable})")
-                except:
-                    print(f"  {i + 1}. Error obteniendo texto del elemento")
-
-            # Mostrar elementos clickeables
-            print("\n🎯 Elementos clickeables:")
-            clickable_elements = driver.find_elements(AppiumBy.XPATH, "//*[@clickable='true']")
-            for i, elem in enumerate(clickable_elements):
-                try:
-                    text = elem.get_attribute("text") or "(sin texto)"
-                    content_desc = elem.get_attribute("content-desc") or "(sin descripción)"
-                    resource_id = elem.get_attribute("resource-id") or "(sin ID)"
-                    print(f"  {i + 1}. Texto: '{text}' | Desc: '{content_desc}' | ID: '{resource_id}'")
-                except:
-                    print(f"  {i + 1}. Error obteniendo info del elemento clickeable")
-
-            # Mostrar campos de texto
-            print("\n✏️ Campos de texto:")
-            edit_text_elements = driver.find_elements(AppiumBy.XPATH, "//android.widget.EditText")
-            if edit_text_elements:
-                for i, elem in enumerate(edit_text_elements):
-                    try:
-                        hint = elem.get_attribute("hint") or "(sin hint)"
-                        text = elem.get_attribute("text") or "(sin texto)"
-                        print(f"  {i + 1}. Hint: '{hint}' | Texto actual: '{text}'")
-                    except:
-                        print(f"  {i + 1}. Error obteniendo info del campo de texto")
-            else:
-                print("  No se encontraron campos de texto")
+            # Toda la jerarquía en un solo page_source, guardada y analizada en local
+            snapshot_path = hierarchy("debug")
+            print(f"🌳 Jerarquía guardada: {snapshot_path}")
+            print_summary(load_snapshot(snapshot_path))
 
             print("\n✅ TEST COMPLETADO: Debug información mostrada")
 
@@ -722,4 +406,4 @@ class Login:
             # El video se detiene automáticamente al finalizar el test
             video_path = video_recorder()
             if video_path:
-                print(f"📹 Video evidencia guardado: {video_path}")
\ No newline at end of file
+                print(f"📹 Video evidencia guardado: {video_path}")
@@ -0,0 +1,28 @@
+"""
+Tests del propio framework (runner, caché, broker, plugins...)
+No usan dispositivo ni Appium: se ejecutan contra los dobles de utils/
+(fake_appium.py, fake_adb.py) y en directorios temporales.
+
+    python -m pytest unit_tests
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_ADB = [sys.executable, os.path.join(ROOT_DIR, "utils", "fake_adb.py")]
+
+
+@pytest.fixture(scope="session", autouse=True)
+def setup_test_environment():
+    """Sustituye la verificación de Appium, APK y dispositivo del conftest raíz."""
+    yield
+
+
+@pytest.fixture
+def fake_adb(tmp_path, monkeypatch):
+    """Comando adb falso (utils/fake_adb.py); su dispositivo es tmp_path/device."""
+    monkeypatch.setenv("FAKE_ADB_ROOT", str(tmp_path / "device"))
+    return list(FAKE_ADB)
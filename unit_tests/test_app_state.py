@@ -0,0 +1,85 @@
+"""Caché del estado autenticado contra el adb falso (utils/app_state.py, utils/fake_adb.py)"""
+
+import json
+
+import pytest
+
+from utils.app_state import AppStateCache, AppStateError
+
+PACKAGE = "com.example.poc"
+
+
+@pytest.fixture
+def app_dir(tmp_path):
+    """Data dir de la app en el dispositivo falso, con una sesión iniciada"""
+    path = tmp_path / "device" / "data" / PACKAGE
+    (path / "shared_prefs").mkdir(parents=True)
+    (path / "databases").mkdir()
+    (path / "cache").mkdir()
+    (path / "shared_prefs" / "session.xml").write_text('<map><string name="token">abc123</string></map>')
+    (path / "databases" / "app.db").write_bytes(b"sqlite")
+    (path / "cache" / "tmp.bin").write_bytes(b"x" * 1024)
+    return path
+
+
+def cache_for(fake_adb, tmp_path, apk_hash="a" * 64):
+    return AppStateCache(fake_adb, device_name="emulator-5554", package=PACKAGE, apk_hash=apk_hash,
+                         cache_dir=str(tmp_path / "cache"))
+
+
+def test_captura_y_restaura_el_data_dir(fake_adb, tmp_path, app_dir):
+    cache = cache_for(fake_adb, tmp_path)
+    cache.capture()
+    (app_dir / "shared_prefs" / "session.xml").write_text("<map />")
+    (app_dir / "databases" / "app.db").unlink()
+
+    cache.restore()
+
+    assert "abc123" in (app_dir / "shared_prefs" / "session.xml").read_text()
+    assert (app_dir / "databases" / "app.db").read_bytes() == b"sqlite"
+
+
+def test_solo_se_capturan_los_directorios_de_estado(fake_adb, tmp_path, app_dir):
+    cache = cache_for(fake_adb, tmp_path)
+    cache.capture()
+
+    with open(cache.meta_path, encoding="utf-8") as f:
+        assert json.load(f)["dirs"] == ["shared_prefs", "databases"]
+
+
+def test_restaurar_borra_lo_escrito_despues_de_capturar(fake_adb, tmp_path, app_dir):
+    cache = cache_for(fake_adb, tmp_path)
+    cache.capture()
+    (app_dir / "shared_prefs" / "otra_cuenta.xml").write_text("<map />")
+
+    cache.restore()
+
+    assert not (app_dir / "shared_prefs" / "otra_cuenta.xml").exists()
+
+
+def test_otro_apk_no_reutiliza_el_estado(fake_adb, tmp_path, app_dir):
+    cache_for(fake_adb, tmp_path).capture()
+
+    other = cache_for(fake_adb, tmp_path, apk_hash="b" * 64)
+
+    assert not other.exists()
+    with pytest.raises(AppStateError, match="No hay estado"):
+        other.restore()
+
+
+def test_invalidate_borra_la_captura(fake_adb, tmp_path, app_dir):
+    cache = cache_for(fake_adb, tmp_path)
+    cache.capture()
+    cache.invalidate()
+    assert not cache.exists()
+
+
+def test_app_sin_estado_no_se_captura(fake_adb, tmp_path):
+    with pytest.raises(AppStateError, match="no tiene"):
+        cache_for(fake_adb, tmp_path).capture()
+
+
+def test_error_de_adb_se_convierte_en_app_state_error(tmp_path):
+    cache = AppStateCache(str(tmp_path / "no-existe" / "adb"), package=PACKAGE, cache_dir=str(tmp_path))
+    with pytest.raises(AppStateError):
+        cache.capture()
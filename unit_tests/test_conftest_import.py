@@ -0,0 +1,15 @@
+"""Presupuesto de importación de conftest.py (colectar tests debe ser barato)"""
+
+from conftest import ROOT_DIR
+from utils.discovery import IMPORT_BUDGET_MS, measure_conftest_import
+
+
+def test_conftest_no_carga_modulos_pesados():
+    _elapsed_ms, heavy = measure_conftest_import(ROOT_DIR)
+    assert heavy == []
+
+
+def test_conftest_dentro_del_presupuesto():
+    # El mejor de tres: una sola medida depende demasiado de la caché del sistema
+    best_ms = min(measure_conftest_import(ROOT_DIR)[0] for _ in range(3))
+    assert best_ms <= IMPORT_BUDGET_MS, f"import conftest: {best_ms:.1f} ms (presupuesto {IMPORT_BUDGET_MS} ms)"
@@ -0,0 +1,97 @@
+"""Estimación de duraciones y reparto longest-first (utils/durations.py)"""
+
+import pytest
+
+from utils.durations import CACHED_RESULT_SUFFIX, DurationHistory, parse_result_filename
+
+
+def write_result(reports_dir, module, timestamp, suite_time, cases=()):
+    module_dir = reports_dir / module
+    module_dir.mkdir(parents=True, exist_ok=True)
+    testcases = "".join(f'<testcase classname="tests.{module}" name="{name}" time="{time}"/>'
+                        for name, time in cases)
+    path = module_dir / f"result_{module}_{timestamp}.xml"
+    path.write_text(f'<testsuites><testsuite name="{module}" time="{suite_time}">{testcases}</testsuite></testsuites>',
+                    encoding="utf-8")
+    return path
+
+
+def history_with(estimates, default=120.0):
+    history = DurationHistory(default_module_seconds=default)
+    history.module_estimates.update(estimates)
+    return history
+
+
+def test_parse_result_filename_con_guiones_bajos_en_el_modulo():
+    assert parse_result_filename("x/result_venta_directa_20250101_120000.xml") == ("venta_directa", "20250101_120000")
+    assert parse_result_filename("x/report_login_20250101_120000.html") is None
+
+
+def test_schedule_ordena_del_mas_largo_al_mas_corto():
+    history = history_with({"a": 10.0, "b": 7.0, "c": 6.0, "d": 5.0})
+    jobs = [("tests/d", "d"), ("tests/b", "b"), ("tests/a", "a"), ("tests/c", "c")]
+
+    ordered, makespan = history.schedule(jobs, workers=2)
+
+    assert [name for _path, name in ordered] == ["a", "b", "c", "d"]
+    # a→w1 (10), b→w2 (7), c→w2 (13), d→w1 (15)
+    assert makespan == pytest.approx(15.0)
+
+
+def test_makespan_lpt_mejor_que_el_orden_de_descubrimiento():
+    history = history_with({"corto1": 1.0, "corto2": 1.0, "corto3": 1.0, "largo": 9.0})
+    discovered = [("p", "corto1"), ("p", "corto2"), ("p", "corto3"), ("p", "largo")]
+
+    ordered, makespan = history.schedule(discovered, workers=2)
+
+    assert ordered[0][1] == "largo"
+    assert makespan == pytest.approx(9.0)
+    assert history.predict_makespan(discovered, workers=2) == pytest.approx(10.0)
+
+
+def test_modulo_sin_historial_usa_el_valor_por_defecto():
+    history = history_with({"conocido": 30.0}, default=60.0)
+
+    ordered, makespan = history.schedule([("p", "conocido"), ("p", "nuevo")], workers=1)
+
+    assert [name for _path, name in ordered] == ["nuevo", "conocido"]
+    assert makespan == pytest.approx(90.0)
+
+
+def test_load_aplica_ewma_en_orden_cronologico(tmp_path):
+    write_result(tmp_path, "login", "20250102_090000", 20.0, [("test_01", 4.0)])
+    write_result(tmp_path, "login", "20250101_090000", 10.0, [("test_01", 2.0)])
+
+    history = DurationHistory(str(tmp_path), alpha=0.5).load()
+
+    assert history.runs_loaded == 2
+    assert history.module_estimate("login") == pytest.approx(15.0)
+    assert history.test_estimate_by_name("login", "test_01") == pytest.approx(3.0)
+    assert history.test_estimate("tests.login::test_01") == pytest.approx(3.0)
+
+
+def test_load_excluye_la_ejecucion_en_curso(tmp_path):
+    write_result(tmp_path, "login", "20250101_090000", 10.0)
+    write_result(tmp_path, "login", "20250102_090000", 99.0)
+
+    history = DurationHistory(str(tmp_path)).load(exclude_timestamp="20250102_090000")
+
+    assert history.runs_loaded == 1
+    assert history.module_estimate("login") == pytest.approx(10.0)
+
+
+def test_load_ignora_los_resultados_reutilizados_de_la_cache(tmp_path):
+    import test_runner
+
+    original = write_result(tmp_path, "login", "20240101_100000", 100.0)
+    runner = test_runner.TestRunner()
+    runner.base_reports_dir = str(tmp_path)
+    runner.timestamp = "20240102_100000"
+    reused = runner._reuse_cached_result("tests/login", "login", {"xml": str(original), "stored_at": "ayer"})
+
+    assert reused["xml_report"].endswith(f"result_login_20240102_100000{CACHED_RESULT_SUFFIX}")
+    assert parse_result_filename(reused["xml_report"]) is None
+    history = DurationHistory(str(tmp_path)).load()
+    assert history.runs_loaded == 1
+    # El merge de la ejecución sí la encuentra aunque no haya manifiesto
+    assert runner.get_run_xml_reports("20240102_100000") == [reused["xml_report"]]
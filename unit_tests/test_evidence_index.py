@@ -0,0 +1,47 @@
+"""Índice de evidencias y selección de capturas para Xray (utils/evidence_index.py)"""
+
+from utils.evidence_index import SCREENSHOT, VIDEO, EvidenceIndex, screenshots_by_test
+
+
+def indexed(tmp_path, *steps_by_key):
+    index = EvidenceIndex(str(tmp_path))
+    for key, steps in steps_by_key:
+        for number, step in enumerate(steps, 1):
+            index.add(SCREENSHOT, f"{key}/{number:02d}_{step}.png", "run1", "login", xray=key, step=step)
+    index.add(VIDEO, "login.mp4", "run1", "login", xray="APPTEST-1")
+    return index.entries(run_id="run1")
+
+
+def test_por_defecto_una_captura_por_test(tmp_path):
+    entries = indexed(tmp_path,
+                      ("APPTEST-1", ["login", "inicio", "final"]),
+                      ("APPTEST-2", ["login", "fallo_call"]))
+
+    assert screenshots_by_test(entries) == {
+        "APPTEST-1": ["APPTEST-1/03_final.png"],
+        "APPTEST-2": ["APPTEST-2/02_fallo_call.png"],
+    }
+
+
+def test_el_fallo_gana_a_la_final(tmp_path):
+    entries = indexed(tmp_path, ("APPTEST-1", ["login", "fallo_call", "final", "fallo_teardown"]))
+    assert screenshots_by_test(entries) == {"APPTEST-1": ["APPTEST-1/04_fallo_teardown.png"]}
+
+
+def test_sin_final_queda_la_ultima(tmp_path):
+    # La final era igual al último paso y no se indexó
+    entries = indexed(tmp_path, ("APPTEST-1", ["login", "inicio"]))
+    assert screenshots_by_test(entries) == {"APPTEST-1": ["APPTEST-1/02_inicio.png"]}
+
+
+def test_all_steps_sube_todas_las_capturas(tmp_path):
+    entries = indexed(tmp_path, ("APPTEST-1", ["login", "inicio", "final"]))
+    assert screenshots_by_test(entries, all_steps=True) == {
+        "APPTEST-1": ["APPTEST-1/01_login.png", "APPTEST-1/02_inicio.png", "APPTEST-1/03_final.png"],
+    }
+
+
+def test_capturas_sin_clave_de_xray_no_se_suben(tmp_path):
+    index = EvidenceIndex(str(tmp_path))
+    index.add(SCREENSHOT, "sin_clave.png", "run1", "login", step="final")
+    assert screenshots_by_test(index.entries()) == {}
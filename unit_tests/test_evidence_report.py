@@ -0,0 +1,30 @@
+"""Páginas de evidencia (evidence_report.py)"""
+
+import base64
+
+import evidence_report
+
+
+def page_for(tmp_path, video_name, bundle):
+    video = tmp_path / video_name
+    video.write_bytes(b"\x00\x00\x00\x01video")
+    test = {"key": "APPTEST-1", "xray": "APPTEST-1", "module": "login", "title": "Login", "test": "test_01",
+            "outcome": "failed", "time": "2025-01-01T10:00:00", "screenshots": [],
+            "videos": [{"path": str(video), "stored": str(video), "size": video.stat().st_size}]}
+    page = tmp_path / "page.html"
+    evidence_report.write_test_page(test, str(page), bundle=bundle)
+    return page.read_text(encoding="utf-8")
+
+
+def test_mp4_en_video_y_en_el_bundle(tmp_path):
+    assert '<source src="t.mp4" type="video/mp4">' in page_for(tmp_path, "t.mp4", bundle=False)
+    encoded = base64.b64encode(b"\x00\x00\x00\x01video").decode("ascii")
+    assert f'src="data:video/mp4;base64,{encoded}"' in page_for(tmp_path, "t.mp4", bundle=True)
+
+
+def test_h264_solo_como_enlace_de_descarga(tmp_path):
+    for bundle in (False, True):
+        page = page_for(tmp_path, "t.h264", bundle=bundle)
+        assert "<video" not in page
+        assert "base64," not in page
+        assert '<a class="btn" href="t.h264" download="t.h264">' in page
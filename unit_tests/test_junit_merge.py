@@ -0,0 +1,74 @@
+"""Combinación de reportes JUnit con deduplicación por clave de Xray (utils/junit_merge.py)"""
+
+import xml.etree.ElementTree as ET
+
+from utils.junit_merge import merge_junit_reports
+
+
+def testcase(name, key=None, outcome=None, time=1.0):
+    properties = f'<properties><property name="test_key" value="{key}"/></properties>' if key else ""
+    body = f"<{outcome} message='x'/>" if outcome else ""
+    return f'<testcase classname="tests.login" name="{name}" time="{time}">{properties}{body}</testcase>'
+
+
+def write_report(path, timestamp, *cases):
+    path.write_text(f'<testsuites><testsuite name="login" timestamp="{timestamp}">{"".join(cases)}'
+                    f'</testsuite></testsuites>', encoding="utf-8")
+    return str(path)
+
+
+def merged_cases(output):
+    root = ET.parse(output).getroot()
+    return root, [(case.get("name"), case.find("failure") is not None) for case in root.iter("testcase")]
+
+
+def test_misma_clave_de_xray_queda_el_mas_reciente(tmp_path):
+    old = write_report(tmp_path / "a.xml", "2025-01-01T09:00:00",
+                       testcase("test_01", "APPTEST-1", "failure"), testcase("test_02", "APPTEST-2"))
+    new = write_report(tmp_path / "b.xml", "2025-01-01T10:00:00",
+                       testcase("test_01_rerun", "APPTEST-1"))
+    output = tmp_path / "merged.xml"
+
+    totals = merge_junit_reports([new, old], str(output))
+
+    root, cases = merged_cases(output)
+    assert sorted(cases) == [("test_01_rerun", False), ("test_02", False)]
+    assert totals["tests"] == 2 and totals["failures"] == 0
+    assert root.get("tests") == "2" and root.get("failures") == "0"
+
+
+def test_sin_clave_se_deduplica_por_clase_y_nombre(tmp_path):
+    first = write_report(tmp_path / "a.xml", "2025-01-01T09:00:00", testcase("test_x", outcome="failure"))
+    second = write_report(tmp_path / "b.xml", "2025-01-01T09:00:00", testcase("test_x"))
+    output = tmp_path / "merged.xml"
+
+    merge_junit_reports([first, second], str(output))
+
+    # Mismo timestamp: gana el último archivo de la lista
+    assert merged_cases(output)[1] == [("test_x", False)]
+
+
+def test_totales_de_cada_suite_se_recalculan(tmp_path):
+    report = write_report(tmp_path / "a.xml", "2025-01-01T09:00:00",
+                          testcase("test_01", "APPTEST-1", "failure", time=2.0),
+                          testcase("test_02", "APPTEST-2", "skipped", time=0.5),
+                          testcase("test_03", "APPTEST-3", "error", time=1.5))
+    output = tmp_path / "merged.xml"
+
+    totals = merge_junit_reports([report], str(output))
+
+    suite = ET.parse(output).getroot().find("testsuite")
+    assert (suite.get("tests"), suite.get("failures"), suite.get("skipped"), suite.get("errors")) == ("3", "1", "1", "1")
+    assert totals["time"] == 4.0
+
+
+def test_reporte_corrupto_no_rompe_el_merge(tmp_path):
+    good = write_report(tmp_path / "a.xml", "2025-01-01T09:00:00", testcase("test_01", "APPTEST-1"))
+    broken = tmp_path / "b.xml"
+    broken.write_text("<testsuites><testsuite", encoding="utf-8")
+    output = tmp_path / "merged.xml"
+
+    totals = merge_junit_reports([good, str(broken)], str(output))
+
+    assert totals["tests"] == 1
+    assert merged_cases(output)[1] == [("test_01", False)]
@@ -0,0 +1,191 @@
+"""Registro de localizadores (utils/locator_registry.py)"""
+
+import pytest
+
+from utils.fake_appium import FakeAppiumServer
+from utils.locator_engine import ACCESSIBILITY_ID, ANDROID_UIAUTOMATOR, XPATH, LocatorEngine
+from utils.locator_registry import LocatorRegistry, LocatorStats, candidate_key
+from utils.session_broker import _http_json
+
+LOCATORS = {
+    "Salir": [
+        (XPATH, "//*[contains(@text,'Salir')]"),
+        (ANDROID_UIAUTOMATOR, 'new UiSelector().text("Salir")'),
+        (ACCESSIBILITY_ID, "Salir"),
+    ],
+}
+
+
+class FakeDriver:
+    """Registra los comandos; ``visible`` son los (estrategia, valor) que existen en pantalla"""
+
+    def __init__(self, visible=()):
+        self.visible = set(visible)
+        self.commands = []
+
+    def implicitly_wait(self, seconds):
+        self.commands.append(("implicitly_wait", seconds))
+
+    def find_elements(self, strategy, value):
+        self.commands.append(("find_elements", strategy))
+        return [object()] if (strategy, value) in self.visible else []
+
+
+class W3CDriver:
+    """Driver mínimo contra el Appium falso; como en Selenium, todo pasa por execute()"""
+
+    ROUTES = {
+        "setTimeouts": ("POST", "timeouts"),
+        "findElements": ("POST", "elements"),
+        "getPageSource": ("GET", "source"),
+    }
+
+    def __init__(self, url):
+        value = _http_json("POST", f"{url}/session", {"capabilities": {"alwaysMatch": {}}})["value"]
+        self.session_url = f"{url}/session/{value['sessionId']}"
+
+    def execute(self, command, params=None):
+        method, path = self.ROUTES[command]
+        return _http_json(method, f"{self.session_url}/{path}", params if method == "POST" else None)
+
+    def implicitly_wait(self, seconds):
+        self.execute("setTimeouts", {"implicit": int(seconds * 1000)})
+
+    def find_elements(self, strategy, value):
+        return self.execute("findElements", {"using": strategy, "value": value})["value"]
+
+    @property
+    def page_source(self):
+        return self.execute("getPageSource")["value"]
+
+
+@pytest.fixture
+def appium():
+    server = FakeAppiumServer().start()
+    yield server
+    server.stop()
+
+
+def registry_for(driver, tmp_path, **kwargs):
+    stats = LocatorStats(str(tmp_path / "stats.json"))
+    return LocatorRegistry(driver, stats=stats, locators=LOCATORS, default_timeout=5.0, poll_interval=0.01, **kwargs)
+
+
+def implicit_waits(driver):
+    return [seconds for command, seconds in driver.commands if command == "implicitly_wait"]
+
+
+def test_implicit_wait_se_cambia_una_vez_por_busqueda(tmp_path):
+    driver = FakeDriver()
+    registry = registry_for(driver, tmp_path)
+
+    element = registry.find("Salir", timeout=0.1)
+
+    assert element is None
+    # Varias pasadas por los tres candidatos, pero solo un 0 al empezar y un restore al final
+    assert sum(1 for command, _ in driver.commands if command == "find_elements") > 3
+    assert implicit_waits(driver) == [0, 5.0]
+
+
+def test_implicit_wait_se_restaura_al_encontrar(tmp_path):
+    driver = FakeDriver(visible=[(ACCESSIBILITY_ID, "Salir")])
+    registry = registry_for(driver, tmp_path)
+
+    element, key = registry.find_with_strategy("Salir", timeout=1)
+
+    assert element is not None and key == candidate_key(ACCESSIBILITY_ID, "Salir")
+    assert implicit_waits(driver) == [0, 5.0]
+
+
+def test_implicit_wait_se_restaura_si_el_driver_falla(tmp_path):
+    driver = FakeDriver()
+
+    def broken(strategy, value):
+        raise RuntimeError("sesión perdida")
+
+    driver.find_elements = broken
+    registry = registry_for(driver, tmp_path)
+
+    with pytest.raises(RuntimeError):
+        registry.find("Salir", timeout=1)
+    assert implicit_waits(driver) == [0, 5.0]
+
+
+def test_orden_aprendido_primero_el_mas_rapido(tmp_path):
+    registry = registry_for(FakeDriver(), tmp_path)
+    registry.stats.record("Salir", candidate_key(ANDROID_UIAUTOMATOR, 'new UiSelector().text("Salir")'), True, 0.05)
+    registry.stats.record("Salir", candidate_key(ACCESSIBILITY_ID, "Salir"), True, 0.50)
+    registry.stats.record("Salir", candidate_key(XPATH, "//*[contains(@text,'Salir')]"), False, 1.0)
+
+    assert [strategy for strategy, _value in registry.ordered_candidates("Salir")] == \
+        [ANDROID_UIAUTOMATOR, ACCESSIBILITY_ID, XPATH]
+
+
+def test_sin_historial_las_estrategias_baratas_primero(tmp_path):
+    registry = registry_for(FakeDriver(), tmp_path)
+
+    assert [strategy for strategy, _value in registry.ordered_candidates("Salir")] == \
+        [ACCESSIBILITY_ID, ANDROID_UIAUTOMATOR, XPATH]
+
+
+def test_una_sola_estadistica_por_candidato_y_busqueda(tmp_path):
+    driver = FakeDriver(visible=[(ACCESSIBILITY_ID, "Salir")])
+    registry = registry_for(driver, tmp_path)
+    # El ganador aparece en la tercera pasada (la pantalla aún estaba cargando)
+    passes = []
+
+    def find_elements(strategy, value):
+        passes.append(strategy)
+        loaded = passes.count(ACCESSIBILITY_ID) >= 3
+        return [object()] if loaded and (strategy, value) in driver.visible else []
+
+    driver.find_elements = find_elements
+    registry.find("Salir", timeout=1)
+
+    stats = registry.stats
+    assert stats.get("Salir", candidate_key(ACCESSIBILITY_ID, "Salir"))["hits"] == 1
+    # Nada se probó antes que el ganador en la última pasada: ningún fallo
+    assert all(entry["misses"] == 0 for entry in stats.data["Salir"].values())
+
+
+def test_fallos_solo_de_los_probados_antes_del_ganador(tmp_path):
+    driver = FakeDriver(visible=[(XPATH, "//*[contains(@text,'Salir')]")])
+    registry = registry_for(driver, tmp_path)
+
+    registry.find("Salir", timeout=1)
+
+    entries = registry.stats.data["Salir"]
+    assert entries[candidate_key(ACCESSIBILITY_ID, "Salir")] == {"hits": 0, "misses": 1, "hit_seconds": 0.0}
+    assert entries[candidate_key(ANDROID_UIAUTOMATOR, 'new UiSelector().text("Salir")')]["misses"] == 1
+    assert entries[candidate_key(XPATH, "//*[contains(@text,'Salir')]")]["hits"] == 1
+
+
+def test_busqueda_sin_resultado_no_cuenta(tmp_path):
+    registry = registry_for(FakeDriver(), tmp_path)
+
+    assert registry.find("Salir", timeout=0) is None
+    assert registry.find("Salir", timeout=0.05) is None
+    assert registry.stats.data == {}
+
+
+def test_instantanea_vieja_no_restaura_el_implicit_wait(tmp_path, appium):
+    """El XPath está en la instantánea pero ya no en el dispositivo; el resto no existe"""
+    pytest.importorskip("lxml")
+    xpath = "//*[contains(@text,'Salir')]"
+    appium.state.page_source = '<hierarchy><node text="Salir"/></hierarchy>'
+    appium.state.present = set()
+    driver = W3CDriver(appium.url)
+    engine = LocatorEngine(driver, default_timeout=5.0)
+    registry = registry_for(driver, tmp_path, engine=engine)
+    # La instantánea primero: la estrategia más rápida según el historial
+    registry.stats.record("Salir", candidate_key(XPATH, xpath), True, 0.01)
+
+    assert registry.find("Salir", timeout=0.1) is None
+
+    timeouts = [payload["implicit"] for method, path, payload in appium.state.commands if path.endswith("/timeouts")]
+    finds = len(appium.state.empty_finds)
+    # Varias pasadas por el XPath resuelto y los dos candidatos del dispositivo...
+    assert finds >= 6
+    # ...todas con implicit wait 0, puesto y restaurado una sola vez
+    assert appium.state.empty_finds == [0.0] * finds
+    assert timeouts == [0, 5000]
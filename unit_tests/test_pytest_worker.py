@@ -0,0 +1,49 @@
+"""Worker persistente de pytest (utils/pytest_worker.py)"""
+
+import pytest
+
+from conftest import ROOT_DIR
+from utils.pytest_worker import PersistentWorker
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    monkeypatch.chdir(ROOT_DIR)  # El worker se lanza con python -m utils.pytest_worker
+    worker = PersistentWorker()
+    yield worker
+    worker.close()
+
+
+def module_args(path):
+    return [str(path), "-q", "-p", "no:cacheprovider", "--rootdir", str(path.parent)]
+
+
+def test_varios_modulos_en_el_mismo_proceso(worker, tmp_path):
+    pid_file = tmp_path / "pids.txt"
+    for name in ("test_uno.py", "test_dos.py"):
+        (tmp_path / name).write_text(
+            "import os\n"
+            "def test_pid():\n"
+            f"    open({str(pid_file)!r}, 'a').write(f'{{os.getpid()}}\\n')\n"
+        )
+
+    log_file = str(tmp_path / "worker.log")
+    assert worker.run(module_args(tmp_path / "test_uno.py"), log_file=log_file) == 0
+    assert worker.run(module_args(tmp_path / "test_dos.py"), log_file=log_file) == 0
+
+    pids = pid_file.read_text().split()
+    assert len(pids) == 2 and pids[0] == pids[1] == str(worker.process.pid)
+
+
+def test_codigo_de_salida_y_entorno_por_trabajo(worker, tmp_path):
+    test_file = tmp_path / "test_env.py"
+    test_file.write_text(
+        "import os\n"
+        "def test_modulo():\n"
+        "    assert os.environ['PYTEST_MODULE_NAME'] == 'login'\n"
+    )
+    log_file = str(tmp_path / "worker.log")
+
+    assert worker.run(module_args(test_file), env={"PYTEST_MODULE_NAME": "login"}, log_file=log_file) == 0
+    assert worker.run(module_args(test_file), env={"PYTEST_MODULE_NAME": "ventas"}, log_file=log_file) == 1
+    assert "AssertionError" in open(log_file, encoding="utf-8").read()
@@ -0,0 +1,83 @@
+"""Claves e índice de la caché de resultados (utils/result_cache.py)"""
+
+import os
+
+import pytest
+
+from utils.result_cache import ResultCache
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """Árbol mínimo con un APK, un módulo de tests y las fuentes compartidas"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "app.apk").write_bytes(b"apk-v1")
+    (tmp_path / "tests" / "login").mkdir(parents=True)
+    (tmp_path / "tests" / "login" / "test_login.py").write_text("def test_a(): pass\n")
+    (tmp_path / "conftest.py").write_text("# conftest\n")
+    (tmp_path / "pytest.ini").write_text("[pytest]\n")
+    (tmp_path / "utils").mkdir()
+    (tmp_path / "utils" / "waits.py").write_text("TIMEOUT = 10\n")
+    return tmp_path
+
+
+def key(module="tests/login", apk="app.apk", device="emulator-5554|15"):
+    # Caché nueva en cada llamada: el hash del APK se memoriza por instancia
+    return ResultCache(".cache").module_key(module, apk, device)
+
+
+def test_clave_estable_sin_cambios(project):
+    assert key() == key()
+
+
+@pytest.mark.parametrize("path, content", [
+    ("app.apk", b"apk-v2"),
+    ("tests/login/test_login.py", b"def test_a(): assert False\n"),
+    ("conftest.py", b"# conftest cambiado\n"),
+    ("pytest.ini", b"[pytest]\naddopts = -x\n"),
+    ("utils/waits.py", b"TIMEOUT = 20\n"),
+])
+def test_cambiar_una_fuente_invalida_la_clave(project, path, content):
+    before = key()
+    (project / path).write_bytes(content)
+    assert key() != before
+
+
+def test_archivo_nuevo_en_el_modulo_invalida_la_clave(project):
+    before = key()
+    (project / "tests" / "login" / "test_logout.py").write_text("def test_b(): pass\n")
+    assert key() != before
+
+
+def test_otro_dispositivo_tiene_otra_clave(project):
+    assert key(device="emulator-5554|15") != key(device="emulator-5556|14")
+
+
+def test_otro_modulo_no_afecta_la_clave(project):
+    before = key()
+    (project / "tests" / "ventas").mkdir()
+    (project / "tests" / "ventas" / "test_ventas.py").write_text("def test_c(): pass\n")
+    assert key() == before
+
+
+def test_store_y_lookup_persisten_en_el_indice(project):
+    report = project / "result_login.xml"
+    report.write_text("<testsuites/>")
+    cache = ResultCache(".cache")
+    cache.store("abc", "login", str(report))
+
+    entry = ResultCache(".cache").lookup("abc")
+
+    assert entry["module"] == "login"
+    assert open(entry["xml"]).read() == "<testsuites/>"
+    assert ResultCache(".cache").lookup("otra") is None
+
+
+def test_lookup_ignora_entradas_sin_xml(project):
+    report = project / "result_login.xml"
+    report.write_text("<testsuites/>")
+    cache = ResultCache(".cache")
+    cache.store("abc", "login", str(report))
+    os.remove(cache.index["abc"]["xml"])
+
+    assert ResultCache(".cache").lookup("abc") is None
@@ -0,0 +1,64 @@
+"""Reparto de módulos entre dispositivos (test_runner.py --devices/--workers)"""
+
+import threading
+import time
+
+import pytest
+
+import test_runner
+
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # El runner crea sus directorios en el directorio actual
+    monkeypatch.setenv("APPIUM_SERVER", "http://127.0.0.1:4723")
+    return test_runner.TestRunner()
+
+
+def test_pool_desde_especificaciones(runner):
+    pool = runner.build_device_pool("emulator-5554, emulator-5556@http://10.0.0.2:4723")
+
+    assert pool == [
+        {"device_name": "emulator-5554", "appium_server": "http://127.0.0.1:4723",
+         "system_port": str(test_runner.BASE_SYSTEM_PORT)},
+        {"device_name": "emulator-5556", "appium_server": "http://10.0.0.2:4723",
+         "system_port": str(test_runner.BASE_SYSTEM_PORT + 1)},
+    ]
+
+
+def test_workers_limita_el_pool(runner):
+    assert len(runner.build_device_pool("a,b,c", workers=2)) == 2
+
+
+def test_pool_desde_adb_devices(runner, monkeypatch):
+    monkeypatch.setattr(runner, "discover_devices", lambda: ["emulator-5554", "emulator-5556"])
+    assert [d["device_name"] for d in runner.build_device_pool()] == ["emulator-5554", "emulator-5556"]
+
+
+def test_cada_dispositivo_ejecuta_un_modulo_a_la_vez(runner, monkeypatch):
+    busy = set()
+    lock = threading.Lock()
+    overlaps = []
+
+    def fake_run_job(module_path, module_name, verbose, capture, device=None):
+        with lock:
+            if device["device_name"] in busy:
+                overlaps.append(device["device_name"])
+            busy.add(device["device_name"])
+        time.sleep(0.05)
+        with lock:
+            busy.discard(device["device_name"])
+        return {"module": module_name, "device": device["device_name"], "returncode": 0}
+
+    monkeypatch.setattr(runner, "_run_job", fake_run_job)
+    devices = runner.build_device_pool("emulator-5554,emulator-5556")
+    jobs = [(f"tests/m{i}", f"m{i}") for i in range(6)]
+
+    start = time.monotonic()
+    results = runner._run_modules_parallel(jobs, devices, verbose=False)
+
+    assert [r["module"] for r in results] == [name for _path, name in jobs]
+    assert {r["device"] for r in results} == {"emulator-5554", "emulator-5556"}
+    assert overlaps == []
+    # 6 módulos de 0.05 s en 2 dispositivos: ~0.15 s, no 0.3 s en serie
+    assert time.monotonic() - start < 0.28
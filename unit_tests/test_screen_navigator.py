@@ -0,0 +1,74 @@
+"""Máquina de estados de pantallas (utils/screen_navigator.py)"""
+
+import pytest
+
+from utils.screen_navigator import SCREENS, TRANSITIONS, NavigationError, ScreenNavigator, shortest_path
+
+MENU_BUTTON = SCREENS["inicio"][0]
+
+
+class FakeApp:
+    """App falsa: una pantalla actual, sus anclas visibles y el botón atrás del grafo"""
+
+    def __init__(self, screen):
+        self.screen = screen
+
+    def visible_anchors(self):
+        anchors = set(SCREENS.get(self.screen, []))
+        if self.screen in ("productos", "pdc", "menu"):
+            anchors.add(MENU_BUTTON)  # El botón de menú sigue en pantalla tras salir de inicio
+        return anchors
+
+    # Driver
+    def back(self):
+        self.screen = next(t[1] for t in TRANSITIONS if t[0] == self.screen and t[2] == "back")
+
+    # Motor de localización
+    def invalidate(self):
+        pass
+
+    def first_present(self, xpaths):
+        return next((x for x in xpaths if x in self.visible_anchors()), None)
+
+
+class FakeWaits:
+    def until_screen(self, markers, screen=None):
+        pass
+
+    def until_stable(self, **kwargs):
+        pass
+
+
+def navigator_for(app):
+    return ScreenNavigator(app, app, registry=None, waits=FakeWaits())
+
+
+def test_camino_mas_corto():
+    path = shortest_path("pdc", "menu")
+    assert [(t[0], t[1]) for t in path] == [("pdc", "productos"), ("productos", "inicio"), ("inicio", "menu")]
+    assert shortest_path("inicio", "inicio") == []
+
+
+def test_pantalla_mas_profunda_gana_en_la_deteccion():
+    assert navigator_for(FakeApp("productos")).current_screen() == "productos"
+
+
+def test_anclas_compartidas_no_cuentan_como_llegada():
+    app = FakeApp("pdc")
+    navigator = navigator_for(app)
+    assert not navigator.is_on("inicio")
+
+    visited = navigator.navigate_to("inicio")
+
+    assert visited == ["pdc", "productos", "inicio"]
+    assert app.screen == "inicio"
+
+
+def test_ya_en_la_pantalla_no_navega():
+    app = FakeApp("inicio")
+    assert navigator_for(app).navigate_to("inicio") == ["inicio"]
+
+
+def test_pantalla_desconocida():
+    with pytest.raises(NavigationError, match="desconocida"):
+        navigator_for(FakeApp("inicio")).navigate_to("ajustes")
@@ -0,0 +1,112 @@
+"""Broker de sesiones contra el Appium falso (utils/session_broker.py, utils/fake_appium.py)"""
+
+import time
+
+import pytest
+
+from utils.fake_appium import FakeAppiumServer
+from utils.session_broker import BrokerClient, BrokerError, SessionBrokerServer, _http_json
+
+DEVICE = "emulator-5554"
+CAPABILITIES = {"platformName": "Android", "appium:deviceName": DEVICE}
+
+
+@pytest.fixture
+def appium():
+    server = FakeAppiumServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def broker():
+    server = SessionBrokerServer().start()
+    yield server
+    server.stop()
+
+
+def lease(broker, appium, **kwargs):
+    return broker.broker.lease(DEVICE, appium.url, CAPABILITIES, **kwargs)
+
+
+def test_appium_falso_crea_y_borra_sesiones(appium):
+    assert _http_json("GET", f"{appium.url}/status")["value"]["ready"] is True
+    session_id = _http_json("POST", f"{appium.url}/session",
+                            {"capabilities": {"alwaysMatch": CAPABILITIES}})["value"]["sessionId"]
+    assert appium.state.sessions[session_id] == CAPABILITIES
+
+    _http_json("DELETE", f"{appium.url}/session/{session_id}")
+    with pytest.raises(BrokerError, match="404"):
+        _http_json("GET", f"{appium.url}/session/{session_id}")
+
+
+def test_sesion_caliente_se_reutiliza_entre_leases(broker, appium):
+    first = lease(broker, appium)
+    broker.broker.release(first["lease_id"])
+    second = lease(broker, appium)
+
+    assert second["session_id"] == first["session_id"]
+    assert second["lease_id"] != first["lease_id"]
+    assert len(appium.state.sessions) == 1
+
+
+def test_sesion_muerta_en_appium_se_recrea(broker, appium):
+    first = lease(broker, appium)
+    broker.broker.release(first["lease_id"])
+    appium.state.sessions.clear()
+
+    second = lease(broker, appium)
+
+    assert second["session_id"] != first["session_id"]
+    assert second["session_id"] in appium.state.sessions
+
+
+def test_dispositivo_prestado_no_se_presta_dos_veces(broker, appium):
+    lease(broker, appium)
+    with pytest.raises(BrokerError, match="sigue prestado"):
+        lease(broker, appium, wait=0.2)
+
+
+def test_lease_expirado_libera_el_dispositivo(broker, appium):
+    first = lease(broker, appium, ttl=0.2)
+
+    start = time.monotonic()
+    second = lease(broker, appium, wait=5)
+
+    assert time.monotonic() - start < 2
+    assert second["session_id"] == first["session_id"]
+    with pytest.raises(BrokerError, match="desconocido o expirado"):
+        broker.broker.renew(first["lease_id"])
+
+
+def test_heartbeat_del_cliente_mantiene_el_lease(broker, appium):
+    client = BrokerClient(broker.url)
+    held = client.lease(DEVICE, appium.url, CAPABILITIES, ttl=0.3)
+    try:
+        time.sleep(1.0)  # Más de tres TTL: sin renovación el lease habría expirado
+        assert broker.broker.status()[DEVICE]["leased"] is True
+        with pytest.raises(BrokerError, match="sigue prestado"):
+            BrokerClient(broker.url).lease(DEVICE, appium.url, CAPABILITIES, wait=0.2)
+    finally:
+        client.release(held["lease_id"])
+
+    assert broker.broker.status()[DEVICE]["leased"] is False
+    other = BrokerClient(broker.url)
+    again = other.lease(DEVICE, appium.url, CAPABILITIES, wait=1)
+    other.release(again["lease_id"])
+    assert again["session_id"] == held["session_id"]
+
+
+def test_release_de_un_lease_desconocido(broker):
+    with pytest.raises(BrokerError, match="409"):
+        BrokerClient(broker.url).release("no-existe")
+
+
+def test_stop_cierra_las_sesiones_en_appium(appium):
+    server = SessionBrokerServer().start()
+    server.broker.lease(DEVICE, appium.url, CAPABILITIES)
+    assert len(appium.state.sessions) == 1
+
+    server.stop()
+
+    assert appium.state.sessions == {}
@@ -0,0 +1,116 @@
+"""Plugin de dependencias entre tests (utils/test_dependencies.py)"""
+
+import os
+import subprocess
+import sys
+import xml.etree.ElementTree as ET
+
+from conftest import ROOT_DIR
+
+TESTS = '''
+import pytest
+
+def test_01_abrir():
+    pass
+
+@pytest.mark.depends_on("test_01_abrir")
+def test_02_login():
+    assert {login_ok}
+
+@pytest.mark.depends_on("test_02_login")
+def test_03_menu():
+    pass
+
+@pytest.mark.depends_on("test_03_menu")
+def test_04_productos():
+    pass
+
+@pytest.mark.depends_on("test_01_abrir")
+def test_05_rama_independiente():
+    pass
+'''
+
+
+def run_pytest(tmp_path, source, *args):
+    """Ejecuta pytest en un proyecto temporal con el plugin; devuelve (proceso, testcases del JUnit)"""
+    (tmp_path / "conftest.py").write_text('pytest_plugins = ["utils.test_dependencies"]\n')
+    (tmp_path / "pytest.ini").write_text("[pytest]\nmarkers =\n    depends_on(*tests): dependencias\n")
+    (tmp_path / "test_flujo.py").write_text(source)
+    junit = tmp_path / "junit.xml"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT_DIR, os.getenv("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-m", "pytest", "-p", "no:cacheprovider", f"--junitxml={junit}",
+                             "-o", "junit_family=xunit2", *args],
+                            cwd=tmp_path, env=env, capture_output=True, text=True)
+    cases = {}
+    if junit.exists():
+        for case in ET.parse(junit).getroot().iter("testcase"):
+            properties = {p.get("name"): p.get("value") for p in case.iter("property")}
+            skipped = case.find("skipped")
+            outcome = "failed" if case.find("failure") is not None else "skipped" if skipped is not None else "passed"
+            cases[case.get("name")] = (outcome, properties, skipped.get("message") if skipped is not None else None)
+    return result, cases
+
+
+def test_dependientes_de_un_fallo_se_saltan_con_la_propiedad(tmp_path):
+    result, cases = run_pytest(tmp_path, TESTS.format(login_ok=False))
+
+    assert cases["test_02_login"][0] == "failed"
+    outcome, properties, message = cases["test_03_menu"]
+    assert outcome == "skipped"
+    assert properties["skipped_by_dependency"] == "test_flujo.py::test_02_login"
+    assert message.startswith("Dependencia fallida: test_02_login falló")
+    # El salto se propaga a los dependientes del test saltado
+    assert cases["test_04_productos"][0] == "skipped"
+    assert cases["test_04_productos"][1]["skipped_by_dependency"] == "test_flujo.py::test_03_menu"
+    # Las ramas independientes siguen corriendo
+    assert cases["test_05_rama_independiente"] == ("passed", {}, None)
+    assert "Saltados por dependencia" in result.stdout
+
+
+def test_sin_fallos_no_hay_saltos(tmp_path):
+    result, cases = run_pytest(tmp_path, TESTS.format(login_ok=True))
+
+    assert result.returncode == 0
+    assert all(outcome == "passed" and "skipped_by_dependency" not in properties
+               for outcome, properties, _message in cases.values())
+
+
+def test_dependencia_colectada_despues_se_ejecuta_antes(tmp_path):
+    source = '''
+import pytest
+
+@pytest.mark.depends_on("test_b")
+def test_a():
+    pass
+
+def test_b():
+    pass
+'''
+    result, _cases = run_pytest(tmp_path, source, "-v")
+
+    assert result.stdout.index("test_b PASSED") < result.stdout.index("test_a PASSED")
+
+
+def test_dependencia_no_colectada_se_ignora(tmp_path):
+    result, cases = run_pytest(tmp_path, TESTS.format(login_ok=False), "-k", "test_03_menu")
+
+    assert result.returncode == 0
+    assert cases == {"test_03_menu": ("passed", {}, None)}
+
+
+def test_ciclo_es_error_de_uso(tmp_path):
+    source = '''
+import pytest
+
+@pytest.mark.depends_on("test_b")
+def test_a():
+    pass
+
+@pytest.mark.depends_on("test_a")
+def test_b():
+    pass
+'''
+    result, _cases = run_pytest(tmp_path, source)
+
+    assert result.returncode == 4
+    assert "Ciclo en depends_on" in result.stderr
@@ -0,0 +1,142 @@
+"""Escritura de texto con alternativas contra el Appium falso (utils/text_input.py)"""
+
+import pytest
+
+from utils.fake_appium import FakeAppiumServer
+from utils.session_broker import _http_json
+from utils.text_input import ADB_INPUT, IME, SET_VALUE, TextInput, TextInputError, escape_input_text
+
+
+class W3CElement:
+    """Lo mínimo de un WebElement de Appium sobre el protocolo W3C"""
+
+    def __init__(self, session_url, element_id):
+        self.session_url = session_url
+        self.id = element_id
+
+    def _call(self, method, command, payload=None):
+        return _http_json(method, f"{self.session_url}/element/{self.id}/{command}", payload)["value"]
+
+    def click(self):
+        self._call("POST", "click", {})
+
+    def clear(self):
+        self._call("POST", "clear", {})
+
+    def get_attribute(self, name):
+        return self._call("GET", f"attribute/{name}")
+
+
+class W3CDriver:
+    """Driver mínimo (execute_script y find_element) contra el Appium falso"""
+
+    def __init__(self, url, rejected_scripts=()):
+        value = _http_json("POST", f"{url}/session", {"capabilities": {"alwaysMatch": {}}})["value"]
+        self.session_url = f"{url}/session/{value['sessionId']}"
+        # Scripts que el campo ignora (p. ej. campos que filtran setText)
+        self.rejected_scripts = rejected_scripts
+
+    def execute_script(self, script, args):
+        if script in self.rejected_scripts:
+            return None
+        return _http_json("POST", f"{self.session_url}/execute/sync", {"script": script, "args": [args]})["value"]
+
+    def find_element(self):
+        value = _http_json("POST", f"{self.session_url}/element", {"using": "class name", "value": "EditText"})
+        return W3CElement(self.session_url, next(iter(value["value"].values())))
+
+
+@pytest.fixture
+def appium():
+    server = FakeAppiumServer().start()
+    yield server
+    server.stop()
+
+
+def fake_shell(server, calls):
+    """``adb shell input text`` simulado: escribe en el campo enfocado del servidor falso"""
+    def shell(args):
+        calls.append(args)
+        server.state.type_into_focused(args[-1].replace("%s", " ").replace("\\", ""))
+    return shell
+
+
+def test_escape_input_text():
+    assert escape_input_text("Hola Mundo") == "Hola%sMundo"
+    assert escape_input_text("a&b$(c)") == "a\\&b\\$\\(c\\)"
+
+
+def test_set_value_escribe_en_un_solo_comando(appium):
+    driver = W3CDriver(appium.url)
+    element = driver.find_element()
+    before = len(appium.state.commands)
+
+    assert TextInput(driver).set_text(element, "Alejandro.Morales") == SET_VALUE
+
+    # replaceElementValue + una lectura de verificación
+    assert len(appium.state.commands) - before == 2
+    assert appium.state.element_text[element.id] == "Alejandro.Morales"
+
+
+def test_reemplaza_el_texto_anterior(appium):
+    driver = W3CDriver(appium.url)
+    element = driver.find_element()
+    appium.state.element_text[element.id] = "viejo"
+
+    TextInput(driver).set_text(element, "nuevo")
+
+    assert appium.state.element_text[element.id] == "nuevo"
+
+
+def test_campo_que_filtra_set_text_usa_adb_por_lotes(appium):
+    driver = W3CDriver(appium.url, rejected_scripts=("mobile: replaceElementValue",))
+    element = driver.find_element()
+    calls = []
+    text = "x" * 100 + " fin"
+
+    strategy = TextInput(driver, shell=fake_shell(appium, calls)).set_text(element, text)
+
+    assert strategy == ADB_INPUT
+    assert appium.state.element_text[element.id] == text
+    assert len(calls) == 2  # Lotes de ADB_BATCH_SIZE caracteres
+
+
+def test_sin_adb_o_texto_no_ascii_usa_el_ime(appium):
+    driver = W3CDriver(appium.url, rejected_scripts=("mobile: replaceElementValue",))
+    element = driver.find_element()
+
+    assert TextInput(driver).set_text(element, "contraseña") == IME
+    assert appium.state.element_text[element.id] == "contraseña"
+
+
+def test_campo_secreto_compara_solo_la_longitud(appium):
+    driver = W3CDriver(appium.url)
+    element = driver.find_element()
+    text_input = TextInput(driver, strategies=(SET_VALUE,))
+    # Android enmascara los campos de contraseña al leer el atributo text
+    element.get_attribute = lambda name: "•" * 8
+
+    assert text_input.set_text(element, "Admin123", secret=True) == SET_VALUE
+    with pytest.raises(TextInputError):
+        text_input.set_text(element, "Admin123")
+
+
+def test_error_si_ninguna_estrategia_funciona(appium):
+    driver = W3CDriver(appium.url, rejected_scripts=("mobile: replaceElementValue", "mobile: type"))
+    element = driver.find_element()
+
+    with pytest.raises(TextInputError, match=r"\*\*\*\*"):
+        TextInput(driver).set_text(element, "1234", secret=True)
+
+
+def test_texto_con_porcentaje_no_pasa_por_adb(appium):
+    # input text convierte "%s" en espacio y no tiene forma de escaparlo
+    driver = W3CDriver(appium.url, rejected_scripts=("mobile: replaceElementValue",))
+    element = driver.find_element()
+    calls = []
+
+    strategy = TextInput(driver, shell=fake_shell(appium, calls)).set_text(element, "Promo%s50%")
+
+    assert strategy == IME
+    assert calls == []
+    assert appium.state.element_text[element.id] == "Promo%s50%"
@@ -0,0 +1,76 @@
+"""Presupuestos de timeout aprendidos (utils/timeout_budgets.py)"""
+
+from utils.timeout_budgets import LOCATOR, SCREEN, TimeoutBudgets
+
+
+def budgets_at(tmp_path, **kwargs):
+    return TimeoutBudgets(str(tmp_path / "budgets.json"), factor=2.0, floor=1.0, ceiling=30.0, **kwargs)
+
+
+def samples(tmp_path, kind, key):
+    return budgets_at(tmp_path).entry(kind, key)["samples"]
+
+
+def test_sin_historial_suficiente_usa_el_por_defecto(tmp_path):
+    budgets = budgets_at(tmp_path)
+    for _ in range(4):
+        budgets.record(SCREEN, "inicio", 1.0)
+    budgets.save()
+
+    assert budgets_at(tmp_path).budget(SCREEN, "inicio", 10.0) == 10.0
+
+
+def test_budget_es_p99_por_factor_acotado(tmp_path):
+    budgets = budgets_at(tmp_path)
+    for seconds in (0.1, 0.2, 0.3, 0.4, 0.5, 2.0):
+        budgets.record(LOCATOR, "Continuar", seconds)
+    budgets.save()
+
+    assert budgets_at(tmp_path).budget(LOCATOR, "Continuar", 10.0) == 4.0
+    budgets.record(LOCATOR, "Continuar", 60.0)
+    budgets.save()
+    assert budgets_at(tmp_path).budget(LOCATOR, "Continuar", 10.0) == 30.0
+
+
+def test_calibrar_sustituye_las_muestras_anteriores(tmp_path):
+    old = budgets_at(tmp_path)
+    old.record(SCREEN, "inicio", 9.0)
+    old.save()
+
+    calibration = budgets_at(tmp_path, calibrate=True, run_id="20250101_100000")
+    calibration.record(SCREEN, "inicio", 1.5)
+    calibration.save()
+
+    assert samples(tmp_path, SCREEN, "inicio") == [1.5]
+    # Calibrada: basta una muestra para tener presupuesto propio
+    assert budgets_at(tmp_path).budget(SCREEN, "inicio", 10.0) == 3.0
+
+
+def test_procesos_de_la_misma_calibracion_suman_sus_muestras(tmp_path):
+    old = budgets_at(tmp_path)
+    old.record(SCREEN, "inicio", 9.0)
+    old.save()
+
+    # Un pytest por módulo, todos de la misma ejecución; cada uno guarda al terminar
+    login = budgets_at(tmp_path, calibrate=True, run_id="20250101_100000")
+    productos = budgets_at(tmp_path, calibrate=True, run_id="20250101_100000")
+    login.record(SCREEN, "inicio", 1.0)
+    productos.record(SCREEN, "inicio", 2.0)
+    productos.record(SCREEN, "productos", 0.5)
+    login.save()
+    productos.save()
+
+    assert samples(tmp_path, SCREEN, "inicio") == [1.0, 2.0]
+    assert samples(tmp_path, SCREEN, "productos") == [0.5]
+
+
+def test_una_calibracion_nueva_vuelve_a_empezar(tmp_path):
+    first = budgets_at(tmp_path, calibrate=True, run_id="20250101_100000")
+    first.record(SCREEN, "inicio", 1.0)
+    first.save()
+
+    second = budgets_at(tmp_path, calibrate=True, run_id="20250102_100000")
+    second.record(SCREEN, "inicio", 2.0)
+    second.save()
+
+    assert samples(tmp_path, SCREEN, "inicio") == [2.0]
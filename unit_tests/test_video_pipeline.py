@@ -0,0 +1,35 @@
+"""Cola de descargas de video en segundo plano (utils/video_pipeline.py)"""
+
+import time
+
+from utils.video_pipeline import VideoPullQueue
+
+
+def test_drain_timeout_es_para_toda_la_barrera():
+    queue = VideoPullQueue("adb", "emulator-5554", workers=1, max_pending=4)
+    for index in range(3):
+        queue.submit_task(f"video_{index}.mp4", time.sleep, 0.4)
+
+    start = time.monotonic()
+    failures = queue.drain(timeout=0.2)
+    elapsed = time.monotonic() - start
+    queue.shutdown()
+
+    # Antes cada Future esperaba su propio timeout: 3 × 0.2 s como mínimo
+    assert elapsed < 0.4
+    assert [path for path, _error in failures] == ["video_0.mp4", "video_1.mp4", "video_2.mp4"]
+
+
+def test_drain_devuelve_solo_las_fallidas():
+    queue = VideoPullQueue("adb", "emulator-5554", workers=2)
+
+    def broken():
+        raise OSError("adb desconectado")
+
+    queue.submit_task("ok.mp4", lambda: "ok.mp4")
+    queue.submit_task("roto.mp4", broken)
+
+    failures = queue.drain(timeout=5)
+    queue.shutdown()
+
+    assert [(path, str(error)) for path, error in failures] == [("roto.mp4", "adb desconectado")]
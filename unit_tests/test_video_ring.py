@@ -0,0 +1,64 @@
+"""Buffer circular de video para tests fallidos (utils/video_ring.py) contra el adb falso"""
+
+import os
+
+import pytest
+
+from utils.fake_adb import SERIAL
+from utils.video_pipeline import VideoPullError, VideoPullQueue
+from utils.video_ring import RingBufferVideoRecorder
+
+PREFIX = "/sdcard/.ring_login_test_01_20250101_100000"
+
+
+@pytest.fixture
+def adb_path(tmp_path, fake_adb):
+    """VideoPullQueue recibe un ejecutable: un script que lanza el adb falso"""
+    script = tmp_path / "adb"
+    script.write_text("#!/bin/sh\nexec " + " ".join(f'"{part}"' for part in fake_adb) + ' "$@"\n')
+    script.chmod(0o755)
+    return str(script)
+
+
+@pytest.fixture
+def recorder(tmp_path, adb_path):
+    queue = VideoPullQueue(adb_path, SERIAL, workers=1, poll_interval=0.01, stable_polls=1, finalize_timeout=2)
+    recorder = RingBufferVideoRecorder(adb_path, SERIAL, "login", str(tmp_path / "videos"), queue,
+                                       ffmpeg="no-existe-ffmpeg")
+    yield recorder
+    queue.shutdown()
+
+
+def put_on_device(tmp_path, slots):
+    for slot in slots:
+        path = tmp_path / "device" / f"{PREFIX.lstrip('/')}_{slot}.mp4"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"segmento %d" % slot)
+
+
+def ring_files(tmp_path):
+    return sorted(os.listdir(tmp_path / "device" / "sdcard"))
+
+
+def test_fallo_de_descarga_borra_el_resto_del_buffer(tmp_path, recorder):
+    # La ranura 1 desapareció del dispositivo: su pull falla a mitad del buffer
+    put_on_device(tmp_path, [0, 2, 3])
+    output = str(tmp_path / "videos" / "test_01_20250101_100000.mp4")
+
+    with pytest.raises(VideoPullError):
+        recorder._pull_and_join([f"{PREFIX}_{slot}.mp4" for slot in (0, 1, 2, 3)], output, f"{PREFIX}_*.mp4")
+
+    assert ring_files(tmp_path) == []
+    assert os.listdir(tmp_path / "videos") == []
+
+
+def test_descarga_completa_no_deja_segmentos(tmp_path, recorder):
+    put_on_device(tmp_path, [0, 1])
+    output = str(tmp_path / "videos" / "test_01_20250101_100000.mp4")
+
+    # Sin ffmpeg queda la última parte (la del fallo)
+    result = recorder._pull_and_join([f"{PREFIX}_{slot}.mp4" for slot in (0, 1)], output, f"{PREFIX}_*.mp4")
+
+    assert result.endswith("_part01.mp4")
+    assert open(result, "rb").read() == b"segmento 1"
+    assert ring_files(tmp_path) == []
@@ -0,0 +1,96 @@
+"""Ensamblado del video por streaming (utils/video_stream.py)"""
+
+import os
+import stat
+import sys
+
+import pytest
+
+from utils.video_stream import VideoStreamError, assemble_segments, count_frames, segment_frame_rate
+
+SPS = b"\x00\x00\x00\x01\x67\x42\x00\x1f"
+PPS = b"\x00\x00\x00\x01\x68\xce\x3c\x80"
+IDR = b"\x00\x00\x00\x01\x65\x88" + b"\x11" * 40
+# Un fotograma partido en dos slices: la segunda no empieza en el macrobloque 0
+SLICE_FIRST = b"\x00\x00\x01\x41\x9a" + b"\x22" * 40
+SLICE_REST = b"\x00\x00\x01\x41\x4e" + b"\x22" * 40
+
+# ffmpeg falso: apunta la frecuencia de cada remux y copia la entrada (o las de la lista concat)
+FAKE_FFMPEG = """#!{python}
+import sys
+args = sys.argv[1:]
+with open({log!r}, "a") as log:
+    log.write(" ".join(args) + "\\n")
+source = args[args.index("-i") + 1]
+paths = [line.split("'")[1] for line in open(source)] if "concat" in args else [source]
+with open(args[-1], "wb") as output:
+    for path in paths:
+        output.write(open(path, "rb").read())
+"""
+
+
+def write_segment(path, frames):
+    with open(path, "wb") as f:
+        f.write(SPS + PPS + IDR)
+        for _ in range(frames - 1):
+            f.write(SLICE_FIRST + SLICE_REST)
+    return str(path)
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path):
+    log = tmp_path / "ffmpeg.log"
+    script = tmp_path / "ffmpeg"
+    script.write_text(FAKE_FFMPEG.format(python=sys.executable, log=str(log)))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return str(script), log
+
+
+def test_cuenta_fotogramas_no_slices(tmp_path):
+    assert count_frames(write_segment(tmp_path / "a.h264", 12)) == 12
+
+
+def test_cuenta_fotogramas_entre_bloques(tmp_path):
+    path = write_segment(tmp_path / "a.h264", 12)
+    # Bloques pequeños para que los start codes caigan en la frontera
+    assert all(count_frames(path, chunk_size=size) == 12 for size in (3, 5, 7, 64))
+
+
+def test_frecuencia_real_del_segmento(tmp_path):
+    path = write_segment(tmp_path / "a.h264", 30)
+    assert segment_frame_rate(path, 2.0) == 15
+    assert segment_frame_rate(path, None, default=30) == 30
+
+
+def test_remux_con_la_frecuencia_de_cada_segmento(tmp_path, fake_ffmpeg):
+    ffmpeg, log = fake_ffmpeg
+    slow = write_segment(tmp_path / ".t.part00.h264", 20)
+    fast = write_segment(tmp_path / ".t.part01.h264", 60)
+    output = str(tmp_path / "t.mp4")
+
+    assert assemble_segments([slow, fast], output, durations=[4.0, 2.0], ffmpeg=ffmpeg) == output
+
+    calls = log.read_text().splitlines()
+    rates = [call.split("-framerate ")[1].split()[0] for call in calls if "-framerate" in call]
+    assert rates == ["5.000", "30.000"]
+    assert os.path.exists(output)
+    assert sorted(os.listdir(tmp_path)) == ["ffmpeg", "ffmpeg.log", "t.mp4"]
+
+
+def test_sin_ffmpeg_queda_el_h264_concatenado(tmp_path):
+    first = write_segment(tmp_path / ".t.part00.h264", 3)
+    second = write_segment(tmp_path / ".t.part01.h264", 2)
+    expected = open(first, "rb").read() + open(second, "rb").read()
+
+    result = assemble_segments([first, second], str(tmp_path / "t.mp4"), ffmpeg="no-existe-ffmpeg")
+
+    assert result == str(tmp_path / "t.h264")
+    assert open(result, "rb").read() == expected
+    assert not os.path.exists(first) and not os.path.exists(second)
+
+
+def test_sin_video(tmp_path):
+    empty = tmp_path / ".t.part00.h264"
+    empty.write_bytes(b"")
+    with pytest.raises(VideoStreamError):
+        assemble_segments([str(empty)], str(tmp_path / "t.mp4"))
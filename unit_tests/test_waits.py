@@ -0,0 +1,86 @@
+"""Esperas por condición (utils/waits.py)"""
+
+import time
+
+import pytest
+
+from utils.waits import Waiter, WaitTimeout
+
+
+class Element:
+    def __init__(self, displayed=True):
+        self.displayed = displayed
+
+    def is_displayed(self):
+        return self.displayed
+
+
+class ServerWaitDriver:
+    """Simula el implicit wait de UiAutomator2: find_elements espera en el servidor"""
+
+    def __init__(self, appears_after=None, displayed=True):
+        self.created = time.monotonic()
+        self.appears_after = appears_after
+        self.displayed = displayed
+        self.implicit_wait = 0
+
+    def implicitly_wait(self, seconds):
+        self.implicit_wait = seconds
+
+    def _present(self):
+        return self.appears_after is not None and time.monotonic() - self.created >= self.appears_after
+
+    def find_elements(self, strategy, value):
+        deadline = time.monotonic() + self.implicit_wait
+        while not self._present() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return [Element(self.displayed)] if self._present() else []
+
+
+def waiter_for(driver):
+    return Waiter(driver, initial_poll=0.01, max_poll=0.05, implicit_wait=5.0)
+
+
+def test_tupla_no_visible_respeta_el_timeout():
+    driver = ServerWaitDriver()
+    waiter = waiter_for(driver)
+
+    start = time.monotonic()
+    with pytest.raises(WaitTimeout):
+        waiter.until_visible(("id", "boton"), timeout=0.3)
+    elapsed = time.monotonic() - start
+
+    # Antes: 0.3 s en el servidor + otros 0.3 s de sondeo
+    assert elapsed < 0.45
+    assert waiter.records[-1]["actual"] < 0.45
+    assert driver.implicit_wait == 5.0
+
+
+def test_tupla_presente_pero_oculta_sondea_solo_lo_que_queda():
+    driver = ServerWaitDriver(appears_after=0.0, displayed=False)
+    waiter = waiter_for(driver)
+
+    start = time.monotonic()
+    with pytest.raises(WaitTimeout):
+        waiter.until_visible(("id", "boton"), timeout=0.3)
+
+    assert time.monotonic() - start < 0.45
+
+
+def test_tupla_que_aparece_se_devuelve():
+    driver = ServerWaitDriver(appears_after=0.1)
+    waiter = waiter_for(driver)
+
+    element = waiter.until_visible(("id", "boton"), timeout=2)
+
+    assert element.is_displayed()
+    assert waiter.records[-1]["ok"] is True
+
+
+def test_totales_de_sleep_fijo_frente_a_espera_real():
+    waiter = waiter_for(ServerWaitDriver(appears_after=0.0))
+
+    waiter.until_visible(("id", "boton"), timeout=1, legacy_sleep=3.0)
+
+    legacy, actual = waiter.totals()
+    assert legacy == 3.0 and actual < 1.0
@@ -4,6 +4,8 @@ import base64
 import requests
 from dotenv import load_dotenv
 
+from utils.evidence_index import DEFAULT_STORE_DIR, SCREENSHOT, EvidenceIndex, screenshots_by_test
+
 # Cargar variables del archivo .env
 load_dotenv()
 
@@ -13,12 +15,22 @@ CLIENT_SECRET = os.getenv("CLIENT_SECRET")
 if not CLIENT_ID or not CLIENT_SECRET:
     raise ValueError("❌ No se encontraron CLIENT_ID o CLIENT_SECRET en el archivo .env")
 
-# 1. Leer parámetro de ejecución desde la consola
-if len(sys.argv) < 2:
-    print("❌ Uso: python upload_screenshots.py APPTEST-XX")
+# 1. Leer parámetros de ejecución desde la consola
+# Por defecto una captura por test (la del fallo o la final); --all-steps sube todos los pasos
+ALL_STEPS = "--all-steps" in sys.argv
+args = [arg for arg in sys.argv[1:] if arg != "--all-steps"]
+if not args:
+    print("❌ Uso: python upload_screenshots.py APPTEST-XX [RUN_ID] [--all-steps]")
     sys.exit(1)
 
-TARGET_EXECUTION = sys.argv[1]
+TARGET_EXECUTION = args[0]
+
+# Las capturas se descubren en el índice de evidencias que escribe conftest.py
+evidence_index = EvidenceIndex(os.getenv("EVIDENCE_STORE_DIR", DEFAULT_STORE_DIR))
+RUN_ID = args[1] if len(args) > 1 else evidence_index.latest_run()
+if RUN_ID is None:
+    print("❌ No hay evidencias indexadas; ejecuta antes los tests")
+    sys.exit(1)
 
 # 2. Autenticación en Xray
 print("🔑 Generando token de autenticación...")
@@ -34,17 +46,10 @@ token = auth_resp.text.strip('"')
 headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
 print("✅ Token generado.")
 
-# 3. Mapear tests con screenshots
-tests = {
-    "APPTEST-10": "pytest_screenshots/test_01_click_registrarme_test_01_final_20250915_220717.png",
-    "APPTEST-11": "pytest_screenshots/test_02_go_back_with_phone_button_test_02_final_20250915_220729.png",
-    "APPTEST-12": "pytest_screenshots/test_03_click_iniciar_sesion_test_03_final_20250915_220754.png",
-    "APPTEST-13": "pytest_screenshots/test_04_escribir_email_y_continuar_test_04_final_20250915_220819.png",
-    "APPTEST-14": "pytest_screenshots/test_05_click_usuario_y_contrasena_test_06_final_20250915_221847.png",
-    "APPTEST-15": "pytest_screenshots/test_06_escribir_usuario_y_contrasena_test_06_final_20250915_221916.png",
-    "APPTEST-16": "pytest_screenshots/test_07_flujo_completo_productos_y_salir_test_07_final_20250915_221959.png",
-    "APPTEST-17": "pytest_screenshots/test_debug_current_screen_test_05_final_20250915_220940.png",
-}
+# 3. Capturas de la ejecución agrupadas por clave de Xray
+tests = screenshots_by_test(evidence_index.entries(run_id=RUN_ID, kind=SCREENSHOT), all_steps=ALL_STEPS)
+mode = "todos los pasos" if ALL_STEPS else "fallo o final"
+print(f"🔎 Ejecución {RUN_ID}: {sum(len(p) for p in tests.values())} capturas de {len(tests)} tests ({mode})")
 
 # 4. Construir payload para Xray
 xray_payload = {
@@ -52,25 +57,24 @@ xray_payload = {
     "tests": []
 }
 
-for issue_key, screenshot in tests.items():
-    if not os.path.exists(screenshot):
-        print(f"⚠️ No se encontró {screenshot}, lo salto")
-        continue
-
-    with open(screenshot, "rb") as f:
-        encoded = base64.b64encode(f.read()).decode("utf-8")
-
-    test_entry = {
-        "testKey": issue_key,
-        "evidences": [
-            {
-                "data": encoded,
-                "filename": os.path.basename(screenshot),
-                "contentType": "image/png"
-            }
-        ]
-    }
-    xray_payload["tests"].append(test_entry)
+for issue_key, screenshots in tests.items():
+    evidences = []
+    for screenshot in screenshots:
+        if not os.path.exists(screenshot):
+            print(f"⚠️ No se encontró {screenshot}, lo salto")
+            continue
+
+        with open(screenshot, "rb") as f:
+            encoded = base64.b64encode(f.read()).decode("utf-8")
+
+        evidences.append({
+            "data": encoded,
+            "filename": f"{issue_key}_{os.path.basename(screenshot)}",
+            "contentType": "image/png"
+        })
+
+    if evidences:
+        xray_payload["tests"].append({"testKey": issue_key, "evidences": evidences})
 
 # 5. Subir a Xray
 print(f"⬆️ Subiendo resultados y screenshots a Xray en {TARGET_EXECUTION}...")
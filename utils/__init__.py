@@ -0,0 +1 @@
+"""Utilidades compartidas por conftest.py, test_runner.py y los tests"""
@@ -0,0 +1,168 @@
+"""
+Estado autenticado de la app cacheado para saltar el login por UI
+El login completo (correo → usuario/contraseña → Siguiente) cuesta decenas de
+segundos. Tras un login real se copian los directorios de datos de la app
+(shared_prefs, databases, files) con ``adb run-as`` a un tar local, y antes de
+cada test marcado con ``@pytest.mark.logged_in`` se restauran en ~1 s:
+
+    adb shell am force-stop PKG
+    adb shell run-as PKG rm -rf shared_prefs databases files
+    adb exec-in run-as PKG tar -xf -        (tar por stdin)
+
+La caché se guarda en pytest_reports/.cache/app_state/ con la clave
+paquete + hash del APK: un APK nuevo invalida el estado automáticamente.
+``run-as`` solo funciona con builds debuggable.
+
+Comprobación contra el adb falso (utils/fake_adb.py):
+    python -m utils.app_state --check
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+DEFAULT_CACHE_DIR = os.path.join("pytest_reports", ".cache", "app_state")
+# Directorios del data dir que guardan la sesión; cache/ y code_cache/ se omiten
+STATE_DIRS = ("shared_prefs", "databases", "files")
+
+
+class AppStateError(Exception):
+    """No se pudo capturar o restaurar el estado de la app"""
+
+
+class AppStateCache:
+    """Captura y restaura el data dir de la app por adb run-as"""
+
+    def __init__(self, adb="adb", device_name=None, package=None, apk_hash=None,
+                 cache_dir=DEFAULT_CACHE_DIR, state_dirs=STATE_DIRS, env=None):
+        # adb puede ser una ruta o una lista (p. ej. [python, -m, utils.fake_adb])
+        self.adb = [adb] if isinstance(adb, str) else list(adb)
+        self.device_name = device_name
+        self.package = package
+        self.apk_hash = apk_hash or "sin-apk"
+        self.cache_dir = cache_dir
+        self.state_dirs = state_dirs
+        self.env = env
+        key = f"{package}_{self.apk_hash[:16]}"
+        self.archive_path = os.path.join(cache_dir, f"{key}.tar")
+        self.meta_path = os.path.join(cache_dir, f"{key}.json")
+
+    def _adb(self, args, stdin=None, timeout=60):
+        command = list(self.adb)
+        if self.device_name:
+            command += ["-s", self.device_name]
+        try:
+            result = subprocess.run(command + args, input=stdin, capture_output=True, timeout=timeout,
+                                    env=self.env)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise AppStateError(f"adb {' '.join(args)}: {e}")
+        if result.returncode != 0:
+            stderr = result.stderr.decode(errors="replace").strip()
+            raise AppStateError(f"adb {' '.join(args)} terminó con {result.returncode}: {stderr}")
+        return result.stdout
+
+    def exists(self):
+        return os.path.exists(self.archive_path) and os.path.exists(self.meta_path)
+
+    def invalidate(self):
+        for path in (self.archive_path, self.meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _present_dirs(self):
+        listing = self._adb(["shell", "run-as", self.package, "ls"]).decode(errors="replace")
+        return [name for name in self.state_dirs if name in listing.split()]
+
+    def capture(self):
+        """Guarda el estado actual de la app; devuelve los segundos que tardó"""
+        start = time.perf_counter()
+        dirs = self._present_dirs()
+        if not dirs:
+            raise AppStateError(f"'{self.package}' no tiene {', '.join(self.state_dirs)} que capturar")
+        archive = self._adb(["exec-out", "run-as", self.package, "tar", "-cf", "-"] + dirs)
+        if not archive:
+            raise AppStateError("tar devolvió un archivo vacío")
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self.archive_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(archive)
+        os.replace(tmp_path, self.archive_path)
+        meta = {
+            "package": self.package,
+            "apk_hash": self.apk_hash,
+            "dirs": dirs,
+            "bytes": len(archive),
+            "captured_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        tmp_path = f"{self.meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, self.meta_path)
+        return time.perf_counter() - start
+
+    def restore(self):
+        """Sustituye el estado de la app por el capturado; devuelve los segundos que tardó"""
+        if not self.exists():
+            raise AppStateError("No hay estado capturado para este APK")
+        start = time.perf_counter()
+        with open(self.meta_path, encoding="utf-8") as f:
+            dirs = json.load(f)["dirs"]
+        with open(self.archive_path, "rb") as f:
+            archive = f.read()
+        self._adb(["shell", "am", "force-stop", self.package])
+        self._adb(["shell", "run-as", self.package, "rm", "-rf"] + dirs)
+        self._adb(["exec-in", "run-as", self.package, "tar", "-xf", "-"], stdin=archive)
+        return time.perf_counter() - start
+
+
+def check():
+    """Captura, borra y restaura un estado de prueba contra el adb falso"""
+    root = tempfile.mkdtemp(prefix="fake_adb_")
+    package = "com.example.poc"
+    app_dir = os.path.join(root, "data", package)
+    os.makedirs(os.path.join(app_dir, "shared_prefs"))
+    os.makedirs(os.path.join(app_dir, "cache"))
+    prefs = os.path.join(app_dir, "shared_prefs", "session.xml")
+    with open(prefs, "w", encoding="utf-8") as f:
+        f.write('<map><string name="token">abc123</string></map>')
+
+    env = dict(os.environ, FAKE_ADB_ROOT=root)
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [repo_root, env.get("PYTHONPATH")]))
+    cache = AppStateCache([sys.executable, "-m", "utils.fake_adb"], device_name="emulator-5554",
+                          package=package, apk_hash="a" * 64, cache_dir=os.path.join(root, "cache"), env=env)
+    try:
+        print(f"📦 Captura: {cache.capture():.2f}s → {cache.archive_path}")
+        with open(prefs, "w", encoding="utf-8") as f:
+            f.write("<map />")
+        print(f"♻️  Restauración: {cache.restore():.2f}s")
+        with open(prefs, encoding="utf-8") as f:
+            restored = "abc123" in f.read()
+        other_apk = AppStateCache(cache.adb, package=package, apk_hash="b" * 64, cache_dir=cache.cache_dir)
+        invalidated = not other_apk.exists()
+        print(f"{'✅' if restored else '❌'} shared_prefs restaurado")
+        print(f"{'✅' if invalidated else '❌'} Otro APK no reutiliza el estado")
+        return 0 if restored and invalidated else 1
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estado autenticado de la app cacheado")
+    parser.add_argument("--check", action="store_true", help="Probar captura y restauración con el adb falso")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(check())
+    parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
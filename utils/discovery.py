@@ -0,0 +1,252 @@
+"""
+Descubrimiento estático de tests
+Recorre tests/ una sola vez y analiza cada archivo con ast para obtener clases,
+funciones de test y claves @pytest.mark.xray sin importar appium ni conftest.py.
+El resultado se guarda por archivo según su mtime y tamaño.
+
+Presupuesto de importación de conftest.py (sin contar ``import pytest``):
+    python -m pytest unit_tests/test_conftest_import.py
+    python -m utils.discovery --import-budget-ms 50
+"""
+
+import argparse
+import ast
+import configparser
+import json
+import os
+import re
+import subprocess
+import sys
+from fnmatch import fnmatch
+
+DEFAULT_FILE_PATTERNS = ["test_*.py", "*_test.py"]
+DEFAULT_CLASS_PATTERNS = ["Test*"]
+DEFAULT_FUNCTION_PATTERNS = ["test_*"]
+
+# Módulos que conftest.py no debe importar al cargarse (solo en los fixtures que los usan)
+HEAVY_IMPORTS = ["appium", "selenium", "requests", "dotenv", "lxml", "PIL"]
+# Presupuesto de importación de conftest.py y sus plugins, sin contar pytest
+IMPORT_BUDGET_MS = 50
+
+
+def read_pytest_patterns(ini_path="pytest.ini"):
+    """Patrones python_files/python_classes/python_functions de pytest.ini"""
+    patterns = {
+        "files": DEFAULT_FILE_PATTERNS,
+        "classes": DEFAULT_CLASS_PATTERNS,
+        "functions": DEFAULT_FUNCTION_PATTERNS,
+    }
+    if not os.path.exists(ini_path):
+        return patterns
+
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.read(ini_path, encoding="utf-8")
+    if parser.has_section("pytest"):
+        section = parser["pytest"]
+        for key, option in (("files", "python_files"), ("classes", "python_classes"),
+                            ("functions", "python_functions")):
+            if option in section:
+                patterns[key] = section[option].split()
+    return patterns
+
+
+def _matches(name, patterns):
+    return any(fnmatch(name, pattern) for pattern in patterns)
+
+
+def find_test_modules(tests_dir, file_patterns=DEFAULT_FILE_PATTERNS):
+    """Un único recorrido del árbol: archivos de test en la raíz y directorios con tests"""
+    test_files = []
+    test_dirs = []
+    for root, dirs, files in os.walk(tests_dir):
+        dirs[:] = [d for d in dirs if d != "__pycache__" and not d.startswith(".")]
+        matching = sorted(name for name in files if _matches(name, file_patterns))
+        if not matching:
+            continue
+        if root == tests_dir:
+            test_files.extend(os.path.join(root, name) for name in matching)
+        else:
+            test_dirs.append(root)
+    return test_files, test_dirs
+
+
+def _xray_keys(decorators):
+    """Claves de los decoradores @pytest.mark.xray("KEY")"""
+    keys = []
+    for decorator in decorators:
+        if (isinstance(decorator, ast.Call)
+                and isinstance(decorator.func, ast.Attribute)
+                and decorator.func.attr == "xray"
+                and decorator.args
+                and isinstance(decorator.args[0], ast.Constant)
+                and isinstance(decorator.args[0].value, str)):
+            keys.append(decorator.args[0].value)
+    return keys
+
+
+def _marker_names(decorators):
+    """Nombres de los markers @pytest.mark.<nombre> (con o sin argumentos)"""
+    names = []
+    for decorator in decorators:
+        node = decorator.func if isinstance(decorator, ast.Call) else decorator
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Attribute) and node.value.attr == "mark":
+            names.append(node.attr)
+    return names
+
+
+def describe_test_file(path, patterns):
+    """Tests definidos en un archivo, obtenidos sin importarlo"""
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    tests = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and _matches(node.name, patterns["functions"]):
+            tests.append({
+                "nodeid": f"{path}::{node.name}",
+                "name": node.name,
+                "line": node.lineno,
+                "xray": _xray_keys(node.decorator_list),
+                "markers": _marker_names(node.decorator_list),
+            })
+        elif isinstance(node, ast.ClassDef) and _matches(node.name, patterns["classes"]):
+            class_keys = _xray_keys(node.decorator_list)
+            class_markers = _marker_names(node.decorator_list)
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and _matches(item.name, patterns["functions"]):
+                    tests.append({
+                        "nodeid": f"{path}::{node.name}::{item.name}",
+                        "name": item.name,
+                        "line": item.lineno,
+                        "xray": _xray_keys(item.decorator_list) or class_keys,
+                        "markers": _marker_names(item.decorator_list) + class_markers,
+                    })
+    return tests
+
+
+class TestCatalog:
+    """Catálogo de tests con caché por archivo (mtime + tamaño)"""
+
+    __test__ = False  # Evita que pytest lo confunda con una clase de tests
+
+    def __init__(self, tests_dir="tests", cache_path=os.path.join("pytest_reports", ".cache", "discovery.json"),
+                 ini_path="pytest.ini"):
+        self.tests_dir = tests_dir
+        self.cache_path = cache_path
+        self.patterns = read_pytest_patterns(ini_path)
+        self._cache = self._load_cache()
+        self._dirty = False
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._cache, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+    def find_modules(self):
+        return find_test_modules(self.tests_dir, self.patterns["files"])
+
+    def tests_in_file(self, path):
+        stat = os.stat(path)
+        signature = [stat.st_mtime_ns, stat.st_size]
+        entry = self._cache.get(path)
+        if entry and entry["signature"] == signature:
+            return entry["tests"]
+
+        try:
+            tests = describe_test_file(path, self.patterns)
+        except SyntaxError as e:
+            print(f"⚠️ No se pudo analizar {path}: {e}")
+            tests = []
+        self._cache[path] = {"signature": signature, "tests": tests}
+        self._dirty = True
+        return tests
+
+    def tests_in_module(self, module_path):
+        """Tests de un módulo (archivo o directorio con sus subdirectorios)"""
+        if os.path.isfile(module_path):
+            return self.tests_in_file(module_path)
+
+        tests = []
+        for root, dirs, files in os.walk(module_path):
+            dirs[:] = sorted(d for d in dirs if d != "__pycache__" and not d.startswith("."))
+            for name in sorted(files):
+                if _matches(name, self.patterns["files"]):
+                    tests.extend(self.tests_in_file(os.path.join(root, name)))
+        return tests
+
+
+def measure_conftest_import(conftest_dir="."):
+    """Importa conftest.py y sus plugins con -X importtime y devuelve (ms propios, módulos pesados cargados)
+
+    pytest se importa antes en el mismo proceso, así que su coste (la mayor
+    parte del arranque) queda fuera: solo se suma lo que se carga después.
+    """
+    code = ("import importlib, pytest, conftest\n"
+            "for plugin in getattr(conftest, 'pytest_plugins', []):\n"
+            "    importlib.import_module(plugin)\n")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=conftest_dir, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "import conftest falló")
+
+    own_us = 0
+    after_pytest = False
+    loaded = set()
+    line_pattern = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+    for line in result.stderr.splitlines():
+        match = line_pattern.match(line)
+        if not match:
+            continue
+        module = match.group(4)
+        top_level = len(match.group(3)) == 1
+        if after_pytest:
+            loaded.add(module.split(".")[0])
+            if top_level:
+                own_us += int(match.group(2))
+        elif top_level and module == "pytest":
+            after_pytest = True
+
+    heavy = [name for name in HEAVY_IMPORTS if name in loaded]
+    return own_us / 1000.0, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Descubrimiento estático de tests")
+    parser.add_argument("--tests-dir", default="tests")
+    parser.add_argument("--import-budget-ms", type=float, nargs="?", const=IMPORT_BUDGET_MS,
+                        help="Falla si importar conftest.py supera este tiempo o carga módulos pesados")
+    args = parser.parse_args()
+
+    if args.import_budget_ms is not None:
+        elapsed_ms, heavy = measure_conftest_import()
+        print(f"⏱️ import conftest: {elapsed_ms:.1f} ms (presupuesto {args.import_budget_ms:.0f} ms)")
+        if heavy:
+            print(f"❌ conftest.py importa módulos pesados al cargarse: {heavy}")
+        if heavy or elapsed_ms > args.import_budget_ms:
+            sys.exit(1)
+        print("✅ Dentro del presupuesto")
+        return
+
+    catalog = TestCatalog(args.tests_dir)
+    test_files, test_dirs = catalog.find_modules()
+    for module_path in test_files + test_dirs:
+        for test in catalog.tests_in_module(module_path):
+            keys = f" [{', '.join(test['xray'])}]" if test["xray"] else ""
+            print(f"{test['nodeid']}{keys}")
+    catalog.save()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Instrumentación de comandos del driver de Appium
+Envuelve driver.execute (por el que pasan también los comandos de WebElement)
+para medir cada comando, y time.sleep durante el test, y clasifica el tiempo en:
+    - network:  comandos que respondieron (ida y vuelta al servidor Appium)
+    - waiting:  búsquedas que no encontraron nada (consumen el implicit wait)
+    - sleeping: llamadas a time.sleep del test
+                (las pausas de sondeo de utils/waits.py cuentan como waiting)
+    - local:    el resto (código Python del test)
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Categorías en el orden en que se muestran
+CATEGORIES = ("network", "waiting", "sleeping", "local")
+
+_real_sleep = time.sleep
+
+
+def _is_find_command(command):
+    return command.startswith("find")
+
+
+class DriverInstrumentation:
+    """Registro de comandos y esperas del test en curso"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.records = []
+        self._started_at = None
+        self._wall = 0.0
+        self._original_execute = driver.execute
+        self._main_thread = None
+        self._in_command = False
+        self._sleep_category = "sleeping"
+        driver.execute = self._execute
+
+    def _execute(self, command, params=None):
+        start = time.perf_counter()
+        outcome = "ok"
+        result = None
+        self._in_command = True
+        try:
+            result = self._original_execute(command, params)
+            return result
+        except Exception as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            self._in_command = False
+            if self._started_at is not None:
+                duration = time.perf_counter() - start
+                empty_find = (outcome == "ok" and _is_find_command(command) and isinstance(result, dict)
+                              and result.get("value") == [])
+                category = "waiting" if _is_find_command(command) and (outcome != "ok" or empty_find) else "network"
+                self.records.append({
+                    "command": command,
+                    "locator": self._locator(params),
+                    "duration": round(duration, 4),
+                    "outcome": outcome,
+                    "category": category,
+                })
+
+    @staticmethod
+    def _locator(params):
+        if not params or "using" not in params:
+            return None
+        return f"{params['using']}={params.get('value')}"
+
+    def _sleep(self, seconds):
+        # Solo se cuentan las pausas del hilo del test fuera de un comando del driver
+        if self._in_command or threading.current_thread() is not self._main_thread:
+            return _real_sleep(seconds)
+        start = time.perf_counter()
+        try:
+            return _real_sleep(seconds)
+        finally:
+            self.records.append({
+                "command": "sleep",
+                "locator": None,
+                "duration": round(time.perf_counter() - start, 4),
+                "outcome": "ok",
+                "category": self._sleep_category,
+            })
+
+    @contextmanager
+    def waiting(self):
+        """Las pausas dentro del bloque son sondeo de una espera por condición"""
+        previous = self._sleep_category
+        self._sleep_category = "waiting"
+        try:
+            yield
+        finally:
+            self._sleep_category = previous
+
+    @contextmanager
+    def measure(self):
+        """Mide el bloque (la fase call del test) y sustituye time.sleep mientras dura"""
+        self.records = []
+        self._main_thread = threading.current_thread()
+        self._started_at = time.perf_counter()
+        time.sleep = self._sleep
+        try:
+            yield self
+        finally:
+            time.sleep = _real_sleep
+            self._wall = time.perf_counter() - self._started_at
+            self._started_at = None
+
+    def breakdown(self):
+        """Segundos por categoría del último bloque medido"""
+        totals = {category: 0.0 for category in CATEGORIES}
+        for record in self.records:
+            totals[record["category"]] += record["duration"]
+        totals["local"] = max(0.0, self._wall - totals["network"] - totals["waiting"] - totals["sleeping"])
+        totals["commands"] = sum(1 for r in self.records if r["command"] != "sleep")
+        return totals
+
+    def write_log(self, path, nodeid):
+        """Añade los comandos del test a un archivo JSON-lines"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            for record in self.records:
+                f.write(json.dumps(dict(record, test=nodeid), ensure_ascii=False) + "\n")
+
+
+def instrument_driver(driver):
+    """Instala la instrumentación una sola vez por driver y la devuelve"""
+    instrumentation = getattr(driver, "_instrumentation", None)
+    if instrumentation is None:
+        instrumentation = DriverInstrumentation(driver)
+        driver._instrumentation = instrumentation
+    return instrumentation
+
+
+def get_instrumentation(driver):
+    return getattr(driver, "_instrumentation", None)
@@ -0,0 +1,102 @@
+"""
+Estimación de duraciones a partir de los reportes JUnit históricos
+Se usa para ordenar los módulos (el más largo primero) al ejecutar en paralelo
+"""
+
+import glob
+import heapq
+import os
+import re
+import xml.etree.ElementTree as ET
+
+# result_<módulo>_<YYYYmmdd_HHMMSS>.xml (el módulo puede contener guiones bajos)
+RESULT_FILE_PATTERN = re.compile(r"^result_(?P<module>.+)_(?P<timestamp>\d{8}_\d{6})\.xml$")
+# Copia de un resultado reutilizado de la caché: result_<módulo>_<ts>.cached.xml.
+# No coincide con RESULT_FILE_PATTERN, así que no cuenta como una ejecución más
+CACHED_RESULT_SUFFIX = ".cached.xml"
+
+
+def parse_result_filename(path):
+    """Devuelve (módulo, timestamp) de un reporte result_*.xml o None si no coincide"""
+    match = RESULT_FILE_PATTERN.match(os.path.basename(path))
+    if not match:
+        return None
+    return match.group("module"), match.group("timestamp")
+
+
+class DurationHistory:
+    """Duración estimada por módulo y por test usando una media móvil exponencial (EWMA)"""
+
+    def __init__(self, reports_dir="pytest_reports", alpha=0.3, default_module_seconds=120.0):
+        self.reports_dir = reports_dir
+        self.alpha = alpha
+        self.default_module_seconds = default_module_seconds
+        self.module_estimates = {}
+        self.test_estimates = {}
+        self.module_test_estimates = {}
+        self.runs_loaded = 0
+
+    def _update(self, estimates, key, value):
+        previous = estimates.get(key)
+        if previous is None:
+            estimates[key] = value
+        else:
+            estimates[key] = self.alpha * value + (1 - self.alpha) * previous
+
+    def load(self, exclude_timestamp=None):
+        """Lee los reportes en orden cronológico y actualiza las estimaciones (sin copias de caché)"""
+        reports = []
+        for path in glob.glob(os.path.join(self.reports_dir, "**", "result_*.xml"), recursive=True):
+            parsed = parse_result_filename(path)
+            if parsed and parsed[1] != exclude_timestamp:
+                reports.append((parsed[1], parsed[0], path))
+
+        for _timestamp, module_name, path in sorted(reports):
+            try:
+                self._load_report(module_name, path)
+                self.runs_loaded += 1
+            except (ET.ParseError, OSError, ValueError) as e:
+                print(f"⚠️ No se pudo leer duraciones de {path}: {e}")
+
+        return self
+
+    def _load_report(self, module_name, path):
+        module_time = 0.0
+        for _event, elem in ET.iterparse(path, events=("end",)):
+            if elem.tag == "testcase":
+                test_id = f"{elem.get('classname', '')}::{elem.get('name', '')}"
+                duration = float(elem.get("time", 0) or 0)
+                self._update(self.test_estimates, test_id, duration)
+                self._update(self.module_test_estimates, (module_name, elem.get("name", "")), duration)
+                elem.clear()
+            elif elem.tag == "testsuite":
+                module_time += float(elem.get("time", 0) or 0)
+                elem.clear()
+        self._update(self.module_estimates, module_name, module_time)
+
+    def module_estimate(self, module_name):
+        """Duración estimada de un módulo, o el valor por defecto si nunca se ejecutó"""
+        return self.module_estimates.get(module_name, self.default_module_seconds)
+
+    def test_estimate(self, test_id, default=None):
+        return self.test_estimates.get(test_id, default)
+
+    def test_estimate_by_name(self, module_name, test_name, default=None):
+        """Estimación por módulo y nombre del test (el classname de JUnit lleva el prefijo)"""
+        return self.module_test_estimates.get((module_name, test_name), default)
+
+    def schedule(self, jobs, workers):
+        """Ordena los trabajos del más largo al más corto (LPT).
+
+        ``jobs`` es una lista de tuplas (ruta, nombre_módulo). Devuelve la lista
+        ordenada y el makespan previsto si cada worker libre toma el siguiente trabajo.
+        """
+        ordered = sorted(jobs, key=lambda job: self.module_estimate(job[1]), reverse=True)
+        return ordered, self.predict_makespan(ordered, workers)
+
+    def predict_makespan(self, ordered_jobs, workers):
+        """Simula el reparto: cada trabajo va al worker que antes queda libre"""
+        loads = [0.0] * max(1, workers)
+        for _path, module_name in ordered_jobs:
+            heapq.heapreplace(loads, loads[0] + self.module_estimate(module_name))
+        return max(loads)
@@ -0,0 +1,129 @@
+"""
+Índice de evidencias (videos, capturas) por clave de Xray y ejecución
+conftest.py añade una línea JSON por evidencia a evidence_store/index.jsonl en
+cuanto el archivo está en disco; evidence_report.py y upload_screenshots.py
+descubren las evidencias aquí en vez de buscar rutas a mano.
+
+El almacén (``EvidenceStore``) guarda cada archivo una sola vez por contenido:
+
+    evidence_store/objects/<sha[:2]>/<sha256><extensión>
+
+de modo que volver a generar reportes, o dos tests con el mismo video o la misma
+captura, no duplican bytes.
+"""
+
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+
+from utils.result_cache import file_sha256
+
+DEFAULT_STORE_DIR = "evidence_store"
+INDEX_NAME = "index.jsonl"
+
+VIDEO = "video"
+SCREENSHOT = "screenshot"
+
+
+class EvidenceIndex:
+    """Registro append-only de evidencias; seguro entre hilos y procesos (una línea por write)"""
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR):
+        self.path = os.path.join(store_dir, INDEX_NAME)
+        self._lock = threading.Lock()
+
+    def add(self, kind, path, run_id, module, xray=None, nodeid=None, test=None, **extra):
+        entry = {
+            "kind": kind,
+            "path": path,
+            "run_id": run_id,
+            "module": module,
+            "xray": xray,
+            "nodeid": nodeid,
+            "test": test,
+            "time": datetime.now().isoformat(timespec="seconds"),
+        }
+        entry.update(extra)
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+        return entry
+
+    def entries(self, run_id=None, xray=None, kind=None):
+        if not os.path.exists(self.path):
+            return []
+        result = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Línea a medias de un proceso interrumpido
+                if run_id and entry.get("run_id") != run_id:
+                    continue
+                if xray and entry.get("xray") != xray:
+                    continue
+                if kind and entry.get("kind") != kind:
+                    continue
+                result.append(entry)
+        return result
+
+    def runs(self):
+        """Ejecuciones con evidencias, de la más antigua a la más reciente"""
+        seen = {}
+        for entry in self.entries():
+            seen.setdefault(entry["run_id"], entry["time"])
+        return sorted(seen, key=seen.get)
+
+    def latest_run(self):
+        runs = self.runs()
+        return runs[-1] if runs else None
+
+
+def _screenshot_rank(entry):
+    step = entry.get("step") or ""
+    if step.startswith("fallo"):
+        return 2
+    return 1 if step == "final" else 0
+
+
+def screenshots_by_test(entries, all_steps=False):
+    """Capturas por clave de Xray: todas con ``all_steps``; si no, solo la del fallo o la final
+
+    Sin captura de fallo ni final (p. ej. era igual al paso anterior y no se guardó)
+    queda la última del test.
+    """
+    tests = {}
+    for entry in entries:
+        if entry.get("kind") == SCREENSHOT and entry.get("xray"):
+            tests.setdefault(entry["xray"], []).append(entry)
+    if all_steps:
+        return {key: [entry["path"] for entry in group] for key, group in tests.items()}
+    # max() devuelve la primera de las empatadas: se recorre al revés para quedarse con la última
+    return {key: [max(reversed(group), key=_screenshot_rank)["path"]] for key, group in tests.items()}
+
+
+class EvidenceStore:
+    """Archivos direccionados por contenido (SHA-256)"""
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR):
+        self.root = store_dir
+        self.objects_dir = os.path.join(store_dir, "objects")
+
+    def object_path(self, digest, extension):
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}{extension}")
+
+    def put(self, path):
+        """Guarda ``path`` en el almacén (si no estaba) y devuelve (sha256, ruta en el almacén)"""
+        digest = file_sha256(path)
+        target = self.object_path(digest, os.path.splitext(path)[1].lower())
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, target)
+        return digest, target
@@ -0,0 +1,146 @@
+"""
+adb falso para probar sin dispositivo lo que el framework hace por adb
+El "dispositivo" es un directorio local (FAKE_ADB_ROOT) con un subdirectorio de
+datos por paquete. Soporta lo mínimo que usan los helpers:
+
+    adb devices
+    adb -s SERIAL shell run-as PKG ls
+    adb -s SERIAL shell run-as PKG rm -rf RUTAS...
+    adb -s SERIAL shell am force-stop PKG
+    adb -s SERIAL exec-out run-as PKG tar -cf - RUTAS...
+    adb -s SERIAL exec-in run-as PKG tar -xf -
+    adb -s SERIAL shell screenrecord [--time-limit N] RUTA   (escribe hasta recibir SIGTERM)
+    adb -s SERIAL exec-out screenrecord --output-format=h264 [--time-limit N] -
+    adb -s SERIAL shell stat -c %s RUTA
+    adb -s SERIAL shell rm -f RUTA...
+    adb -s SERIAL pull RUTA DESTINO
+
+Las rutas del dispositivo (/sdcard/...) se guardan bajo FAKE_ADB_ROOT.
+
+Uso:
+    FAKE_ADB_ROOT=/tmp/dispositivo python -m utils.fake_adb devices
+    python -m utils.app_state --check      (captura y restauración contra este adb)
+"""
+
+import glob
+import os
+import shutil
+import signal
+import sys
+import tarfile
+import time
+
+ROOT_ENV = "FAKE_ADB_ROOT"
+SERIAL = "emulator-5554"
+# Bytes por "fotograma" y fotogramas por segundo del video falso
+FRAME_BYTES = 4096
+FRAME_RATE = 20
+
+
+def _app_dir(package):
+    return os.path.join(os.environ.get(ROOT_ENV, "fake_device"), "data", package)
+
+
+def _device_path(path):
+    return os.path.join(os.environ.get(ROOT_ENV, "fake_device"), path.lstrip("/"))
+
+
+def _screenrecord(args, output):
+    """Escribe fotogramas falsos hasta SIGTERM o --time-limit (180 s por defecto, como Android)"""
+    time_limit = float(args[args.index("--time-limit") + 1]) if "--time-limit" in args else 180.0
+    stopped = []
+    signal.signal(signal.SIGTERM, lambda *_: stopped.append(True))
+    deadline = time.monotonic() + time_limit
+    frame = 0
+    while not stopped and time.monotonic() < deadline:
+        try:
+            output.write(frame.to_bytes(4, "big") * (FRAME_BYTES // 4))
+            output.flush()
+        except BrokenPipeError:
+            return 0
+        frame += 1
+        time.sleep(1.0 / FRAME_RATE)
+    return 0
+
+
+def _shell(args):
+    if args[0] == "screenrecord":
+        path = _device_path(args[-1])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            _screenrecord(args, f)
+            # Como en el dispositivo, el cierre del mp4 llega un poco después de parar
+            f.write(b"moov")
+        return 0
+    if args[:3] == ["stat", "-c", "%s"]:
+        path = _device_path(args[3])
+        if not os.path.exists(path):
+            print(f"stat: '{args[3]}': No such file or directory", file=sys.stderr)
+            return 1
+        print(os.path.getsize(path))
+        return 0
+    if args[0] == "rm":
+        for pattern in [a for a in args[1:] if not a.startswith("-")]:
+            # La shell del dispositivo expande los comodines
+            for path in glob.glob(_device_path(pattern)):
+                os.remove(path)
+        return 0
+    if args[:2] == ["am", "force-stop"]:
+        return 0
+    print(f"shell: comando no soportado: {' '.join(args)}", file=sys.stderr)
+    return 1
+
+
+def _run_as(package, args):
+    app_dir = _app_dir(package)
+    os.makedirs(app_dir, exist_ok=True)
+    command = args[0]
+    if command == "ls":
+        print("\n".join(sorted(os.listdir(app_dir))))
+        return 0
+    if command == "rm":
+        for path in [a for a in args[1:] if not a.startswith("-")]:
+            target = os.path.join(app_dir, path)
+            if os.path.isdir(target):
+                shutil.rmtree(target)
+            elif os.path.exists(target):
+                os.remove(target)
+        return 0
+    if command == "tar" and args[1] == "-cf":
+        with tarfile.open(fileobj=sys.stdout.buffer, mode="w|") as tar:
+            for path in args[3:]:
+                tar.add(os.path.join(app_dir, path), arcname=path)
+        return 0
+    if command == "tar" and args[1] == "-xf":
+        with tarfile.open(fileobj=sys.stdin.buffer, mode="r|") as tar:
+            tar.extractall(app_dir)
+        return 0
+    print(f"run-as: comando no soportado: {' '.join(args)}", file=sys.stderr)
+    return 1
+
+
+def main(argv):
+    if argv[:1] == ["-s"]:
+        argv = argv[2:]
+    if argv == ["devices"]:
+        print(f"List of devices attached\n{SERIAL}\tdevice\n")
+        return 0
+    if len(argv) >= 3 and argv[0] in ("shell", "exec-out", "exec-in") and argv[1] == "run-as":
+        return _run_as(argv[2], argv[3:])
+    if argv[:2] == ["exec-out", "screenrecord"]:
+        return _screenrecord(argv, sys.stdout.buffer)
+    if argv[:1] == ["shell"] and len(argv) > 1:
+        return _shell(argv[1:])
+    if argv[:1] == ["pull"] and len(argv) == 3:
+        source = _device_path(argv[1])
+        if not os.path.exists(source):
+            print(f"adb: error: remote object '{argv[1]}' does not exist", file=sys.stderr)
+            return 1
+        shutil.copyfile(source, argv[2])
+        return 0
+    print(f"adb falso: comando no soportado: {' '.join(argv)}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
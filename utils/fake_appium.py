@@ -0,0 +1,203 @@
+"""
+Servidor Appium falso para probar el runner, el broker de sesiones y los helpers
+sin emulador. Implementa lo mínimo del protocolo W3C: /status, creación y borrado
+de sesiones, un campo de texto mínimo (click, clear, value, attribute y los
+scripts ``mobile: type`` / ``mobile: replaceElementValue``), page_source y el
+implicit wait (/timeouts), y responde {"value": null} a cualquier otro comando,
+con una latencia opcional por comando para simular la red.
+
+Con ``present`` (conjunto de (using, value)) find elements solo encuentra esos
+localizadores; cada búsqueda vacía apunta en ``empty_finds`` el implicit wait que
+el servidor real habría esperado, sin esperarlo.
+
+Uso:
+    python -m utils.fake_appium --port 4723 --latency-ms 20
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeAppiumState:
+    """Sesiones y comandos recibidos, para poder inspeccionarlos desde fuera"""
+
+    def __init__(self, latency_seconds=0.0):
+        self.latency_seconds = latency_seconds
+        self.sessions = {}
+        self.commands = []
+        self.element_text = {}
+        self.focused = None
+        self.page_source = "<hierarchy/>"
+        self.present = None
+        self.implicit_wait = 0.0
+        self.empty_finds = []
+        self.lock = threading.Lock()
+
+    def type_into_focused(self, text):
+        """Escribe en el elemento enfocado (lo que haría ``adb shell input text``)"""
+        with self.lock:
+            if self.focused is not None:
+                self.element_text[self.focused] = self.element_text.get(self.focused, "") + text
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+
+    def _reply(self, status, value):
+        body = json.dumps({"value": value}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method):
+        payload = self._read_json() if method == "POST" else {}
+        parts = [p for p in self.path.split("?")[0].split("/") if p]
+        with self.state.lock:
+            self.state.commands.append((method, self.path, payload))
+        if self.state.latency_seconds:
+            time.sleep(self.state.latency_seconds)
+
+        if parts == ["status"]:
+            return self._reply(200, {"ready": True, "message": "fake appium"})
+
+        if parts == ["session"] and method == "POST":
+            session_id = uuid.uuid4().hex
+            capabilities = payload.get("capabilities", {}).get("alwaysMatch", {})
+            with self.state.lock:
+                self.state.sessions[session_id] = capabilities
+            return self._reply(200, {"sessionId": session_id, "capabilities": capabilities})
+
+        if len(parts) >= 2 and parts[0] == "session":
+            session_id = parts[1]
+            with self.state.lock:
+                exists = session_id in self.state.sessions
+            if not exists:
+                return self._reply(404, {"error": "invalid session id", "message": session_id})
+            if len(parts) == 2 and method == "DELETE":
+                with self.state.lock:
+                    self.state.sessions.pop(session_id, None)
+                return self._reply(200, None)
+            if len(parts) == 2 and method == "GET":
+                return self._reply(200, self.state.sessions[session_id])
+            return self._reply(200, self._command_value(parts[2:], method, payload))
+
+        return self._reply(404, {"error": "unknown command", "message": self.path})
+
+    def _command_value(self, command, method, payload):
+        """Respuestas mínimas para los comandos que usan los helpers"""
+        if command == ["timeouts"] and method == "POST":
+            if "implicit" in payload:
+                with self.state.lock:
+                    self.state.implicit_wait = payload["implicit"] / 1000.0
+            return None
+        if command in (["element"], ["elements"]):
+            element = {"element-6066-11e4-a52e-4f735466cecf": uuid.uuid4().hex}
+            if command == ["element"]:
+                return element
+            with self.state.lock:
+                if self.state.present is None or (payload.get("using"), payload.get("value")) in self.state.present:
+                    return [element]
+                self.state.empty_finds.append(self.state.implicit_wait)
+            return []
+        if len(command) == 3 and command[0] == "element" and command[2] in ("value", "clear"):
+            with self.state.lock:
+                current = self.state.element_text.get(command[1], "")
+                self.state.element_text[command[1]] = current + payload.get("text", "") if command[2] == "value" else ""
+            return None
+        if len(command) == 4 and command[0] == "element" and command[2] == "attribute":
+            with self.state.lock:
+                return self.state.element_text.get(command[1], "")
+        if len(command) == 3 and command[0] == "element" and command[2] == "click":
+            with self.state.lock:
+                self.state.focused = command[1]
+            return None
+        if command == ["execute", "sync"]:
+            return self._execute_script(payload.get("script"), (payload.get("args") or [{}])[0])
+        if command == ["window", "rect"]:
+            return {"x": 0, "y": 0, "width": 1080, "height": 2400}
+        if command == ["source"]:
+            with self.state.lock:
+                return self.state.page_source
+        return None
+
+    def _execute_script(self, script, args):
+        if script == "mobile: type":
+            self.state.type_into_focused(args.get("text", ""))
+        elif script == "mobile: replaceElementValue":
+            with self.state.lock:
+                self.state.element_text[args.get("elementId")] = args.get("text", "")
+        return None
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+class FakeAppiumServer:
+    """Servidor en un hilo; ``url`` es lo que se pasa como APPIUM_SERVER"""
+
+    def __init__(self, port=0, latency_seconds=0.0):
+        self.state = FakeAppiumState(latency_seconds)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = self.state
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor Appium falso")
+    parser.add_argument("--port", type=int, default=4723)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeAppiumServer(args.port, args.latency_ms / 1000.0)
+    print(f"🧪 Appium falso escuchando en {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
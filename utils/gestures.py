@@ -0,0 +1,186 @@
+"""
+Gestos táctiles con la geometría del dispositivo cacheada
+El tamaño de pantalla y la densidad se piden una sola vez por sesión de Appium.
+Los gestos con nombre (swipe, fling, drawer, tap) se construyen como secuencias
+de acciones W3C precalculadas y se reutilizan entre llamadas.
+
+scroll_to busca un elemento con las mínimas idas y vueltas posibles:
+    1. ¿ya está en pantalla? (sin implicit wait)
+    2. UiScrollable.scrollIntoView: una sola petición, el scroll ocurre en el dispositivo
+    3. ``mobile: scrollGesture`` (cerrado en el servidor, sabe si queda contenido)
+    4. swipe W3C como último recurso
+"""
+
+from utils.locator_engine import ACCESSIBILITY_ID, ANDROID_UIAUTOMATOR
+
+# Márgenes de la zona de scroll para no tocar barras de estado y navegación
+SCROLL_MARGIN = 0.15
+# Duraciones (ms) de los gestos con nombre
+SWIPE_MS = 300
+FLING_MS = 80
+DRAWER_EDGE_DP = 8
+
+_DIRECTIONS = {
+    # dirección del contenido: de dónde a dónde se mueve el dedo (fracciones de pantalla)
+    "down": ((0.5, 1 - SCROLL_MARGIN), (0.5, SCROLL_MARGIN)),
+    "up": ((0.5, SCROLL_MARGIN), (0.5, 1 - SCROLL_MARGIN)),
+    "right": ((0.85, 0.5), (0.15, 0.5)),
+    "left": ((0.15, 0.5), (0.85, 0.5)),
+}
+
+
+def _pointer_sequence(points, duration_ms):
+    """Secuencia W3C de un dedo: bajar en el primer punto, mover por el resto y levantar"""
+    (x, y), rest = points[0], points[1:]
+    actions = [
+        {"type": "pointerMove", "duration": 0, "x": x, "y": y, "origin": "viewport"},
+        {"type": "pointerDown", "button": 0},
+        {"type": "pause", "duration": 50},
+    ]
+    step = duration_ms // max(1, len(rest))
+    for x, y in rest:
+        actions.append({"type": "pointerMove", "duration": step, "x": x, "y": y, "origin": "viewport"})
+    actions.append({"type": "pointerUp", "button": 0})
+    return {"type": "pointer", "id": "finger1", "parameters": {"pointerType": "touch"}, "actions": actions}
+
+
+class Gestures:
+    """Gestos con nombre sobre un driver de Appium"""
+
+    def __init__(self, driver, registry=None):
+        self.driver = driver
+        self.registry = registry
+        self._sequences = {}
+        self.scroll_gesture_supported = True
+
+    # -- Geometría -----------------------------------------------------------
+
+    def geometry(self):
+        """Ancho, alto y densidad de la pantalla, pedidos una vez por sesión"""
+        geometry = getattr(self.driver, "_gesture_geometry", None)
+        if geometry is None:
+            size = self.driver.get_window_size()
+            try:
+                density = int(self.driver.get_display_density())
+            except Exception:
+                density = 160
+            geometry = {"width": size["width"], "height": size["height"], "density": density}
+            self.driver._gesture_geometry = geometry
+        return geometry
+
+    def point(self, fx, fy):
+        geometry = self.geometry()
+        return int(geometry["width"] * fx), int(geometry["height"] * fy)
+
+    def dp(self, value):
+        return int(value * self.geometry()["density"] / 160)
+
+    # -- Secuencias W3C ------------------------------------------------------
+
+    def _sequence(self, name, builder):
+        if name not in self._sequences:
+            self._sequences[name] = builder()
+        return self._sequences[name]
+
+    def _perform(self, sequence):
+        self.driver.execute("actions", {"actions": [sequence]})
+
+    def tap_at(self, fx, fy):
+        """Tap en una posición relativa de la pantalla (0-1)"""
+        self._perform(self._sequence(f"tap {fx},{fy}", lambda: _pointer_sequence([self.point(fx, fy)] * 2, 0)))
+
+    def swipe(self, direction="down", duration_ms=SWIPE_MS):
+        """Desplaza el contenido en ``direction`` (down = ver lo que está más abajo)"""
+        start, end = _DIRECTIONS[direction]
+        self._perform(self._sequence(f"swipe {direction} {duration_ms}",
+                                     lambda: _pointer_sequence([self.point(*start), self.point(*end)], duration_ms)))
+
+    def fling(self, direction="down"):
+        self.swipe(direction, FLING_MS)
+
+    def swipe_drawer(self, side="left", open_drawer=True):
+        """Abre o cierra un drawer lateral arrastrando desde (o hacia) el borde"""
+        def build():
+            geometry = self.geometry()
+            edge = self.dp(DRAWER_EDGE_DP)
+            near = edge if side == "left" else geometry["width"] - edge
+            far = int(geometry["width"] * (0.8 if side == "left" else 0.2))
+            y = geometry["height"] // 2
+            points = [(near, y), (far, y)] if open_drawer else [(far, y), (near, y)]
+            return _pointer_sequence(points, SWIPE_MS)
+
+        self._perform(self._sequence(f"drawer {side} {open_drawer}", build))
+
+    # -- Scroll hasta un elemento -------------------------------------------
+
+    def scroll_to(self, name, direction="down", max_scrolls=10):
+        """Hace scroll hasta que el elemento lógico ``name`` está en pantalla y lo devuelve"""
+        element = self._find(name)
+        if element is not None:
+            return element
+
+        if direction == "down":
+            element = self._scroll_into_view(name)
+            if element is not None:
+                return element
+
+        for _ in range(max_scrolls):
+            can_scroll_more = self._scroll_once(direction)
+            element = self._find(name)
+            if element is not None:
+                return element
+            if not can_scroll_more:
+                break
+        return None
+
+    def _find(self, name):
+        return self.registry.find(name, timeout=0)
+
+    def _scroll_into_view(self, name):
+        """Un solo findElement con UiScrollable: el dispositivo hace todo el scroll.
+
+        Solo se usa el mejor candidato no XPath: cada intento fallido recorre la lista entera.
+        """
+        for strategy, value in self.registry.ordered_candidates(name):
+            if strategy == ACCESSIBILITY_ID:
+                selector = f'new UiSelector().description("{value}")'
+            elif strategy == ANDROID_UIAUTOMATOR:
+                selector = value
+            else:
+                continue
+            uiautomator = f"new UiScrollable(new UiSelector().scrollable(true)).scrollIntoView({selector})"
+            self.driver.implicitly_wait(0)
+            try:
+                elements = self.driver.find_elements(ANDROID_UIAUTOMATOR, uiautomator)
+            except Exception:
+                elements = []
+            finally:
+                self.driver.implicitly_wait(self.registry.default_timeout)
+            return elements[0] if elements else None
+        return None
+
+    def _scroll_once(self, direction):
+        """Un scroll; devuelve si queda contenido en esa dirección"""
+        if self.scroll_gesture_supported:
+            geometry = self.geometry()
+            top = int(geometry["height"] * SCROLL_MARGIN)
+            try:
+                return bool(self.driver.execute_script("mobile: scrollGesture", {
+                    "left": 0, "top": top, "width": geometry["width"], "height": geometry["height"] - 2 * top,
+                    "direction": direction, "percent": 0.75,
+                }))
+            except Exception:
+                self.scroll_gesture_supported = False
+        self.swipe(direction)
+        return True
+
+
+def get_gestures(driver, registry=None):
+    """Gestos de la sesión; la geometría y las secuencias se comparten entre tests"""
+    gestures = getattr(driver, "_gestures", None)
+    if gestures is None:
+        gestures = Gestures(driver, registry=registry)
+        driver._gestures = gestures
+    elif registry is not None:
+        gestures.registry = registry
+    return gestures
@@ -0,0 +1,179 @@
+"""
+Archivo de instantáneas de la jerarquía de UI
+Una instantánea es un solo ``page_source`` (una ida y vuelta) guardado comprimido
+y analizado en local, en vez de enumerar elementos y leer atributos uno a uno.
+
+    pytest_logs/<módulo>/hierarchy/<run_id>/<test>/<NN>_<paso>.xml.gz
+
+conftest.py toma una automáticamente cuando un test falla (setup o call) y
+ofrece el fixture ``hierarchy`` para pasos explícitos: ``hierarchy("tras login")``.
+Si el motor de localización tiene una instantánea reciente se reutiliza.
+
+Uso:
+    python -m utils.hierarchy_snapshots --module login list
+    python -m utils.hierarchy_snapshots show RUTA_O_REFERENCIA
+    python -m utils.hierarchy_snapshots diff REF_A REF_B
+
+Las referencias son rutas o prefijos relativos al directorio hierarchy del
+módulo: ``20250101_120000/test_07_flujo_productos/02`` o, por nombre de paso,
+``20250101_120000/test_07_flujo_productos/fallo``.
+"""
+
+import argparse
+import difflib
+import glob
+import gzip
+import os
+import re
+import xml.etree.ElementTree as ET
+
+SNAPSHOT_SUFFIX = ".xml.gz"
+# Atributos que identifican un nodo al listarlo o compararlo
+NODE_ATTRIBUTES = ("resource-id", "content-desc", "text", "hint")
+FLAGS = ("clickable", "checked", "enabled", "focused", "selected")
+
+
+def _slug(value):
+    return re.sub(r"[^\w.-]+", "_", value).strip("_")[:60] or "paso"
+
+
+class HierarchyArchive:
+    """Guarda instantáneas numeradas por test dentro de una ejecución"""
+
+    def __init__(self, logs_dir, run_id):
+        self.base_dir = os.path.join(logs_dir, "hierarchy")
+        self.run_dir = os.path.join(self.base_dir, run_id)
+        self._steps = {}
+
+    def capture(self, driver, test_name, step, refresh=True):
+        """Guarda la jerarquía actual y devuelve la ruta del archivo"""
+        engine = getattr(driver, "_locator_engine", None)
+        if engine is not None and engine.available:
+            source = engine.snapshot(refresh=refresh).source
+        else:
+            source = driver.page_source
+        return self.save(source, test_name, step)
+
+    def save(self, source, test_name, step):
+        index = self._steps.get(test_name, 0) + 1
+        self._steps[test_name] = index
+        test_dir = os.path.join(self.run_dir, _slug(test_name))
+        os.makedirs(test_dir, exist_ok=True)
+        path = os.path.join(test_dir, f"{index:02d}_{_slug(step)}{SNAPSHOT_SUFFIX}")
+        # Nivel 6: la jerarquía comprime ~10x y se escribe en milisegundos
+        with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(source)
+        return path
+
+
+def load(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return f.read()
+
+
+def resolve(reference, base_dir):
+    """Ruta de una instantánea a partir de una ruta o un prefijo bajo ``base_dir``"""
+    if os.path.isfile(reference):
+        return reference
+    matches = sorted(glob.glob(os.path.join(base_dir, glob.escape(reference) + "*" + SNAPSHOT_SUFFIX)))
+    if not matches:
+        # El último componente puede ser el nombre del paso sin número: .../test_07/fallo
+        folder, step = os.path.split(reference)
+        matches = sorted(glob.glob(os.path.join(base_dir, glob.escape(folder), f"*_{glob.escape(step)}*{SNAPSHOT_SUFFIX}")))
+    if not matches:
+        raise FileNotFoundError(f"No hay instantánea para '{reference}' en {base_dir}")
+    return matches[0]
+
+
+def _describe(node):
+    parts = [node.get("class") or node.tag]
+    for attribute in NODE_ATTRIBUTES:
+        value = node.get(attribute)
+        if value:
+            parts.append(f"{attribute}={value!r}")
+    parts.extend(flag for flag in FLAGS if node.get(flag) == "true")
+    return " ".join(parts)
+
+
+def outline(source):
+    """Una línea por nodo, indentada por profundidad (base del diff)"""
+    lines = []
+
+    def walk(node, depth):
+        lines.append("  " * depth + _describe(node))
+        for child in node:
+            walk(child, depth + 1)
+
+    walk(ET.fromstring(source.encode("utf-8")), 0)
+    return lines
+
+
+def summarize(source):
+    """Elementos con content-desc, clickeables y campos de texto de la jerarquía"""
+    root = ET.fromstring(source.encode("utf-8"))
+    nodes = list(root.iter())
+    return {
+        "content_desc": [n for n in nodes if n.get("content-desc")],
+        "clickable": [n for n in nodes if n.get("clickable") == "true"],
+        "edit_text": [n for n in nodes if (n.get("class") or n.tag) == "android.widget.EditText"],
+    }
+
+
+def print_summary(source):
+    summary = summarize(source)
+    print("\n📝 Elementos con texto:")
+    for i, node in enumerate(summary["content_desc"], 1):
+        print(f"  {i}. '{node.get('content-desc')}' (clickable: {node.get('clickable')})")
+
+    print("\n🎯 Elementos clickeables:")
+    for i, node in enumerate(summary["clickable"], 1):
+        print(f"  {i}. Texto: '{node.get('text') or '(sin texto)'}' | "
+              f"Desc: '{node.get('content-desc') or '(sin descripción)'}' | "
+              f"ID: '{node.get('resource-id') or '(sin ID)'}'")
+
+    print("\n✏️ Campos de texto:")
+    if not summary["edit_text"]:
+        print("  No se encontraron campos de texto")
+    for i, node in enumerate(summary["edit_text"], 1):
+        print(f"  {i}. Hint: '{node.get('hint') or '(sin hint)'}' | Texto actual: '{node.get('text') or '(sin texto)'}'")
+
+
+def diff(path_a, path_b, context=2):
+    """Diff unificado entre los esquemas de dos instantáneas"""
+    return list(difflib.unified_diff(outline(load(path_a)), outline(load(path_b)),
+                                     fromfile=path_a, tofile=path_b, n=context, lineterm=""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Instantáneas de la jerarquía de UI")
+    parser.add_argument("--module", default=os.getenv("PYTEST_MODULE_NAME", "general"))
+    parser.add_argument("--logs-dir", default="pytest_logs")
+    subparsers = parser.add_subparsers(dest="command")
+    list_parser = subparsers.add_parser("list", help="Listar instantáneas")
+    list_parser.add_argument("run", nargs="?", help="Solo esta ejecución")
+    show_parser = subparsers.add_parser("show", help="Resumen de una instantánea")
+    show_parser.add_argument("reference")
+    diff_parser = subparsers.add_parser("diff", help="Comparar dos pasos o ejecuciones")
+    diff_parser.add_argument("reference_a")
+    diff_parser.add_argument("reference_b")
+    diff_parser.add_argument("--context", type=int, default=2)
+    args = parser.parse_args()
+
+    base_dir = os.path.join(args.logs_dir, args.module, "hierarchy")
+    if args.command == "list":
+        pattern = os.path.join(base_dir, args.run or "*", "*", "*" + SNAPSHOT_SUFFIX)
+        for path in sorted(glob.glob(pattern)):
+            print(f"  {os.path.relpath(path, base_dir)[:-len(SNAPSHOT_SUFFIX)]}  ({os.path.getsize(path) / 1024:.1f} KB)")
+    elif args.command == "show":
+        path = resolve(args.reference, base_dir)
+        print(f"🌳 {path}")
+        print_summary(load(path))
+    elif args.command == "diff":
+        lines = diff(resolve(args.reference_a, base_dir), resolve(args.reference_b, base_dir), args.context)
+        print("\n".join(lines) if lines else "✅ Sin diferencias")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
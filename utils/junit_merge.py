@@ -0,0 +1,139 @@
+"""
+Combinación incremental de reportes JUnit para Xray
+Se hacen dos pasadas con iterparse: la primera decide qué testcase se conserva
+por clave de Xray (el más reciente) y la segunda escribe el resultado elemento
+a elemento, de modo que la memoria no crece con el tamaño de los reportes.
+"""
+
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import quoteattr
+
+# Propiedad que conftest.py añade a cada testcase con el marker xray
+XRAY_PROPERTY = "test_key"
+
+
+def _testcase_key(elem):
+    """Clave de deduplicación: issue de Xray o, si no tiene, clase::nombre"""
+    properties = elem.find("properties")
+    if properties is not None:
+        for prop in properties.iter("property"):
+            if prop.get("name") == XRAY_PROPERTY:
+                return prop.get("value")
+    return f"{elem.get('classname', '')}::{elem.get('name', '')}"
+
+
+def _testcase_outcome(elem):
+    for outcome in ("failure", "error", "skipped"):
+        if elem.find(outcome) is not None:
+            return outcome
+    return "passed"
+
+
+def _iter_with_depth(xml_file):
+    """iterparse que indica la profundidad y libera cada elemento al cerrarse"""
+    stack = []
+    for event, elem in ET.iterparse(xml_file, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            yield event, elem, len(stack) - 1, None
+        else:
+            stack.pop()
+            parent = stack[-1] if stack else None
+            yield event, elem, len(stack), parent
+
+
+def _scan(xml_files):
+    """Primera pasada: testcase más reciente por clave y totales por suite"""
+    latest = {}
+    for file_index, xml_file in enumerate(xml_files):
+        suite_index = -1
+        suite_timestamp = ""
+        case_index = 0
+        try:
+            for event, elem, _depth, parent in _iter_with_depth(xml_file):
+                if elem.tag == "testsuite" and event == "start":
+                    suite_index += 1
+                    suite_timestamp = elem.get("timestamp", "")
+                elif elem.tag == "testcase" and event == "end":
+                    entry = (suite_timestamp, file_index, suite_index, case_index,
+                             _testcase_outcome(elem), float(elem.get("time", 0) or 0))
+                    key = _testcase_key(elem)
+                    if key not in latest or entry[:4] >= latest[key][:4]:
+                        latest[key] = entry
+                    case_index += 1
+                    if parent is not None:
+                        parent.remove(elem)
+        except (ET.ParseError, OSError) as e:
+            print(f"⚠️ Error procesando {xml_file}: {e}")
+
+    kept = set()
+    suites = {}
+    for _ts, file_index, suite_index, case_index, outcome, duration in latest.values():
+        kept.add((file_index, case_index))
+        stats = suites.setdefault((file_index, suite_index),
+                                  {"tests": 0, "failures": 0, "errors": 0, "skipped": 0, "time": 0.0})
+        stats["tests"] += 1
+        stats["time"] += duration
+        if outcome == "failure":
+            stats["failures"] += 1
+        elif outcome == "error":
+            stats["errors"] += 1
+        elif outcome == "skipped":
+            stats["skipped"] += 1
+    return kept, suites
+
+
+def _attrs(attributes):
+    return "".join(f" {name}={quoteattr(str(value))}" for name, value in attributes.items())
+
+
+def merge_junit_reports(xml_files, output_path, name="CombinedAppiumTests"):
+    """Combina los reportes en ``output_path`` y devuelve los totales"""
+    kept, suites = _scan(xml_files)
+
+    totals = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0, "time": 0.0}
+    for stats in suites.values():
+        for field in totals:
+            totals[field] += stats[field]
+
+    with open(output_path, "w", encoding="utf-8") as out:
+        out.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        out.write(f"<testsuites{_attrs(dict(name=name, **totals))}>")
+
+        for file_index, xml_file in enumerate(xml_files):
+            suite_index = -1
+            suite_depth = None
+            writing = False
+            case_index = 0
+            try:
+                for event, elem, depth, parent in _iter_with_depth(xml_file):
+                    if elem.tag == "testsuite" and event == "start":
+                        suite_index += 1
+                        suite_depth = depth
+                        stats = suites.get((file_index, suite_index))
+                        writing = stats is not None
+                        if writing:
+                            attributes = dict(elem.attrib)
+                            attributes.update(stats)
+                            out.write(f"<testsuite{_attrs(attributes)}>")
+                    elif event == "end" and elem.tag == "testsuite" and depth == suite_depth:
+                        if writing:
+                            out.write("</testsuite>")
+                        writing = False
+                        suite_depth = None
+                    elif event == "end" and suite_depth is not None and depth == suite_depth + 1:
+                        if elem.tag == "testcase":
+                            if writing and (file_index, case_index) in kept:
+                                out.write(ET.tostring(elem, encoding="unicode"))
+                            case_index += 1
+                        elif writing:
+                            out.write(ET.tostring(elem, encoding="unicode"))
+                        parent.remove(elem)
+            except (ET.ParseError, OSError):
+                # Ya se avisó en la primera pasada
+                if writing:
+                    out.write("</testsuite>")
+
+        out.write("</testsuites>\n")
+
+    return totals
@@ -0,0 +1,236 @@
+"""
+Eventos en vivo de los procesos pytest
+Plugin de pytest (cargado desde conftest.py) que envía eventos JSON-lines
+(collect, start, finish, video, done) por un socket local al runner, y el
+colector del runner que los agrega en un panel con progreso por módulo y ETA.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+# Puerto en el que escucha el runner; si no está definido el plugin no emite nada
+EVENTS_PORT_ENV = "PYTEST_EVENTS_PORT"
+
+# Duración supuesta para tests sin historial
+DEFAULT_TEST_SECONDS = 30.0
+
+
+class EventEmitter:
+    """Envía eventos al runner sin bloquear los tests si el runner no responde"""
+
+    def __init__(self, port):
+        self.port = port
+        self.sock = None
+        self.lock = threading.Lock()
+
+    def _connect(self):
+        try:
+            self.sock = socket.create_connection(("127.0.0.1", self.port), timeout=1)
+        except OSError:
+            self.sock = None
+
+    def emit(self, event, **data):
+        data.update({
+            "event": event,
+            "module": os.getenv("PYTEST_MODULE_NAME", "general"),
+            "device": os.getenv("DEVICE_NAME"),
+            "time": time.time(),
+        })
+        line = (json.dumps(data, ensure_ascii=False) + "\n").encode("utf-8")
+        with self.lock:
+            if self.sock is None:
+                self._connect()
+            if self.sock is None:
+                return
+            try:
+                self.sock.sendall(line)
+            except OSError:
+                self.sock.close()
+                self.sock = None
+
+    def close(self):
+        with self.lock:
+            if self.sock is not None:
+                self.sock.close()
+                self.sock = None
+
+
+_emitter = None
+
+
+def get_emitter():
+    """Emisor del proceso actual, o None si el runner no pidió eventos"""
+    global _emitter
+    port = os.getenv(EVENTS_PORT_ENV)
+    if not port:
+        return None
+    if _emitter is None or _emitter.port != int(port):
+        if _emitter is not None:
+            _emitter.close()
+        _emitter = EventEmitter(int(port))
+    return _emitter
+
+
+def emit(event, **data):
+    """Emite un evento si hay un runner escuchando"""
+    emitter = get_emitter()
+    if emitter is not None:
+        emitter.emit(event, **data)
+
+
+# Hooks de pytest
+
+def pytest_collection_finish(session):
+    emit("collect", tests=[{"nodeid": item.nodeid, "name": item.name} for item in session.items])
+
+
+def pytest_runtest_logstart(nodeid, location):
+    emit("start", nodeid=nodeid)
+
+
+def pytest_runtest_logreport(report):
+    # Un test termina en la fase call, o antes si falla o se salta en setup
+    if report.when == "call" or (report.when == "setup" and not report.passed):
+        emit("finish", nodeid=report.nodeid, outcome=report.outcome, duration=report.duration)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    emit("done", exitstatus=int(exitstatus))
+    emitter = get_emitter()
+    if emitter is not None:
+        emitter.close()
+
+
+class _EventHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for raw_line in self.rfile:
+            try:
+                self.server.collector.handle_event(json.loads(raw_line))
+            except ValueError:
+                continue
+
+
+class _EventServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class LiveEventCollector:
+    """Lado del runner: recibe eventos de todos los procesos y muestra el progreso"""
+
+    def __init__(self, module_names, history=None, workers=1, refresh_seconds=5.0):
+        self.history = history
+        self.workers = max(1, workers)
+        self.refresh_seconds = refresh_seconds
+        self.lock = threading.Lock()
+        self.modules = {name: self._new_module_state() for name in module_names}
+        self.server = None
+        self._stop = threading.Event()
+        self._threads = []
+        self._last_render = None
+
+    @staticmethod
+    def _new_module_state():
+        return {"tests": {}, "running": None, "device": None, "done": False,
+                "passed": 0, "failed": 0, "skipped": 0, "started_at": None}
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self.server = _EventServer(("127.0.0.1", 0), _EventHandler)
+        self.server.collector = self
+        for target in (self.server.serve_forever, self._render_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        self.render(force=True)
+
+    def handle_event(self, event):
+        with self.lock:
+            module = self.modules.setdefault(event.get("module", "general"), self._new_module_state())
+            kind = event.get("event")
+            if event.get("device"):
+                module["device"] = event["device"]
+
+            if kind == "collect":
+                module["started_at"] = event["time"]
+                module["tests"] = {t["nodeid"]: {"name": t["name"], "outcome": None} for t in event["tests"]}
+            elif kind == "start":
+                module["running"] = event["nodeid"]
+            elif kind == "finish":
+                test = module["tests"].setdefault(event["nodeid"], {"name": event["nodeid"], "outcome": None})
+                test["outcome"] = event["outcome"]
+                module[event["outcome"] if event["outcome"] in ("passed", "failed", "skipped") else "failed"] += 1
+                if module["running"] == event["nodeid"]:
+                    module["running"] = None
+            elif kind == "video":
+                test = module["tests"].get(event.get("nodeid"))
+                if test is not None:
+                    test["video"] = event.get("path")
+            elif kind == "done":
+                module["done"] = True
+                module["running"] = None
+
+    def _test_estimate(self, module_name, test_name):
+        if self.history is None:
+            return DEFAULT_TEST_SECONDS
+        return self.history.test_estimate_by_name(module_name, test_name, DEFAULT_TEST_SECONDS)
+
+    def _remaining_seconds(self, module_name, module):
+        if module["done"]:
+            return 0.0
+        if not module["tests"]:
+            # Aún no ha empezado: se usa la estimación del módulo completo
+            if self.history is None:
+                return DEFAULT_TEST_SECONDS
+            return self.history.module_estimate(module_name)
+        return sum(self._test_estimate(module_name, t["name"])
+                   for t in module["tests"].values() if t["outcome"] is None)
+
+    def eta_seconds(self):
+        with self.lock:
+            remaining = sum(self._remaining_seconds(name, module) for name, module in self.modules.items())
+        return remaining / self.workers
+
+    def render(self, force=False):
+        """Imprime el panel si cambió desde la última vez"""
+        with self.lock:
+            lines = []
+            for name, module in self.modules.items():
+                total = len(module["tests"])
+                finished = module["passed"] + module["failed"] + module["skipped"]
+                if module["done"]:
+                    state = "🏁"
+                elif module["started_at"]:
+                    state = "▶️"
+                else:
+                    state = "⏳"
+                device = f" [{module['device']}]" if module["device"] else ""
+                running = ""
+                if module["running"]:
+                    running = f" → {module['running'].split('::')[-1]}"
+                lines.append(f"  {state} {name}{device}: {finished}/{total or '?'} "
+                             f"✅{module['passed']} ❌{module['failed']} ⏭️{module['skipped']}{running}")
+        eta = self.eta_seconds()
+        render = "\n".join(lines)
+        if not force and render == self._last_render:
+            return
+        self._last_render = render
+        print(f"\n📡 PROGRESO EN VIVO (ETA ~{eta:.0f}s)\n{render}", flush=True)
+
+    def _render_loop(self):
+        while not self._stop.wait(self.refresh_seconds):
+            self.render()
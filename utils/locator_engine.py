@@ -0,0 +1,180 @@
+"""
+Motor de localización sobre una instantánea de page_source
+En vez de probar cada XPath candidato en el dispositivo (cada fallo es una ida
+y vuelta, un volcado completo de la jerarquía de UiAutomator2 y hasta 5 s de
+implicit wait), se pide page_source una vez, se evalúan todos los candidatos
+localmente con lxml y solo el ganador se resuelve en el dispositivo.
+
+La instantánea se invalida sola tras cualquier comando que pueda cambiar la
+pantalla (click, send_keys, back, gestos...) y caduca tras ``max_age`` segundos.
+Sin lxml instalado se recurre a búsquedas en el dispositivo con implicit wait 0.
+"""
+
+import time
+
+try:
+    from lxml import etree
+except ImportError:  # lxml es opcional
+    etree = None
+
+# Comandos que no cambian la pantalla; cualquier otro invalida la instantánea
+READ_ONLY_COMMANDS = {
+    "findElement", "findElements", "findChildElement", "findChildElements",
+    "getPageSource", "getElementAttribute", "getElementProperty", "getElementText",
+    "getElementTagName", "getElementRect", "getElementLocation", "getElementSize",
+    "isElementDisplayed", "isElementEnabled", "isElementSelected",
+    "getWindowRect", "getWindowSize", "getCurrentWindowSize", "screenshot", "elementScreenshot",
+    "getCurrentPackage", "getCurrentActivity", "getCurrentContext", "getContexts",
+    "getTimeouts", "setTimeouts", "implicitlyWait", "getSettings", "getDisplayDensity",
+    "getSession", "status", "isKeyboardShown",
+}
+
+XPATH = "xpath"
+ACCESSIBILITY_ID = "accessibility id"
+ANDROID_UIAUTOMATOR = "-android uiautomator"
+
+
+class Snapshot:
+    """Jerarquía de la pantalla parseada una vez"""
+
+    def __init__(self, source):
+        self.source = source
+        self.taken_at = time.monotonic()
+        self.root = etree.fromstring(source.encode("utf-8")) if etree is not None else None
+
+    def age(self):
+        return time.monotonic() - self.taken_at
+
+    def xpath(self, expression):
+        try:
+            result = self.root.xpath(expression)
+        except etree.XPathError:
+            return []
+        return result if isinstance(result, list) else []
+
+    def count(self, attribute, value):
+        return len(self.root.xpath(f"//*[@{attribute}=$value]", value=value))
+
+
+class LocatorEngine:
+    """Localiza elementos evaluando XPaths sobre la instantánea de la pantalla"""
+
+    def __init__(self, driver, default_timeout=5.0, max_age=2.0, poll_interval=0.25):
+        self.driver = driver
+        self.default_timeout = default_timeout
+        self.max_age = max_age
+        self.poll_interval = poll_interval
+        # Implicit wait vigente en el driver; se sigue por los setTimeouts que pasan por execute
+        self.implicit_wait = default_timeout
+        self._snapshot = None
+        self.snapshots_taken = 0
+        self._original_execute = driver.execute
+        driver.execute = self._execute
+
+    @property
+    def available(self):
+        return etree is not None
+
+    def _execute(self, command, params=None):
+        if command == "setTimeouts" and params and "implicit" in params:
+            self.implicit_wait = params["implicit"] / 1000.0
+        if command not in READ_ONLY_COMMANDS:
+            self._snapshot = None
+        return self._original_execute(command, params)
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def snapshot(self, refresh=False):
+        """Instantánea vigente (o una nueva si cambió la pantalla o es vieja)"""
+        if refresh or self._snapshot is None or self._snapshot.age() > self.max_age:
+            self._snapshot = Snapshot(self.driver.page_source)
+            self.snapshots_taken += 1
+        return self._snapshot
+
+    def first_present(self, xpaths, timeout=0):
+        """Primer XPath con coincidencias en la pantalla, sin tocar el dispositivo"""
+        if not self.available:
+            return self._first_present_on_device(xpaths, timeout)
+
+        deadline = time.monotonic() + timeout
+        refresh = False
+        while True:
+            snapshot = self.snapshot(refresh=refresh)
+            for xpath in xpaths:
+                if snapshot.xpath(xpath):
+                    return xpath
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+            refresh = True
+
+    def find_first(self, xpaths, timeout=None):
+        """Devuelve (elemento, xpath) del primer candidato presente o (None, None).
+
+        Se reintenta con instantáneas nuevas hasta ``timeout`` segundos (por
+        defecto el implicit wait del entorno) mientras la pantalla termina de cargar.
+        """
+        if timeout is None:
+            timeout = self.default_timeout
+        xpath = self.first_present(xpaths, timeout)
+        if xpath is None:
+            return None, None
+        if not self.available:
+            return self._find_on_device(XPATH, xpath), xpath
+        return self._resolve(xpath), xpath
+
+    def _resolve(self, xpath):
+        """Busca en el dispositivo el nodo ganador con el locator más barato posible"""
+        snapshot = self._snapshot
+        node = snapshot.xpath(xpath)[0]
+        element = None
+        if isinstance(node, etree._Element):
+            resource_id = node.get("resource-id")
+            content_desc = node.get("content-desc")
+            if resource_id and snapshot.count("resource-id", resource_id) == 1:
+                element = self._find_on_device(ANDROID_UIAUTOMATOR, f'new UiSelector().resourceId("{resource_id}")')
+            elif content_desc and snapshot.count("content-desc", content_desc) == 1:
+                element = self._find_on_device(ACCESSIBILITY_ID, content_desc)
+        return element or self._find_on_device(XPATH, xpath)
+
+    def _find_on_device(self, using, value):
+        elements = self._with_implicit_wait(0, self.driver.find_elements, using, value)
+        return elements[0] if elements else None
+
+    def _first_present_on_device(self, xpaths, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            for xpath in xpaths:
+                if self._find_on_device(XPATH, xpath) is not None:
+                    return xpath
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def _with_implicit_wait(self, seconds, function, *args):
+        """Ejecuta con ``seconds`` de implicit wait y deja el valor que tenía quien llamó"""
+        previous = self.implicit_wait
+        if previous == seconds:
+            # p. ej. el registro de localizadores ya lo puso a 0 para toda la búsqueda
+            return function(*args)
+        self.driver.implicitly_wait(seconds)
+        try:
+            return function(*args)
+        finally:
+            self.driver.implicitly_wait(previous)
+
+    def nodes(self, xpath):
+        """Nodos lxml que coinciden con el XPath en la instantánea vigente"""
+        if not self.available:
+            return []
+        return self.snapshot().xpath(xpath)
+
+
+def get_locator_engine(driver, default_timeout=5.0):
+    """Un motor por driver (se instala una sola vez sobre driver.execute)"""
+    engine = getattr(driver, "_locator_engine", None)
+    if engine is None:
+        engine = LocatorEngine(driver, default_timeout=default_timeout)
+        driver._locator_engine = engine
+    return engine
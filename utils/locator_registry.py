@@ -0,0 +1,274 @@
+"""
+Registro central de localizadores
+Cada elemento lógico de la app ('Registrarme', 'Continuar', 'Salir'...) tiene
+varias estrategias candidatas. El orden no se escribe a mano: se prueban primero
+las que históricamente encontraron el elemento más rápido, según las
+estadísticas de aciertos/fallos y latencia guardadas en disco entre ejecuciones.
+
+Sin historial se prefieren las estrategias baratas (accessibility id y
+UiAutomator) a XPath. Los candidatos se prueban con implicit wait 0 (fijado una
+vez por búsqueda, no por candidato), y los XPath se evalúan sobre la instantánea
+de locator_engine cuando hay lxml.
+
+Cada búsqueda registra como mucho un resultado por candidato: el acierto del
+ganador y un fallo para los que se probaron antes que él en la última pasada.
+Las pasadas en las que la pantalla aún no había cargado y las búsquedas que no
+encuentran nada no cuentan: medirían la carga de la pantalla, no el localizador.
+
+Ver estadísticas:
+    python -m utils.locator_registry
+"""
+
+import argparse
+import json
+import os
+import time
+
+from utils.locator_engine import ACCESSIBILITY_ID, ANDROID_UIAUTOMATOR, XPATH
+from utils.timeout_budgets import LOCATOR
+
+DEFAULT_STATS_PATH = os.path.join("pytest_reports", ".cache", "locator_stats.json")
+
+# Coste relativo de cada estrategia cuando todavía no hay historial
+STRATEGY_COST = {
+    ACCESSIBILITY_ID: 0,
+    ANDROID_UIAUTOMATOR: 1,
+    XPATH: 2,
+}
+
+# Elementos lógicos de la app y sus estrategias candidatas (sin orden de preferencia)
+LOCATORS = {
+    "Registrarme": [
+        (ACCESSIBILITY_ID, "Registrarme"),
+        (ANDROID_UIAUTOMATOR, 'new UiSelector().description("Registrarme")'),
+        (XPATH, "//*[@content-desc='Registrarme']"),
+    ],
+    "Iniciar sesión": [
+        (ACCESSIBILITY_ID, "Iniciar sesión"),
+        (ANDROID_UIAUTOMATOR, 'new UiSelector().descriptionContains("Iniciar")'),
+        (XPATH, "//*[contains(@content-desc,'Iniciar')]"),
+    ],
+    "Correo empresarial": [
+        (XPATH, "//*[@hint='Correo empresarial']"),
+        (XPATH, "//*[contains(@hint,'Correo')]"),
+        (ANDROID_UIAUTOMATOR, 'new UiSelector().className("android.widget.EditText").instance(0)'),
+    ],
+    "Continuar": [
+        (ACCESSIBILITY_ID, "Continuar"),
+        (ANDROID_UIAUTOMATOR, 'new UiSelector().descriptionContains("Continuar")'),
+        (XPATH, "//*[contains(@content-desc,'Continuar')]"),
+    ],
+    "Usuario y contraseña": [
+        (ACCESSIBILITY_ID, "Usuario y contraseña"),
+        (ANDROID_UIAUTOMATOR, 'new UiSelector().descriptionContains("Usuario")'),
+        (XPATH, "//*[contains(@content-desc,'contraseña')]"),
+    ],
+    "Campo usuario": [
+        (XPATH, "//*[@hint='Usuario']"),
+        (XPATH, "//*[contains(@hint,'usuario')]"),
+        (ANDROID_UIAUTOMATOR, 'new UiSelector().className("android.widget.EditText").instance(0)'),
+    ],
+    "Campo contraseña": [
+        (XPATH, "//*[@hint='Contraseña']"),
+        (XPATH, "//*[contains(@hint,'contraseña')]"),
+        (ANDROID_UIAUTOMATOR, 'new UiSelector().className("android.widget.EditText").instance(1)'),
+    ],
+    "Siguiente": [
+        (ACCESSIBILITY_ID, "Siguiente"),
+        (ANDROID_UIAUTOMATOR, 'new UiSelector().descriptionContains("Siguiente")'),
+        (XPATH, "//*[@clickable='true' and ("
+                "contains(@text,'iguiente') or contains(@content-desc,'iguiente') or "
+                "contains(@text,'ontinuar') or contains(@content-desc,'ontinuar') or "
+                "contains(@text,'ogin') or contains(@text,'ntrar'))]"),
+        (XPATH, "(//*[@clickable='true'])[last()]"),
+    ],
+    "Ver productos": [
+        (ACCESSIBILITY_ID, "Ver productos"),
+        (ANDROID_UIAUTOMATOR, 'new UiSelector().descriptionContains("productos")'),
+        (XPATH, "//*[contains(@content-desc,'Ver productos')]"),
+    ],
+    "PDC": [
+        (ANDROID_UIAUTOMATOR, 'new UiSelector().text("PDC")'),
+        (ACCESSIBILITY_ID, "PDC"),
+        (XPATH, "//*[contains(@text,'PDC') or contains(@content-desc,'PDC')]"),
+    ],
+    "FFA": [
+        (ACCESSIBILITY_ID, "FFA"),
+        (ANDROID_UIAUTOMATOR, 'new UiSelector().textContains("FFA")'),
+        (XPATH, "//*[contains(@text,'FFA')]"),
+    ],
+    "Menú": [
+        (ACCESSIBILITY_ID, "Menú"),
+        (ANDROID_UIAUTOMATOR, 'new UiSelector().text("Menú")'),
+        (XPATH, "//*[contains(@text,'Menú') or contains(@content-desc,'Menú')]"),
+    ],
+    "Salir": [
+        (ACCESSIBILITY_ID, "Salir"),
+        (ANDROID_UIAUTOMATOR, 'new UiSelector().text("Salir")'),
+        (XPATH, "//*[contains(@text,'Salir')]"),
+    ],
+}
+
+
+def candidate_key(strategy, value):
+    return f"{strategy}={value}"
+
+
+class LocatorStats:
+    """Aciertos, fallos y latencia por (elemento, estrategia), persistidos en JSON"""
+
+    def __init__(self, path=DEFAULT_STATS_PATH):
+        self.path = path
+        self.data = self._load()
+        # Solo lo registrado en este proceso; se suma a lo que haya en disco al guardar
+        self._pending = {}
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, name, key):
+        return self.data.get(name, {}).get(key, {"hits": 0, "misses": 0, "hit_seconds": 0.0})
+
+    def record(self, name, key, hit, seconds):
+        for target in (self.data, self._pending):
+            entry = target.setdefault(name, {}).setdefault(key, {"hits": 0, "misses": 0, "hit_seconds": 0.0})
+            if hit:
+                entry["hits"] += 1
+                entry["hit_seconds"] += seconds
+            else:
+                entry["misses"] += 1
+
+    def save(self):
+        """Suma lo pendiente a la versión en disco (otros workers pueden haber escrito)"""
+        if not self._pending:
+            return
+        merged = self._load()
+        for name, entries in self._pending.items():
+            for key, delta in entries.items():
+                entry = merged.setdefault(name, {}).setdefault(key, {"hits": 0, "misses": 0, "hit_seconds": 0.0})
+                for field in ("hits", "misses", "hit_seconds"):
+                    entry[field] += delta[field]
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(merged, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self.data = merged
+        self._pending = {}
+
+
+class LocatorRegistry:
+    """Busca elementos lógicos probando sus estrategias en el orden aprendido"""
+
+    def __init__(self, driver, stats=None, locators=None, engine=None, default_timeout=5.0, poll_interval=0.25,
+                 budgets=None):
+        self.driver = driver
+        self.stats = stats if stats is not None else LocatorStats()
+        self.budgets = budgets
+        self.locators = locators if locators is not None else LOCATORS
+        self.engine = engine
+        self.default_timeout = default_timeout
+        self.poll_interval = poll_interval
+
+    def ordered_candidates(self, name):
+        """Primero los que acertaron (por latencia media), luego los no probados y al final los que solo fallaron"""
+        if name not in self.locators:
+            raise KeyError(f"Elemento lógico no registrado: {name}")
+
+        def sort_key(indexed):
+            index, (strategy, value) = indexed
+            entry = self.stats.get(name, candidate_key(strategy, value))
+            if entry["hits"]:
+                return 0, entry["hit_seconds"] / entry["hits"], -entry["hits"], index
+            tier = 2 if entry["misses"] else 1
+            return tier, STRATEGY_COST.get(strategy, len(STRATEGY_COST)), 0, index
+
+        return [candidate for _index, candidate in sorted(enumerate(self.locators[name]), key=sort_key)]
+
+    def find(self, name, timeout=None):
+        """Devuelve el elemento o None si ninguna estrategia lo encuentra antes del timeout"""
+        element, _strategy = self.find_with_strategy(name, timeout)
+        return element
+
+    def find_with_strategy(self, name, timeout=None):
+        """Como find, pero devuelve también la estrategia ganadora: (elemento, 'estrategia=valor')"""
+        learn = timeout is None and self.budgets is not None
+        if timeout is None:
+            # Presupuesto aprendido para este elemento (o el timeout por defecto sin historial)
+            timeout = self.budgets.budget(LOCATOR, name, self.default_timeout) if learn else self.default_timeout
+        candidates = self.ordered_candidates(name)
+        started = time.perf_counter()
+        deadline = time.monotonic() + timeout
+        # El implicit wait se pone a 0 una sola vez por búsqueda (cada cambio es una
+        # ida y vuelta) y solo si algún candidato llega al dispositivo
+        zeroed = False
+        try:
+            while True:
+                missed = []
+                for strategy, value in candidates:
+                    key = candidate_key(strategy, value)
+                    start = time.perf_counter()
+                    if self._on_snapshot(strategy) and self.engine.first_present([value]) is None:
+                        # Descartado sobre la instantánea, sin tocar el dispositivo
+                        element = None
+                    else:
+                        if not zeroed:
+                            self.driver.implicitly_wait(0)
+                            zeroed = True
+                        element = self._try(strategy, value)
+                    if element is None:
+                        missed.append(key)
+                        continue
+                    for missed_key in missed:
+                        self.stats.record(name, missed_key, False, 0.0)
+                    self.stats.record(name, key, True, time.perf_counter() - start)
+                    if learn:
+                        self.budgets.record(LOCATOR, name, time.perf_counter() - started)
+                    return element, key
+                if time.monotonic() >= deadline:
+                    return None, None
+                time.sleep(self.poll_interval)
+                if self.engine is not None:
+                    self.engine.invalidate()
+        finally:
+            if zeroed:
+                self.driver.implicitly_wait(self.default_timeout)
+
+    def _on_snapshot(self, strategy):
+        return strategy == XPATH and self.engine is not None and self.engine.available
+
+    def _try(self, strategy, value):
+        """Elemento del candidato o None; se llama con el implicit wait ya a 0"""
+        if self._on_snapshot(strategy):
+            # Presente en la instantánea: solo falta resolver el nodo en el dispositivo
+            element, _xpath = self.engine.find_first([value], timeout=0)
+            return element
+        elements = self.driver.find_elements(strategy, value)
+        return elements[0] if elements else None
+
+
+def print_stats(path=DEFAULT_STATS_PATH):
+    stats = LocatorStats(path)
+    if not stats.data:
+        print(f"📭 No hay estadísticas de localizadores en {path}")
+        return
+    for name in sorted(stats.data):
+        print(f"\n🔎 {name}")
+        for key, entry in sorted(stats.data[name].items(), key=lambda item: -item[1]["hits"]):
+            mean = entry["hit_seconds"] / entry["hits"] if entry["hits"] else 0.0
+            print(f"  {entry['hits']:>5} aciertos {entry['misses']:>5} fallos {mean * 1000:>8.0f} ms  {key}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estadísticas del registro de localizadores")
+    parser.add_argument("--stats-path", default=DEFAULT_STATS_PATH)
+    args = parser.parse_args()
+    print_stats(args.stats_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Worker persistente de pytest
+Un proceso de larga duración recibe módulos por una conexión local y ejecuta
+pytest.main para cada uno, evitando pagar en cada módulo el arranque de Python,
+los imports de appium/selenium, la verificación del entorno y la sesión de Appium.
+
+Uso como benchmark:
+    python -m utils.pytest_worker --benchmark --module tests/login --repeat 5
+"""
+
+import argparse
+import os
+import secrets
+import statistics
+import subprocess
+import sys
+import time
+from multiprocessing.connection import Client, Listener
+
+# Variable que indica a conftest.py que mantenga la sesión de Appium entre módulos
+PERSISTENT_WORKER_ENV = "PYTEST_PERSISTENT_WORKER"
+
+
+def _redirect_output(log_file):
+    """Redirige stdout/stderr a nivel de descriptor y devuelve cómo restaurarlos"""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = (os.dup(1), os.dup(2))
+    log = open(log_file, "w", encoding="utf-8")
+    os.dup2(log.fileno(), 1)
+    os.dup2(log.fileno(), 2)
+
+    def restore():
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        os.close(saved[0])
+        os.close(saved[1])
+        log.close()
+
+    return restore
+
+
+def _close_warm_sessions():
+    """Cierra las sesiones de Appium que conftest.py dejó abiertas"""
+    conftest = sys.modules.get("conftest")
+    if conftest is not None and hasattr(conftest, "close_warm_drivers"):
+        conftest.close_warm_drivers()
+
+
+def run_job(job):
+    """Ejecuta un módulo con pytest.main dentro de este proceso"""
+    import pytest
+
+    os.environ.update(job.get("env", {}))
+    restore = _redirect_output(job["log_file"]) if job.get("log_file") else None
+    start = time.monotonic()
+    try:
+        returncode = int(pytest.main(list(job["args"])))
+    except SystemExit as e:
+        returncode = e.code if isinstance(e.code, int) else 1
+    finally:
+        if restore:
+            restore()
+    return {"returncode": returncode, "duration": time.monotonic() - start}
+
+
+def serve(address, authkey):
+    """Bucle del worker: se conecta al runner y procesa trabajos hasta recibir None"""
+    os.environ[PERSISTENT_WORKER_ENV] = "1"
+    with Client(address, authkey=authkey) as conn:
+        try:
+            while True:
+                job = conn.recv()
+                if job is None:
+                    break
+                conn.send(run_job(job))
+        except EOFError:
+            pass
+        finally:
+            _close_warm_sessions()
+
+
+class PersistentWorker:
+    """Lado del runner: lanza el worker y le envía trabajos de forma síncrona"""
+
+    def __init__(self, env=None):
+        self.env = dict(env or os.environ)
+        self.process = None
+        self.conn = None
+
+    def start(self):
+        authkey = secrets.token_bytes(16)
+        listener = Listener(("127.0.0.1", 0), authkey=authkey)
+        host, port = listener.address
+
+        env = dict(self.env)
+        env[PERSISTENT_WORKER_ENV] = "1"
+        env["PYTEST_WORKER_AUTHKEY"] = authkey.hex()
+        cmd = [sys.executable, "-m", "utils.pytest_worker", "--serve", f"{host}:{port}"]
+        self.process = subprocess.Popen(cmd, env=env)
+        try:
+            self.conn = listener.accept()
+        finally:
+            listener.close()
+        return self
+
+    def run(self, pytest_args, env=None, log_file=None):
+        """Ejecuta un módulo en el worker y devuelve su código de salida"""
+        if self.conn is None:
+            self.start()
+        self.conn.send({"args": list(pytest_args), "env": dict(env or {}), "log_file": log_file})
+        try:
+            return self.conn.recv()["returncode"]
+        except EOFError:
+            # El worker murió (p. ej. pytest.exit en la preparación): se relanza en el siguiente
+            self.conn = None
+            self.process.wait()
+            return self.process.returncode or 1
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+            self.conn.close()
+            self.conn = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=60)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+
+
+def benchmark(module_path, repeat):
+    """Compara el coste por módulo de un proceso nuevo frente al worker persistente.
+
+    Usa --collect-only para medir arranque, imports, plugins y colección sin
+    necesitar un dispositivo; la sesión de Appium reutilizada es un ahorro adicional.
+    """
+    pytest_args = [module_path, "--collect-only", "-q", "-p", "no:cacheprovider"]
+
+    subprocess_times = []
+    for _ in range(repeat):
+        start = time.monotonic()
+        subprocess.run([sys.executable, "-m", "pytest"] + pytest_args,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        subprocess_times.append(time.monotonic() - start)
+
+    worker = PersistentWorker()
+    start = time.monotonic()
+    worker.start()
+    startup = time.monotonic() - start
+    worker_times = []
+    log_file = os.devnull
+    try:
+        for _ in range(repeat):
+            start = time.monotonic()
+            worker.run(pytest_args, log_file=log_file)
+            worker_times.append(time.monotonic() - start)
+    finally:
+        worker.close()
+
+    print(f"📊 Benchmark de overhead por módulo ({module_path}, {repeat} repeticiones)")
+    print(f"  Proceso nuevo por módulo: media {statistics.mean(subprocess_times):.3f}s "
+          f"| mediana {statistics.median(subprocess_times):.3f}s")
+    print(f"  Worker persistente:       media {statistics.mean(worker_times):.3f}s "
+          f"| mediana {statistics.median(worker_times):.3f}s (arranque único {startup:.3f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker persistente de pytest")
+    parser.add_argument("--serve", help="Dirección host:puerto del runner")
+    parser.add_argument("--benchmark", action="store_true", help="Comparar overhead por módulo")
+    parser.add_argument("--module", default="tests/login", help="Módulo usado en el benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones del benchmark")
+    args = parser.parse_args()
+
+    if args.serve:
+        host, _, port = args.serve.rpartition(":")
+        serve((host, int(port)), bytes.fromhex(os.environ["PYTEST_WORKER_AUTHKEY"]))
+    elif args.benchmark:
+        benchmark(args.module, args.repeat)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
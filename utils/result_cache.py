@@ -0,0 +1,99 @@
+"""
+Caché de resultados por contenido para saltar módulos sin cambios
+La clave combina el hash del APK, el de las fuentes del módulo (más conftest.py
+y utils/) y el perfil del dispositivo. Solo se guardan ejecuciones exitosas.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+# Archivos compartidos que afectan a todos los módulos
+SHARED_SOURCES = ["conftest.py", "pytest.ini", "utils"]
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """SHA-256 de un archivo leído por bloques (el APK puede pesar cientos de MB)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _python_sources(path):
+    """Archivos .py de una ruta (archivo o directorio) en orden estable"""
+    if os.path.isfile(path):
+        return [path]
+    sources = []
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        sources.extend(os.path.join(root, name) for name in sorted(files) if name.endswith((".py", ".ini")))
+    return sources
+
+
+class ResultCache:
+    """Índice clave -> reporte JUnit de la última ejecución exitosa"""
+
+    def __init__(self, cache_dir=os.path.join("pytest_reports", ".cache")):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self._apk_hashes = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Índice de caché ilegible, se ignora: {e}")
+            return {}
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def apk_hash(self, apk_path):
+        if apk_path not in self._apk_hashes:
+            self._apk_hashes[apk_path] = file_sha256(apk_path)
+        return self._apk_hashes[apk_path]
+
+    def module_key(self, module_path, apk_path, device_profile):
+        """Clave del módulo: APK + fuentes del módulo + fuentes compartidas + dispositivo"""
+        digest = hashlib.sha256()
+        digest.update(f"apk:{self.apk_hash(apk_path)}\n".encode())
+        digest.update(f"device:{device_profile}\n".encode())
+
+        for source_root in [module_path] + SHARED_SOURCES:
+            if not os.path.exists(source_root):
+                continue
+            for source in _python_sources(source_root):
+                digest.update(f"file:{source.replace(os.sep, '/')}\n".encode())
+                digest.update(file_sha256(source).encode())
+
+        return digest.hexdigest()
+
+    def lookup(self, key):
+        """Ruta del XML cacheado si la clave ya pasó, o None"""
+        entry = self.index.get(key)
+        if entry and os.path.exists(entry["xml"]):
+            return entry
+        return None
+
+    def store(self, key, module_name, xml_report):
+        """Guarda una copia del XML de una ejecución exitosa"""
+        cached_xml = os.path.join(self.cache_dir, f"{key}.xml")
+        shutil.copyfile(xml_report, cached_xml)
+        self.index[key] = {
+            "module": module_name,
+            "xml": cached_xml,
+            "stored_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        self._save_index()
@@ -0,0 +1,162 @@
+"""
+Historial de ejecuciones en SQLite
+Cada testcase de cada ejecución se guarda con su módulo, dispositivo, hash del APK,
+duración y resultado, para consultar percentiles y regresiones sin releer XML.
+"""
+
+import math
+import os
+import sqlite3
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+from utils.driver_instrumentation import CATEGORIES
+from utils.junit_merge import XRAY_PROPERTY
+
+# Columnas del desglose de tiempo (propiedades time_<categoría> del JUnit XML)
+BREAKDOWN_COLUMNS = [f"time_{category}" for category in CATEGORIES]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      TEXT PRIMARY KEY,
+    recorded_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS testcases (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id      TEXT NOT NULL REFERENCES runs(run_id),
+    module      TEXT NOT NULL,
+    test_id     TEXT NOT NULL,
+    classname   TEXT,
+    name        TEXT,
+    xray_key    TEXT,
+    device      TEXT,
+    apk_hash    TEXT,
+    duration    REAL NOT NULL,
+    outcome     TEXT NOT NULL,
+    started_at  TEXT,
+    recorded_at TEXT NOT NULL,
+    UNIQUE (run_id, test_id) ON CONFLICT REPLACE
+);
+
+CREATE INDEX IF NOT EXISTS idx_testcases_test_run ON testcases (test_id, run_id);
+CREATE INDEX IF NOT EXISTS idx_testcases_run ON testcases (run_id);
+CREATE INDEX IF NOT EXISTS idx_testcases_xray ON testcases (xray_key);
+"""
+
+
+def percentile(values, fraction):
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    if not values:
+        return None
+    rank = math.ceil(fraction * len(values))
+    return values[max(0, min(len(values), rank) - 1)]
+
+
+class RunHistory:
+    """Acceso al historial de testcases guardado en pytest_reports/history.sqlite"""
+
+    def __init__(self, db_path=os.path.join("pytest_reports", "history.sqlite")):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Añade las columnas nuevas a bases creadas por versiones anteriores"""
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(testcases)")}
+        with self.conn:
+            for column in BREAKDOWN_COLUMNS:
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE testcases ADD COLUMN {column} REAL")
+
+    def close(self):
+        self.conn.close()
+
+    def record_junit(self, xml_path, run_id, module, device=None, apk_hash=None):
+        """Guarda todos los testcases de un reporte JUnit; devuelve cuántos se guardaron"""
+        now = datetime.now().isoformat(timespec="seconds")
+        rows = []
+        suite_timestamp = None
+
+        for event, elem in ET.iterparse(xml_path, events=("start", "end")):
+            if event == "start" and elem.tag == "testsuite":
+                suite_timestamp = elem.get("timestamp")
+            elif event == "end" and elem.tag == "testcase":
+                rows.append(self._testcase_row(elem, run_id, module, device, apk_hash, suite_timestamp, now))
+                elem.clear()
+
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO runs (run_id, recorded_at) VALUES (?, ?)", (run_id, now))
+            columns = ("run_id, module, test_id, classname, name, xray_key, device, apk_hash,"
+                       " duration, outcome, started_at, recorded_at, " + ", ".join(BREAKDOWN_COLUMNS))
+            placeholders = ", ".join("?" * (12 + len(BREAKDOWN_COLUMNS)))
+            self.conn.executemany(f"INSERT INTO testcases ({columns}) VALUES ({placeholders})", rows)
+        return len(rows)
+
+    def _testcase_row(self, elem, run_id, module, device, apk_hash, started_at, recorded_at):
+        classname = elem.get("classname", "")
+        name = elem.get("name", "")
+
+        xray_key = None
+        breakdown = dict.fromkeys(BREAKDOWN_COLUMNS)
+        properties = elem.find("properties")
+        if properties is not None:
+            for prop in properties.iter("property"):
+                if prop.get("name") == XRAY_PROPERTY:
+                    xray_key = prop.get("value")
+                elif prop.get("name") in breakdown:
+                    breakdown[prop.get("name")] = float(prop.get("value"))
+
+        outcome = "passed"
+        for candidate in ("failure", "error", "skipped"):
+            if elem.find(candidate) is not None:
+                outcome = candidate
+                break
+
+        return (run_id, module, f"{classname}::{name}", classname, name, xray_key, device, apk_hash,
+                float(elem.get("time", 0) or 0), outcome, started_at, recorded_at,
+                *(breakdown[column] for column in BREAKDOWN_COLUMNS))
+
+    def test_stats(self, run_id, last_n=10):
+        """Duración de cada test de ``run_id`` comparada con sus últimas ``last_n`` ejecuciones"""
+        current = self.conn.execute(
+            "SELECT module, test_id, xray_key, duration, outcome, " + ", ".join(BREAKDOWN_COLUMNS) +
+            " FROM testcases WHERE run_id = ? ORDER BY module, test_id",
+            (run_id,),
+        ).fetchall()
+
+        previous = {}
+        rows = self.conn.execute(
+            """
+            SELECT test_id, duration FROM (
+                SELECT t.test_id, t.duration,
+                       ROW_NUMBER() OVER (PARTITION BY t.test_id ORDER BY t.run_id DESC) AS position
+                FROM testcases t
+                WHERE t.run_id < ? AND t.outcome = 'passed'
+                  AND t.test_id IN (SELECT test_id FROM testcases WHERE run_id = ?)
+            ) WHERE position <= ?
+            """,
+            (run_id, run_id, last_n),
+        )
+        for test_id, duration in rows:
+            previous.setdefault(test_id, []).append(duration)
+
+        stats = []
+        for module, test_id, xray_key, duration, outcome, *breakdown in current:
+            history = sorted(previous.get(test_id, []))
+            p50 = percentile(history, 0.50)
+            stats.append({
+                'module': module,
+                'test_id': test_id,
+                'xray_key': xray_key,
+                'duration': duration,
+                'outcome': outcome,
+                'runs': len(history),
+                'p50': p50,
+                'p95': percentile(history, 0.95),
+                'regression': (duration / p50 - 1) if p50 else None,
+                'breakdown': dict(zip(CATEGORIES, breakdown)) if breakdown[0] is not None else None,
+            })
+        return stats
@@ -0,0 +1,193 @@
+"""
+Máquina de estados de pantallas de la app
+Cada pantalla se reconoce por unos pocos XPaths ancla evaluados sobre una sola
+instantánea de page_source (huella barata), y las transiciones entre pantallas
+se declaran como un grafo. ``navigate_to(pantalla)`` detecta la pantalla actual,
+calcula el camino más corto (BFS) y ejecuta las transiciones, comprobando la
+pantalla tras cada paso.
+
+Así un test puede declarar la pantalla en la que empieza
+(``@pytest.mark.screen("inicio")``) y ejecutarse solo, reordenado o en otro
+shard, sin repetir todo el flujo previo.
+"""
+
+from collections import deque
+
+# Anclas de cada pantalla; todas deben estar presentes. Si varias pantallas
+# coinciden gana la declarada más tarde (la más profunda del flujo).
+SCREENS = {
+    "bienvenida": [
+        "//*[@content-desc='Registrarme']",
+        "//*[contains(@content-desc,'Iniciar')]",
+    ],
+    "login_correo": [
+        "//*[contains(@hint,'Correo')]",
+    ],
+    "metodos_acceso": [
+        "//*[contains(@content-desc,'Usuario y contraseña')]",
+    ],
+    "usuario_contrasena": [
+        "//*[contains(@hint,'usuario') or contains(@hint,'Usuario')]",
+        "//*[contains(@hint,'contraseña') or contains(@hint,'Contraseña')]",
+    ],
+    # Cualquier pantalla con sesión iniciada y el botón de menú
+    "inicio": [
+        "//*[contains(@text,'Menú') or contains(@content-desc,'Menú')]",
+    ],
+    "productos": [
+        "//*[contains(@text,'PDC') or contains(@content-desc,'PDC')]",
+    ],
+    "pdc": [
+        "//*[contains(@text,'FFA') or @content-desc='FFA']",
+    ],
+    "menu": [
+        "//*[contains(@text,'Salir') or @content-desc='Salir']",
+    ],
+}
+
+# (origen, destino, acción, argumento)
+TRANSITIONS = [
+    ("bienvenida", "login_correo", "click", "Iniciar sesión"),
+    ("login_correo", "metodos_acceso", "enter_email", None),
+    ("metodos_acceso", "usuario_contrasena", "click", "Usuario y contraseña"),
+    ("usuario_contrasena", "inicio", "enter_credentials", None),
+    ("inicio", "productos", "click", "Ver productos"),
+    ("productos", "pdc", "click", "PDC"),
+    ("inicio", "menu", "open_menu", None),
+    ("login_correo", "bienvenida", "back", None),
+    ("metodos_acceso", "login_correo", "back", None),
+    ("usuario_contrasena", "metodos_acceso", "back", None),
+    ("productos", "inicio", "back", None),
+    ("pdc", "productos", "back", None),
+    ("menu", "inicio", "back", None),
+]
+
+
+class NavigationError(Exception):
+    """No se pudo detectar la pantalla o llegar a la pantalla pedida"""
+
+
+def shortest_path(source, target, transitions=TRANSITIONS):
+    """Transiciones del camino más corto entre dos pantallas (BFS), o None"""
+    if source == target:
+        return []
+    previous = {source: None}
+    queue = deque([source])
+    while queue:
+        screen = queue.popleft()
+        for transition in transitions:
+            if transition[0] != screen or transition[1] in previous:
+                continue
+            previous[transition[1]] = transition
+            if transition[1] == target:
+                path = []
+                while transition is not None:
+                    path.append(transition)
+                    transition = previous[transition[0]]
+                return path[::-1]
+            queue.append(transition[1])
+    return None
+
+
+class ScreenNavigator:
+    """Detecta la pantalla actual y navega por el grafo de pantallas"""
+
+    def __init__(self, driver, engine, registry, waits, text_input=None, gestures=None,
+                 credentials=None, screens=None, transitions=None, max_unknown_backs=2):
+        self.driver = driver
+        self.engine = engine
+        self.registry = registry
+        self.waits = waits
+        self.text_input = text_input
+        self.gestures = gestures
+        self.credentials = credentials or {}
+        self.screens = screens or SCREENS
+        self.transitions = transitions or TRANSITIONS
+        self.max_unknown_backs = max_unknown_backs
+        self._signatures = {}
+
+    def fingerprint(self):
+        """Anclas presentes en una instantánea nueva de la pantalla"""
+        self.engine.invalidate()
+        anchors = {anchor for anchors in self.screens.values() for anchor in anchors}
+        return frozenset(anchor for anchor in anchors if self.engine.first_present([anchor]) is not None)
+
+    def current_screen(self):
+        """Nombre de la pantalla actual, o None si la huella no coincide con ninguna"""
+        signature = self.fingerprint()
+        if signature not in self._signatures:
+            detected = None
+            for name, anchors in self.screens.items():
+                if all(anchor in signature for anchor in anchors):
+                    detected = name
+            self._signatures[signature] = detected
+        return self._signatures[signature]
+
+    def is_on(self, screen):
+        """Si la pantalla detectada es ``screen`` (no basta con ver sus anclas: "inicio"
+        también se ve en productos o pdc)"""
+        return self.current_screen() == screen
+
+    def navigate_to(self, target, max_steps=12):
+        """Lleva la app a ``target`` por el camino más corto y devuelve las pantallas recorridas"""
+        if target not in self.screens:
+            raise NavigationError(f"Pantalla desconocida: {target}")
+        visited = []
+        unknown_backs = 0
+        for _ in range(max_steps):
+            current = self.current_screen()
+            if current is None:
+                # Pantalla no declarada: volver atrás hasta reconocer una
+                if unknown_backs >= self.max_unknown_backs:
+                    raise NavigationError("No se reconoce la pantalla actual")
+                unknown_backs += 1
+                self._action_back(None)
+                self.waits.until_stable()
+                continue
+            visited.append(current)
+            # Solo cuenta la pantalla detectada: las anclas de "inicio" (el botón de
+            # menú) siguen visibles en las pantallas a las que se llega desde ella
+            if current == target:
+                return visited
+            path = shortest_path(current, target, self.transitions)
+            if not path:
+                raise NavigationError(f"No hay camino de '{current}' a '{target}'")
+            _source, destination, action, argument = path[0]
+            print(f"🧭 Navegando: {current} → {destination} ({action})")
+            getattr(self, f"_action_{action}")(argument)
+            self.waits.until_screen(self.screens[destination], screen=destination)
+        raise NavigationError(f"No se llegó a '{target}' en {max_steps} pasos (recorrido: {visited})")
+
+    # -- Acciones de las transiciones ------------------------------------------
+
+    def _action_click(self, name):
+        self.waits.until_visible(name).click()
+
+    def _action_back(self, _argument):
+        self.driver.back()
+
+    def _hide_keyboard(self):
+        if self.driver.is_keyboard_shown():
+            try:
+                self.driver.hide_keyboard()
+            except Exception:
+                pass
+
+    def _action_enter_email(self, _argument):
+        field = self.waits.until_visible("Correo empresarial")
+        self.text_input.set_text(field, self.credentials["email"])
+        self._hide_keyboard()
+        self.waits.until_visible("Continuar").click()
+
+    def _action_enter_credentials(self, _argument):
+        self.text_input.set_text(self.waits.until_visible("Campo usuario"), self.credentials["user"])
+        self.text_input.set_text(self.waits.until_visible("Campo contraseña"), self.credentials["password"],
+                                 secret=True)
+        self._hide_keyboard()
+        self.waits.until_visible("Siguiente").click()
+
+    def _action_open_menu(self, _argument):
+        self.waits.until_visible("Menú").click()
+        self.waits.until_stable(screen="Menú")
+        if self.gestures.scroll_to("Salir") is None:
+            raise NavigationError("No apareció 'Salir' al desplegar el menú")
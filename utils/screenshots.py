@@ -0,0 +1,100 @@
+"""
+Capturas de pantalla automáticas por paso y en fallos
+conftest.py toma una captura en cada frontera de paso (cuando una espera con
+``screen=...`` de utils/waits.py termina), al final del test y cuando falla.
+Cada PNG se escribe directamente desde el base64 que devuelve el driver (una
+sola decodificación, sin pasar por archivos temporales) en:
+
+    pytest_screenshots/<módulo>/<run_id>/<test>/<NN>_<paso>.png
+
+y se registra en el índice de evidencias (utils/evidence_index.py) con su clave
+de Xray y run id, que es de donde upload_screenshots.py y evidence_report.py
+las descubren.
+
+Los fotogramas consecutivos iguales no se guardan: se compara un hash
+perceptual (dHash de 64 bits, distancia de Hamming <= ``max_distance``) con el
+de la última captura guardada del test. Sin Pillow se usa el SHA-256 de los
+bytes, que solo descarta capturas idénticas.
+"""
+
+import base64
+import hashlib
+import io
+import os
+import re
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow es opcional
+    Image = None
+
+from utils.evidence_index import SCREENSHOT
+
+HASH_SIZE = 8
+DEFAULT_MAX_DISTANCE = 4
+
+
+def _slug(value):
+    return re.sub(r"[^\w.-]+", "_", value).strip("_")[:60] or "paso"
+
+
+def perceptual_hash(png_bytes):
+    """dHash de 64 bits (entero) o, sin Pillow, el SHA-256 de los bytes (str)"""
+    if Image is None:
+        return hashlib.sha256(png_bytes).hexdigest()
+    with Image.open(io.BytesIO(png_bytes)) as image:
+        small = image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE))
+        pixels = list(small.getdata())
+    value = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            left = pixels[row * (HASH_SIZE + 1) + col]
+            right = pixels[row * (HASH_SIZE + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def is_duplicate(hash_a, hash_b, max_distance=DEFAULT_MAX_DISTANCE):
+    if hash_a is None or hash_b is None or type(hash_a) is not type(hash_b):
+        return False
+    if isinstance(hash_a, str):
+        return hash_a == hash_b
+    return bin(hash_a ^ hash_b).count("1") <= max_distance
+
+
+class ScreenshotRecorder:
+    """Capturas de un test, numeradas y sin fotogramas repetidos"""
+
+    def __init__(self, driver, screenshots_dir, run_id, module, metadata, index=None,
+                 max_distance=DEFAULT_MAX_DISTANCE):
+        self.driver = driver
+        self.test_dir = os.path.join(screenshots_dir, run_id, _slug(metadata["test"]))
+        self.run_id = run_id
+        self.module = module
+        self.metadata = metadata
+        self.index = index
+        self.max_distance = max_distance
+        self.count = 0
+        self.skipped = 0
+        self._last_hash = None
+        self._last_path = None
+
+    def capture(self, step, **extra):
+        """Guarda la pantalla actual; si es igual a la anterior devuelve la ruta de esa"""
+        png_bytes = base64.b64decode(self.driver.get_screenshot_as_base64())
+        frame_hash = perceptual_hash(png_bytes)
+        if is_duplicate(frame_hash, self._last_hash, self.max_distance):
+            self.skipped += 1
+            return self._last_path
+
+        self.count += 1
+        os.makedirs(self.test_dir, exist_ok=True)
+        path = os.path.join(self.test_dir, f"{self.count:02d}_{_slug(step)}.png")
+        with open(path, "wb") as f:
+            f.write(png_bytes)
+        self._last_hash, self._last_path = frame_hash, path
+
+        if self.index is not None:
+            metadata = dict(self.metadata, **extra)
+            self.index.add(SCREENSHOT, path, self.run_id, self.module, step=step, **metadata)
+        return path
@@ -0,0 +1,270 @@
+"""
+Broker de sesiones de Appium
+Mantiene una sesión caliente por dispositivo y la presta (lease) a un proceso
+pytest a la vez, para que cada proceso se adjunte a la sesión existente en vez
+de reinstalar/lanzar la app con un nuevo webdriver.Remote.
+
+Solo usa la biblioteca estándar: habla W3C con Appium por HTTP.
+
+Uso independiente (compartido entre varios runners):
+    python -m utils.session_broker --port 4790
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Variable con la URL del broker que usa el fixture driver de conftest.py
+BROKER_ENV = "APPIUM_SESSION_BROKER"
+
+DEFAULT_LEASE_TTL = 300.0
+DEFAULT_LEASE_WAIT = 600.0
+
+
+class BrokerError(Exception):
+    """Error devuelto por el broker o por Appium al crear la sesión"""
+
+
+def _http_json(method, url, payload=None, timeout=300):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(url, data=data, method=method,
+                                     headers={"Content-Type": "application/json; charset=utf-8"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read() or b"{}")
+    except urllib.error.HTTPError as e:
+        try:
+            body = json.loads(e.read() or b"{}")
+        except ValueError:
+            body = {}
+        message = body.get("error")
+        if isinstance(body.get("value"), dict):
+            message = body["value"].get("message", message)
+        raise BrokerError(f"{method} {url} -> {e.code}: {message or e.reason}") from e
+    except urllib.error.URLError as e:
+        raise BrokerError(f"{method} {url}: {e.reason}") from e
+
+
+class SessionBroker:
+    """Estado del broker: una sesión y como mucho un lease activo por dispositivo"""
+
+    def __init__(self):
+        self.devices = {}
+        self.condition = threading.Condition()
+
+    def _session_alive(self, entry):
+        try:
+            _http_json("GET", f"{entry['appium_server']}/session/{entry['session_id']}", timeout=10)
+            return True
+        except BrokerError:
+            return False
+
+    def _create_session(self, appium_server, capabilities):
+        response = _http_json("POST", f"{appium_server}/session",
+                              {"capabilities": {"alwaysMatch": capabilities, "firstMatch": [{}]}})
+        value = response.get("value", {})
+        return value["sessionId"], value.get("capabilities", capabilities)
+
+    def lease(self, device_name, appium_server, capabilities, ttl=DEFAULT_LEASE_TTL, wait=DEFAULT_LEASE_WAIT):
+        """Espera a que el dispositivo esté libre y devuelve su sesión con un lease nuevo"""
+        deadline = time.monotonic() + wait
+        with self.condition:
+            while True:
+                entry = self.devices.get(device_name)
+                now = time.monotonic()
+                if entry is None or entry["lease_id"] is None or entry["lease_expires"] < now:
+                    break
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise BrokerError(f"El dispositivo {device_name} sigue prestado tras {wait:.0f}s")
+                self.condition.wait(min(remaining, entry["lease_expires"] - now))
+
+            lease_id = uuid.uuid4().hex
+            # Reservar antes de crear/validar la sesión para que nadie más la tome
+            self.devices[device_name] = dict(entry or {}, lease_id=lease_id, lease_expires=now + ttl,
+                                             appium_server=appium_server)
+
+        try:
+            if entry and entry.get("session_id") and entry["appium_server"] == appium_server \
+                    and self._session_alive(entry):
+                session_id, session_capabilities = entry["session_id"], entry["capabilities"]
+            else:
+                session_id, session_capabilities = self._create_session(appium_server, capabilities)
+        except BrokerError:
+            with self.condition:
+                self.devices.pop(device_name, None)
+                self.condition.notify_all()
+            raise
+
+        with self.condition:
+            self.devices[device_name].update(session_id=session_id, capabilities=session_capabilities)
+        return {"lease_id": lease_id, "session_id": session_id, "capabilities": session_capabilities,
+                "ttl": ttl}
+
+    def _find_lease(self, lease_id):
+        for device_name, entry in self.devices.items():
+            if entry.get("lease_id") == lease_id:
+                return device_name, entry
+        raise BrokerError(f"Lease desconocido o expirado: {lease_id}")
+
+    def renew(self, lease_id, ttl=DEFAULT_LEASE_TTL):
+        with self.condition:
+            _device_name, entry = self._find_lease(lease_id)
+            entry["lease_expires"] = time.monotonic() + ttl
+        return {"lease_id": lease_id, "ttl": ttl}
+
+    def release(self, lease_id):
+        with self.condition:
+            device_name, entry = self._find_lease(lease_id)
+            entry["lease_id"] = None
+            entry["lease_expires"] = 0
+            self.condition.notify_all()
+        return {"device_name": device_name}
+
+    def status(self):
+        now = time.monotonic()
+        with self.condition:
+            return {
+                device_name: {
+                    "session_id": entry.get("session_id"),
+                    "leased": bool(entry.get("lease_id")) and entry["lease_expires"] > now,
+                }
+                for device_name, entry in self.devices.items()
+            }
+
+    def close_all(self):
+        """Cierra todas las sesiones en Appium"""
+        with self.condition:
+            entries = list(self.devices.values())
+            self.devices.clear()
+        for entry in entries:
+            if entry.get("session_id"):
+                try:
+                    _http_json("DELETE", f"{entry['appium_server']}/session/{entry['session_id']}", timeout=30)
+                except BrokerError as e:
+                    print(f"⚠️ No se pudo cerrar la sesión {entry['session_id']}: {e}")
+
+
+class _BrokerHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, value):
+        body = json.dumps(value).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/status":
+            return self._reply(200, self.server.broker.status())
+        self._reply(404, {"error": f"Ruta desconocida: {self.path}"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length)) if length else {}
+        broker = self.server.broker
+        routes = {
+            "/lease": lambda: broker.lease(payload["device_name"], payload["appium_server"],
+                                           payload.get("capabilities", {}),
+                                           ttl=payload.get("ttl", DEFAULT_LEASE_TTL),
+                                           wait=payload.get("wait", DEFAULT_LEASE_WAIT)),
+            "/renew": lambda: broker.renew(payload["lease_id"], payload.get("ttl", DEFAULT_LEASE_TTL)),
+            "/release": lambda: broker.release(payload["lease_id"]),
+        }
+        if self.path not in routes:
+            return self._reply(404, {"error": f"Ruta desconocida: {self.path}"})
+        try:
+            self._reply(200, routes[self.path]())
+        except (BrokerError, KeyError) as e:
+            self._reply(409, {"error": str(e)})
+
+
+class SessionBrokerServer:
+    """Broker HTTP en un hilo del proceso actual (lo arranca el runner)"""
+
+    def __init__(self, port=0):
+        self.broker = SessionBroker()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _BrokerHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.broker = self.broker
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.broker.close_all()
+
+
+class BrokerClient:
+    """Cliente usado por conftest.py; renueva el lease en segundo plano mientras dura"""
+
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+        self._heartbeat = None
+        self._stop = threading.Event()
+
+    def _post(self, path, payload, timeout=DEFAULT_LEASE_WAIT + 60):
+        response = _http_json("POST", f"{self.url}{path}", payload, timeout=timeout)
+        if "error" in response:
+            raise BrokerError(response["error"])
+        return response
+
+    def lease(self, device_name, appium_server, capabilities, ttl=DEFAULT_LEASE_TTL, wait=DEFAULT_LEASE_WAIT):
+        lease = self._post("/lease", {"device_name": device_name, "appium_server": appium_server,
+                                      "capabilities": capabilities, "ttl": ttl, "wait": wait},
+                           timeout=wait + 300)
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=self._renew_loop, args=(lease["lease_id"], ttl), daemon=True)
+        self._heartbeat.start()
+        return lease
+
+    def _renew_loop(self, lease_id, ttl):
+        while not self._stop.wait(ttl / 3):
+            try:
+                self._post("/renew", {"lease_id": lease_id, "ttl": ttl}, timeout=30)
+            except BrokerError:
+                return
+
+    def release(self, lease_id):
+        self._stop.set()
+        self._post("/release", {"lease_id": lease_id}, timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Broker de sesiones de Appium")
+    parser.add_argument("--port", type=int, default=4790)
+    args = parser.parse_args()
+
+    server = SessionBrokerServer(args.port)
+    print(f"🔌 Broker de sesiones escuchando en {server.url} (exporta {BROKER_ENV}={server.url})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        server.broker.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Dependencias entre tests encadenados
+Plugin de pytest (cargado desde conftest.py). Un test declara de qué tests
+depende con ``@pytest.mark.depends_on("test_03_click_iniciar_sesion")``; los
+nombres se resuelven en la misma clase, luego en el mismo módulo, o como nodeid
+completo.
+
+    - Al colectar se construye el grafo y se reordenan los tests para que cada
+      uno corra después de sus dependencias (orden estable; un ciclo es error).
+    - Si una dependencia falla o se salta, sus dependientes (y los de estos) se
+      saltan en el setup, sin abrir fixtures ni agotar localizadores.
+    - Las ramas independientes siguen corriendo.
+    - Un test saltado por dependencia lleva en el JUnit la propiedad
+      ``skipped_by_dependency`` con el nodeid de la dependencia y el mensaje
+      "Dependencia fallida: ...", para distinguirlo en Xray de un skip normal.
+
+Una dependencia que no se colectó (test ejecutado solo, -k, shard) se ignora.
+"""
+
+import pytest
+
+MARKER = "depends_on"
+JUNIT_PROPERTY = "skipped_by_dependency"
+SKIP_PREFIX = "Dependencia fallida"
+
+# nodeid -> nodeids de los que depende (solo los colectados)
+_dependencies = {}
+# nodeid -> "passed" / "failed" / "skipped"
+_outcomes = {}
+# (nodeid saltado, dependencia que lo causó)
+_dependency_skips = []
+
+
+def _resolve(reference, item, by_nodeid):
+    """nodeid colectado al que apunta ``reference`` desde ``item``, o None"""
+    if reference in by_nodeid:
+        return reference
+    parent_id = item.nodeid.rsplit("::", 1)[0]
+    module_id = item.nodeid.split("::", 1)[0]
+    for candidate in (f"{parent_id}::{reference}", f"{module_id}::{reference}"):
+        if candidate in by_nodeid:
+            return candidate
+    return None
+
+
+def build_graph(items):
+    """Dependencias por nodeid de los tests colectados"""
+    by_nodeid = {item.nodeid: item for item in items}
+    graph = {}
+    for item in items:
+        references = [ref for marker in item.iter_markers(MARKER) for ref in marker.args]
+        resolved = []
+        for reference in references:
+            nodeid = _resolve(reference, item, by_nodeid)
+            if nodeid is None:
+                print(f"\n⚠️ {item.nodeid}: dependencia '{reference}' no colectada, se ignora")
+            elif nodeid == item.nodeid:
+                raise pytest.UsageError(f"{item.nodeid} depende de sí mismo")
+            elif nodeid not in resolved:
+                resolved.append(nodeid)
+        graph[item.nodeid] = resolved
+    return graph
+
+
+def dependency_order(items, graph):
+    """Orden topológico estable: se respeta el orden colectado salvo que una dependencia vaya detrás"""
+    position = {item.nodeid: index for index, item in enumerate(items)}
+    pending = {nodeid: len(deps) for nodeid, deps in graph.items()}
+    dependents = {nodeid: [] for nodeid in graph}
+    for nodeid, deps in graph.items():
+        for dep in deps:
+            dependents[dep].append(nodeid)
+
+    ready = sorted((nodeid for nodeid, count in pending.items() if count == 0), key=position.get)
+    ordered = []
+    while ready:
+        nodeid = ready.pop(0)
+        ordered.append(nodeid)
+        for dependent in dependents[nodeid]:
+            pending[dependent] -= 1
+            if pending[dependent] == 0:
+                ready.append(dependent)
+        ready.sort(key=position.get)
+
+    if len(ordered) != len(items):
+        cycle = sorted(nodeid for nodeid, count in pending.items() if count > 0)
+        raise pytest.UsageError(f"Ciclo en depends_on entre: {', '.join(cycle)}")
+    by_nodeid = {item.nodeid: item for item in items}
+    return [by_nodeid[nodeid] for nodeid in ordered]
+
+
+def failed_dependency(nodeid):
+    """(dependencia, resultado) de la primera dependencia que no pasó, o None"""
+    for dep in _dependencies.get(nodeid, []):
+        outcome = _outcomes.get(dep)
+        if outcome in ("failed", "skipped"):
+            return dep, outcome
+    return None
+
+
+# Hooks de pytest
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(session, config, items):
+    # trylast: se ordena lo que queda tras -k/-m y otros filtros
+    _dependencies.clear()
+    _outcomes.clear()
+    _dependency_skips.clear()
+    graph = build_graph(items)
+    if not any(graph.values()):
+        return
+    items[:] = dependency_order(items, graph)
+    _dependencies.update(graph)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    blocking = failed_dependency(item.nodeid)
+    if blocking is None:
+        return
+    dep, outcome = blocking
+    item.user_properties.append((JUNIT_PROPERTY, dep))
+    _dependency_skips.append((item.nodeid, dep))
+    reason = "falló" if outcome == "failed" else "se saltó"
+    pytest.skip(f"{SKIP_PREFIX}: {dep.rsplit('::', 1)[-1]} {reason}")
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    if report.failed:
+        _outcomes[item.nodeid] = "failed"
+    elif report.skipped and not hasattr(report, "wasxfail"):
+        _outcomes.setdefault(item.nodeid, "skipped")
+    elif report.when == "call" and report.passed:
+        _outcomes.setdefault(item.nodeid, "passed")
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _dependency_skips:
+        return
+    terminalreporter.section("Saltados por dependencia")
+    for nodeid, dep in _dependency_skips:
+        terminalreporter.write_line(f"⏭️ {nodeid.rsplit('::', 1)[-1]}  ←  {dep.rsplit('::', 1)[-1]}")
@@ -0,0 +1,176 @@
+"""
+Escritura rápida de texto en campos
+Con ``mobile: replaceElementValue`` UiAutomator2 reemplaza el texto completo del
+campo en un solo comando, así que no hace falta limpiar, escribir por partes ni
+dormir entre partes. Si el valor no queda bien (campos que filtran setText) se
+recurre, en orden, a:
+    - adb_input: ``adb shell input text`` por lotes sobre el campo enfocado
+                 (solo ASCII sin saltos de línea ni '%')
+    - ime:       ``mobile: type`` (el IME de Appium escribe en el campo enfocado)
+
+Tras cada estrategia se verifica el valor final con una sola lectura del atributo
+text (en campos secretos solo se compara la longitud, Android los enmascara).
+
+Micro-benchmark contra el Appium falso (caracteres por segundo por estrategia):
+    python -m utils.text_input --benchmark --latency-ms 20
+"""
+
+import argparse
+import subprocess
+import time
+
+SET_VALUE = "set_value"
+ADB_INPUT = "adb_input"
+IME = "ime"
+STRATEGIES = (SET_VALUE, ADB_INPUT, IME)
+
+# Caracteres que la shell de Android interpretaría en ``input text``
+_SHELL_SPECIAL = set("()<>|;&*\\~\"'`$#?[]{}!")
+ADB_BATCH_SIZE = 80
+
+
+class TextInputError(Exception):
+    """Ninguna estrategia dejó el valor esperado en el campo"""
+
+
+def escape_input_text(text):
+    """Escapa texto para ``adb shell input text`` (los espacios van como %s; el % no tiene escape)"""
+    escaped = []
+    for char in text:
+        if char == " ":
+            escaped.append("%s")
+        elif char in _SHELL_SPECIAL:
+            escaped.append("\\" + char)
+        else:
+            escaped.append(char)
+    return "".join(escaped)
+
+
+def _adb_shell(adb_path, device_name):
+    def run(args):
+        subprocess.run([adb_path, "-s", device_name, "shell"] + args,
+                       check=True, capture_output=True, timeout=30)
+    return run
+
+
+class TextInput:
+    """Escribe y verifica texto con la estrategia más barata que funcione"""
+
+    def __init__(self, driver, adb_path="adb", device_name=None, shell=None, strategies=STRATEGIES):
+        self.driver = driver
+        # shell(args) ejecuta ``adb shell <args>``; inyectable para el benchmark
+        self.shell = shell or (_adb_shell(adb_path, device_name) if device_name else None)
+        self.strategies = strategies
+        self.last_strategy = None
+
+    def set_text(self, element, text, secret=False):
+        """Deja ``text`` en el campo y devuelve la estrategia que lo consiguió"""
+        last_value = None
+        for strategy in self.strategies:
+            if not self._applicable(strategy, text):
+                continue
+            try:
+                getattr(self, f"_{strategy}")(element, text)
+            except Exception as e:
+                last_value = f"<{strategy}: {e}>"
+                continue
+            last_value = element.get_attribute("text")
+            if self._matches(last_value, text, secret):
+                self.last_strategy = strategy
+                return strategy
+        shown = "*" * len(text) if secret else text
+        raise TextInputError(f"No se pudo escribir '{shown}' en el campo (último valor leído: {last_value!r})")
+
+    def _applicable(self, strategy, text):
+        if strategy == ADB_INPUT:
+            # input text no admite caracteres fuera de ASCII ni saltos de línea, y convierte
+            # cualquier "%s" en espacio sin forma de escaparlo: el texto con % va al IME
+            return self.shell is not None and text.isascii() and "\n" not in text and "%" not in text
+        return True
+
+    @staticmethod
+    def _matches(value, text, secret):
+        value = value or ""
+        return len(value) == len(text) if secret else value == text
+
+    def _set_value(self, element, text):
+        self.driver.execute_script("mobile: replaceElementValue", {"elementId": element.id, "text": text})
+
+    def _adb_input(self, element, text):
+        element.clear()
+        element.click()
+        for start in range(0, len(text), ADB_BATCH_SIZE):
+            self.shell(["input", "text", escape_input_text(text[start:start + ADB_BATCH_SIZE])])
+
+    def _ime(self, element, text):
+        element.clear()
+        element.click()
+        self.driver.execute_script("mobile: type", {"text": text})
+
+
+def benchmark(latency_seconds, adb_latency_seconds, text, repeat):
+    """Caracteres por segundo de cada estrategia contra el Appium falso.
+
+    ``adb shell input text`` se simula con la latencia indicada (el coste típico
+    de lanzar adb), escribiendo directamente en el campo enfocado del servidor falso.
+    """
+    from appium import webdriver
+    from appium.options.android import UiAutomator2Options
+    from appium.webdriver.common.appiumby import AppiumBy
+    from utils.fake_appium import FakeAppiumServer
+
+    server = FakeAppiumServer(latency_seconds=latency_seconds).start()
+    options = UiAutomator2Options()
+    options.platform_name = "Android"
+    options.automation_name = "UiAutomator2"
+    driver = webdriver.Remote(server.url, options=options)
+
+    def fake_shell(args):
+        time.sleep(adb_latency_seconds)
+        server.state.type_into_focused(args[-1].replace("%s", " ").replace("\\", ""))
+
+    def legacy(element, value):
+        # El enfoque anterior de test_04: click, clear y partes de 3 caracteres con pausa
+        element.click()
+        element.clear()
+        for i in range(0, len(value), 3):
+            element.send_keys(value[i:i + 3])
+            time.sleep(0.1)
+
+    print(f"⌨️  Escritura de {len(text)} caracteres, {repeat} repeticiones, "
+          f"latencia Appium {latency_seconds * 1000:.0f} ms, adb {adb_latency_seconds * 1000:.0f} ms")
+    try:
+        element = driver.find_element(AppiumBy.CLASS_NAME, "android.widget.EditText")
+        rows = [("legacy (3 en 3 + sleep)", lambda: legacy(element, text))]
+        for strategy in STRATEGIES:
+            text_input = TextInput(driver, shell=fake_shell, strategies=(strategy,))
+            rows.append((strategy, lambda t=text_input: t.set_text(element, text)))
+
+        for name, action in rows:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                action()
+            elapsed = (time.perf_counter() - start) / repeat
+            print(f"  {name:<25} {elapsed * 1000:>8.0f} ms  {len(text) / elapsed:>8.0f} caracteres/s")
+    finally:
+        driver.quit()
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escritura rápida de texto en campos")
+    parser.add_argument("--benchmark", action="store_true", help="Medir cada estrategia contra el Appium falso")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Latencia por comando de Appium")
+    parser.add_argument("--adb-latency-ms", type=float, default=80.0, help="Coste simulado de cada 'adb shell'")
+    parser.add_argument("--text", default="emailFalso@gmail.com")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.latency_ms / 1000.0, args.adb_latency_ms / 1000.0, args.text, args.repeat)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Presupuestos de timeout por localizador y por pantalla
+En vez de aplicar el mismo implicit wait de 5 s a todas las búsquedas, cada
+elemento lógico y cada pantalla tiene su propio timeout calculado a partir de
+lo que tardó en aparecer en ejecuciones anteriores:
+
+    budget = clamp(p99(latencias) × factor, floor, ceiling)
+
+Las latencias se guardan en pytest_reports/.cache/timeout_budgets.json (una
+ventana con las últimas ``max_samples`` por clave). Con menos de
+``min_samples`` observaciones se usa el timeout por defecto, salvo que la
+clave venga de una calibración.
+
+En modo calibración (TIMEOUT_CALIBRATION=1 o ``test_runner.py --calibrate``)
+todas las esperas usan el techo, para medir la latencia real sin cortes, y las
+muestras de la ejecución sustituyen a las anteriores. Cada clave se vacía una
+sola vez por ejecución (``run_id``): --calibrate lanza un pytest por módulo, en
+paralelo entre dispositivos, y los que guardan después añaden sus muestras a
+las del primero en vez de pisarlas.
+
+Ver presupuestos:
+    python -m utils.timeout_budgets
+"""
+
+import argparse
+import json
+import os
+import uuid
+
+from utils.run_history import percentile
+
+DEFAULT_BUDGETS_PATH = os.path.join("pytest_reports", ".cache", "timeout_budgets.json")
+CALIBRATION_ENV = "TIMEOUT_CALIBRATION"
+
+# Tipos de clave: elementos del registro de localizadores y pantallas
+LOCATOR = "locator"
+SCREEN = "screen"
+
+
+class TimeoutBudgets:
+    """Latencias observadas y timeouts derivados, persistidos en JSON"""
+
+    def __init__(self, path=DEFAULT_BUDGETS_PATH, factor=2.0, floor=1.0, ceiling=30.0,
+                 min_samples=5, max_samples=200, calibrate=False, run_id=None):
+        self.path = path
+        self.factor = factor
+        self.floor = floor
+        self.ceiling = ceiling
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.calibrate = calibrate
+        # Ejecución que calibra; sin run_id la calibración es solo de este proceso
+        self.run_id = run_id or uuid.uuid4().hex
+        self.data = self._load()
+        self._pending = {}
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def entry(self, kind, key):
+        return self.data.get(kind, {}).get(key, {"samples": [], "calibrated": False})
+
+    def budget(self, kind, key, default):
+        """Timeout para la clave: el techo al calibrar, el por defecto sin historial suficiente"""
+        if self.calibrate:
+            return self.ceiling
+        entry = self.entry(kind, key)
+        samples = entry["samples"]
+        if not samples or (len(samples) < self.min_samples and not entry["calibrated"]):
+            return default
+        p99 = percentile(sorted(samples), 0.99)
+        return max(self.floor, min(self.ceiling, p99 * self.factor))
+
+    def record(self, kind, key, seconds):
+        """Latencia de aparición observada (solo esperas que se cumplieron)"""
+        self._pending.setdefault(kind, {}).setdefault(key, []).append(round(seconds, 4))
+
+    def save(self):
+        """Añade las muestras nuevas a las del disco (o las sustituye la primera vez que calibra la ejecución)"""
+        if not self._pending:
+            return
+        merged = self._load()
+        for kind, entries in self._pending.items():
+            for key, values in entries.items():
+                entry = merged.setdefault(kind, {}).get(key, {"samples": [], "calibrated": False})
+                if self.calibrate and entry.get("calibration_run") != self.run_id:
+                    entry = {"samples": [], "calibrated": True, "calibration_run": self.run_id}
+                entry["samples"] = (entry["samples"] + values)[-self.max_samples:]
+                merged[kind][key] = entry
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(merged, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.data = merged
+        self._pending = {}
+
+
+def print_budgets(budgets, default):
+    if not budgets.data:
+        print(f"📭 No hay latencias registradas en {budgets.path}")
+        return
+    print(f"{'tipo':<8} {'clave':<45} {'n':>4} {'p50':>7} {'p99':>7} {'budget':>7}")
+    for kind in sorted(budgets.data):
+        for key, entry in sorted(budgets.data[kind].items()):
+            ordered = sorted(entry["samples"])
+            mark = " 📏" if entry["calibrated"] else ""
+            print(f"{kind:<8} {key[:45]:<45} {len(ordered):>4} {percentile(ordered, 0.5):>6.2f}s "
+                  f"{percentile(ordered, 0.99):>6.2f}s {budgets.budget(kind, key, default):>6.2f}s{mark}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presupuestos de timeout aprendidos")
+    parser.add_argument("--path", default=DEFAULT_BUDGETS_PATH)
+    parser.add_argument("--factor", type=float, default=2.0)
+    parser.add_argument("--floor", type=float, default=1.0)
+    parser.add_argument("--ceiling", type=float, default=30.0)
+    parser.add_argument("--default", type=float, default=10.0,
+                        help="Timeout para claves con pocas muestras")
+    args = parser.parse_args()
+    print_budgets(TimeoutBudgets(args.path, args.factor, args.floor, args.ceiling), args.default)
+
+
+if __name__ == "__main__":
+    main()
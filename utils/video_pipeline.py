@@ -0,0 +1,128 @@
+"""
+Descarga de videos en segundo plano
+Al parar screenrecord el video todavía se está cerrando en el dispositivo, y el
+``adb pull`` + ``adb shell rm`` tardaban varios segundos dentro del finalizer
+del test. Aquí esa parte se encola en un pool de hilos y el siguiente test
+empieza de inmediato:
+
+    - El cierre del archivo se detecta consultando su tamaño (``stat``) hasta
+      que deja de crecer, en vez de dormir 2 s fijos.
+    - La cola está acotada: si hay ``max_pending`` descargas en curso, ``submit``
+      espera a que termine alguna (no se acumulan gigas en el dispositivo).
+    - ``drain()`` es la barrera de fin de sesión: espera todas las descargas y
+      devuelve las que fallaron.
+"""
+
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class VideoPullError(Exception):
+    """No se pudo descargar un video del dispositivo"""
+
+
+class VideoPullQueue:
+    """Pool acotado que espera el cierre del video, lo descarga y lo borra del dispositivo"""
+
+    def __init__(self, adb_path, device_name, workers=2, max_pending=6,
+                 poll_interval=0.25, stable_polls=2, finalize_timeout=15.0):
+        self.adb_path = adb_path
+        self.device_name = device_name
+        self.poll_interval = poll_interval
+        self.stable_polls = stable_polls
+        self.finalize_timeout = finalize_timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="video-pull")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._jobs = []
+
+    def _adb(self, args, timeout=120):
+        return subprocess.run([self.adb_path, "-s", self.device_name] + args,
+                              capture_output=True, text=True, timeout=timeout)
+
+    def device_file_size(self, device_path):
+        """Tamaño del archivo en el dispositivo, o None si no existe"""
+        result = self._adb(["shell", "stat", "-c", "%s", device_path], timeout=15)
+        try:
+            return int(result.stdout.strip()) if result.returncode == 0 else None
+        except ValueError:
+            return None
+
+    def wait_until_finalized(self, device_path):
+        """Espera a que el tamaño deje de cambiar ``stable_polls`` consultas seguidas"""
+        deadline = time.monotonic() + self.finalize_timeout
+        last_size, stable, missing = None, 0, 0
+        while time.monotonic() < deadline:
+            size = self.device_file_size(device_path)
+            if size is None:
+                missing += 1
+                if missing > self.stable_polls + 1:
+                    raise VideoPullError(f"{device_path} no existe en el dispositivo")
+            elif size and size == last_size:
+                stable += 1
+                if stable >= self.stable_polls:
+                    return size
+            else:
+                stable = 0
+            last_size = size
+            time.sleep(self.poll_interval)
+        raise VideoPullError(f"{device_path} no se cerró en {self.finalize_timeout:.0f}s (tamaño: {last_size})")
+
+    def pull(self, device_path, local_path):
+        """Espera el cierre, descarga y borra del dispositivo (en el hilo que llama)"""
+        try:
+            self.wait_until_finalized(device_path)
+            result = self._adb(["pull", device_path, local_path])
+            if result.returncode != 0:
+                raise VideoPullError(f"adb pull {device_path}: {result.stderr.strip()}")
+            return local_path
+        finally:
+            self._adb(["shell", "rm", "-f", device_path], timeout=15)
+
+    def submit(self, device_path, local_path):
+        """Encola la descarga y devuelve un Future con la ruta local"""
+        return self.submit_task(local_path, self.pull, device_path, local_path)
+
+    def submit_task(self, local_path, function, *args):
+        """Encola cualquier trabajo de post-proceso de un video (cuenta para el límite y la barrera)"""
+        self._slots.acquire()
+
+        def run():
+            try:
+                return function(*args)
+            finally:
+                self._slots.release()
+
+        try:
+            future = self._executor.submit(run)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._jobs.append((local_path, future))
+        return future
+
+    def pending(self):
+        with self._lock:
+            return sum(1 for _path, future in self._jobs if not future.done())
+
+    def drain(self, timeout=None):
+        """Barrera: espera todas las descargas y devuelve [(ruta local, error)] de las fallidas
+
+        ``timeout`` es para la barrera entera, no por descarga.
+        """
+        with self._lock:
+            jobs, self._jobs = self._jobs, []
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        failures = []
+        for local_path, future in jobs:
+            try:
+                future.result(timeout=max(0, deadline - time.monotonic()) if deadline is not None else None)
+            except Exception as e:
+                failures.append((local_path, e))
+        return failures
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
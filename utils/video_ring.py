@@ -0,0 +1,157 @@
+"""
+Video solo de los tests que fallan, con un buffer circular de segmentos
+En modo VIDEO_RETENTION=failures no se graba el test entero: screenrecord graba
+segmentos cortos (``segment_seconds``) en el dispositivo, rotando sobre un
+número fijo de ranuras, de modo que en el dispositivo solo existen los últimos
+``window_seconds`` (más el segmento en curso).
+
+    - Test que pasa: los segmentos se borran en el dispositivo, sin descargarlos.
+    - Test que falla: se descargan los segmentos del buffer en orden y se unen
+      con ffmpeg (concat sin recodificar). Sin ffmpeg quedan las partes
+      ``<test>_<ts>_partNN.mp4`` y se devuelve la última (la del fallo).
+      Si una descarga falla, el resto del buffer se borra igualmente del
+      dispositivo y no quedan partes a medias en el host.
+
+El resultado del test lo decide conftest.py a partir de pytest_runtest_makereport.
+Borrado y descarga van a la cola de utils/video_pipeline.py, fuera del test.
+"""
+
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+def concat_mp4(parts, output_path, ffmpeg="ffmpeg"):
+    """Une mp4 con el demuxer concat de ffmpeg; devuelve la ruta final"""
+    if len(parts) == 1:
+        os.replace(parts[0], output_path)
+        return output_path
+    ffmpeg_path = shutil.which(ffmpeg)
+    if ffmpeg_path is None:
+        return parts[-1]
+
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as listing:
+        for part in parts:
+            listing.write(f"file '{os.path.abspath(part)}'\n")
+    try:
+        result = subprocess.run([ffmpeg_path, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                                 "-i", listing.name, "-c", "copy", output_path], capture_output=True, text=True)
+    finally:
+        os.remove(listing.name)
+    if result.returncode != 0:
+        return parts[-1]
+    for part in parts:
+        os.remove(part)
+    return output_path
+
+
+class RingBufferVideoRecorder:
+    """Graba segmentos rotatorios en el dispositivo y solo descarga los de un fallo"""
+
+    def __init__(self, adb_path, device_name, module_name, videos_dir, queue,
+                 window_seconds=30, segment_seconds=10, ffmpeg="ffmpeg"):
+        self.adb_path = adb_path
+        self.device_name = device_name
+        self.module_name = module_name
+        self.videos_dir = videos_dir
+        self.queue = queue
+        self.window_seconds = window_seconds
+        self.segment_seconds = segment_seconds
+        self.ffmpeg = ffmpeg
+        # Ranuras para cubrir la ventana completa aunque el último segmento esté a medias
+        self.slots = math.ceil(window_seconds / segment_seconds) + 1
+        self.video_path_local = None
+        self.is_recording = False
+        self._segments = deque(maxlen=self.slots)
+        self._device_prefix = None
+        self._process = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._started = threading.Event()
+
+    def start_recording(self, test_name):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.video_path_local = os.path.join(self.videos_dir, f"{test_name}_{timestamp}.mp4")
+        self._device_prefix = f"/sdcard/.ring_{self.module_name}_{test_name}_{timestamp}"
+        self._segments.clear()
+        self._stop.clear()
+        self._started.clear()
+        self._thread = threading.Thread(target=self._record_segments, name=f"video-ring-{test_name}", daemon=True)
+        self._thread.start()
+        self._started.wait(timeout=5)
+        self.is_recording = self._process is not None
+        return self.is_recording
+
+    def _record_segments(self):
+        sequence = 0
+        while True:
+            device_path = f"{self._device_prefix}_{sequence % self.slots}.mp4"
+            command = [self.adb_path, "-s", self.device_name, "shell", "screenrecord",
+                       "--time-limit", str(self.segment_seconds), device_path]
+            with self._lock:
+                if self._stop.is_set():
+                    break
+                try:
+                    self._process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                except OSError:
+                    self._process = None
+                    self._started.set()
+                    break
+                # Al reutilizar una ranura, el segmento más viejo sale del buffer
+                self._segments.append(device_path)
+            self._started.set()
+            started_at = time.monotonic()
+            self._process.wait()
+            if self._stop.is_set() or (self._process.returncode != 0 and time.monotonic() - started_at < 1):
+                break
+            sequence += 1
+
+    def stop_recording(self, keep=True):
+        """Para la grabación; con keep encola la descarga y devuelve un Future, si no descarta"""
+        if not self.is_recording:
+            return None
+        with self._lock:
+            self._stop.set()
+            if self._process is not None and self._process.poll() is None:
+                self._process.terminate()
+        self._thread.join(timeout=15)
+        self.is_recording = False
+
+        segments = list(self._segments)
+        pattern = f"{self._device_prefix}_*.mp4"
+        if not keep:
+            self.queue.submit_task(pattern, self._discard, pattern)
+            return None
+        return self.queue.submit_task(self.video_path_local, self._pull_and_join, segments, self.video_path_local,
+                                      pattern)
+
+    def _discard(self, pattern):
+        subprocess.run([self.adb_path, "-s", self.device_name, "shell", "rm", "-f", pattern],
+                       capture_output=True, timeout=30)
+
+    def _pull_and_join(self, segments, output_path, pattern):
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        base = os.path.splitext(output_path)[0]
+        parts = []
+        try:
+            for index, device_path in enumerate(segments):
+                part = f"{base}_part{index:02d}.mp4"
+                parts.append(part)
+                self.queue.pull(device_path, part)
+        except BaseException:
+            # Sin todas las partes no hay video: no dejar trozos a medias en el host
+            for part in parts:
+                if os.path.exists(part):
+                    os.remove(part)
+            raise
+        finally:
+            # pull borra cada segmento descargado; si uno falla, el resto seguiría en /sdcard
+            self._discard(pattern)
+        return concat_mp4(parts, output_path, self.ffmpeg)
@@ -0,0 +1,202 @@
+"""
+Grabación de video por streaming, sin pasar por el almacenamiento del dispositivo
+``adb exec-out screenrecord --output-format=h264 -`` envía el H.264 crudo por la
+salida estándar y se escribe directamente en un archivo del host: no hay archivo
+en /sdcard, ni ``adb pull``, ni hace falta espacio libre en el dispositivo.
+
+screenrecord corta a los 3 minutos, así que se graba en segmentos de
+``segment_seconds`` (170 s por defecto) que se relanzan solos; al parar se
+ensamblan. El H.264 crudo no lleva marcas de tiempo, así que cada segmento
+guarda cuánto duró su screenrecord (reloj del host) y, si hay ffmpeg en el PATH,
+se remuxa a mp4 sin recodificar con su frecuencia real (fotogramas / segundos) y
+las partes se unen: el mp4 dura lo mismo que la grabación. Dentro de un segmento
+los fotogramas quedan equiespaciados; screenrecord solo emite fotogramas cuando la
+pantalla cambia, así que una pausa larga se reparte entre los fotogramas vecinos
+(el tiempo es exacto en los bordes de segmento y aproximado dentro de él).
+
+Sin ffmpeg los segmentos se concatenan en un .h264 (el Annex B admite
+concatenación directa; VLC y ffplay lo reproducen) que no tiene tiempos: el
+reproductor asume 25 fps y la velocidad no es la real.
+
+Se elige con VIDEO_BACKEND=stream; requiere Android 10+ (--output-format).
+El ensamblado se encola en la misma cola que las descargas (utils/video_pipeline.py),
+así que el siguiente test no espera y la barrera de fin de sesión lo incluye.
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+from datetime import datetime
+
+from utils.video_ring import concat_mp4
+
+# Margen bajo el límite de 180 s de screenrecord
+SEGMENT_SECONDS = 170
+# Frecuencia para un segmento sin duración medida (screenrecord graba a frecuencia variable)
+DEFAULT_FRAME_RATE = 30
+START_CODE = b"\x00\x00\x01"
+
+
+class VideoStreamError(Exception):
+    """No se pudo grabar o ensamblar el video por streaming"""
+
+
+def count_frames(path, chunk_size=1024 * 1024):
+    """Fotogramas de un H.264 Annex B: slices (NAL 1 y 5) con first_mb_in_slice == 0"""
+    frames = 0
+    tail = b""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            data = tail + chunk
+            index = data.find(START_CODE)
+            # Un start code de los últimos 4 bytes se revisa con el bloque siguiente
+            while index != -1 and index + 4 < len(data):
+                if data[index + 3] & 0x1F in (1, 5) and data[index + 4] & 0x80:
+                    frames += 1
+                index = data.find(START_CODE, index + 3)
+            tail = data[-4:]
+    return frames
+
+
+def segment_frame_rate(path, duration, default=DEFAULT_FRAME_RATE):
+    """Frecuencia media real del segmento: fotogramas / segundos que duró su grabación"""
+    if not duration or duration <= 0:
+        return default
+    frames = count_frames(path)
+    return frames / duration if frames else default
+
+
+def _concat_raw(segments, raw_path):
+    with open(raw_path, "wb") as output:
+        for path in segments:
+            with open(path, "rb") as segment:
+                shutil.copyfileobj(segment, output, 1024 * 1024)
+    for path in segments:
+        os.remove(path)
+    return raw_path
+
+
+def assemble_segments(segments, output_path, durations=None, frame_rate=DEFAULT_FRAME_RATE, ffmpeg="ffmpeg"):
+    """Remuxa cada segmento con su frecuencia real y los une en ``output_path``; devuelve la ruta final
+
+    ``durations`` son los segundos que duró cada segmento; los que faltan usan
+    ``frame_rate``. Sin ffmpeg, o si el remux falla, se devuelve el .h264 concatenado.
+    """
+    durations = list(durations or [])
+    durations += [None] * (len(segments) - len(durations))
+    pairs = [(path, duration) for path, duration in zip(segments, durations)
+             if os.path.exists(path) and os.path.getsize(path) > 0]
+    if not pairs:
+        raise VideoStreamError(f"No se recibió video para {output_path}")
+    segments = [path for path, _ in pairs]
+
+    ffmpeg_path = shutil.which(ffmpeg)
+    if ffmpeg_path is None:
+        return _concat_raw(segments, os.path.splitext(output_path)[0] + ".h264")
+
+    base = os.path.splitext(output_path)[0]
+    parts = []
+    for index, (path, duration) in enumerate(pairs):
+        part = f"{base}_part{index:02d}.mp4"
+        rate = segment_frame_rate(path, duration, frame_rate)
+        result = subprocess.run([ffmpeg_path, "-y", "-loglevel", "error", "-f", "h264", "-framerate", f"{rate:.3f}",
+                                 "-i", path, "-c", "copy", part], capture_output=True, text=True)
+        if result.returncode != 0:
+            # El .h264 sigue siendo reproducible: mejor eso que perder el video
+            for leftover in parts + [part]:
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            return _concat_raw(segments, base + ".h264")
+        parts.append(part)
+    for path in segments:
+        os.remove(path)
+    return concat_mp4(parts, output_path, ffmpeg)
+
+
+class StreamingVideoRecorder:
+    """Graba en segmentos H.264 directamente al host; misma interfaz que VideoRecorder"""
+
+    def __init__(self, adb_path, device_name, module_name, videos_dir, queue,
+                 segment_seconds=SEGMENT_SECONDS, frame_rate=DEFAULT_FRAME_RATE, ffmpeg="ffmpeg"):
+        self.adb_path = adb_path
+        self.device_name = device_name
+        self.module_name = module_name
+        self.videos_dir = videos_dir
+        self.queue = queue
+        self.segment_seconds = segment_seconds
+        self.frame_rate = frame_rate
+        self.ffmpeg = ffmpeg
+        self.video_path_local = None
+        self.is_recording = False
+        self.segments = []
+        self.durations = []
+        self._base_path = None
+        self._process = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._started = threading.Event()
+
+    def _command(self):
+        return [self.adb_path, "-s", self.device_name, "exec-out", "screenrecord",
+                "--output-format=h264", "--time-limit", str(self.segment_seconds), "-"]
+
+    def start_recording(self, test_name):
+        """Arranca el primer segmento; devuelve si el proceso de grabación se lanzó"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        os.makedirs(self.videos_dir, exist_ok=True)
+        self.video_path_local = os.path.join(self.videos_dir, f"{test_name}_{timestamp}.mp4")
+        self._base_path = os.path.join(self.videos_dir, f".{test_name}_{timestamp}")
+        self.segments = []
+        self.durations = []
+        self._stop.clear()
+        self._started.clear()
+        self._thread = threading.Thread(target=self._record_segments, name=f"video-stream-{test_name}",
+                                        daemon=True)
+        self._thread.start()
+        self._started.wait(timeout=5)
+        self.is_recording = self._process is not None
+        return self.is_recording
+
+    def _record_segments(self):
+        while True:
+            path = f"{self._base_path}.part{len(self.segments):02d}.h264"
+            with open(path, "wb") as output:
+                with self._lock:
+                    if self._stop.is_set():
+                        break
+                    try:
+                        self._process = subprocess.Popen(self._command(), stdout=output,
+                                                         stderr=subprocess.DEVNULL)
+                    except OSError:
+                        self._process = None
+                        self._started.set()
+                        break
+                self.segments.append(path)
+                self._started.set()
+                started_at = time.monotonic()
+                self._process.wait()
+                self.durations.append(time.monotonic() - started_at)
+            # Un segmento que muere enseguida es un error (sin soporte h264, dispositivo caído)
+            if self._stop.is_set() or (self._process.returncode != 0 and time.monotonic() - started_at < 1):
+                break
+        if os.path.exists(path) and path not in self.segments:
+            os.remove(path)
+
+    def stop_recording(self):
+        """Para el segmento actual y encola el ensamblado; devuelve un Future con la ruta final"""
+        if not self.is_recording:
+            return None
+        with self._lock:
+            self._stop.set()
+            if self._process is not None and self._process.poll() is None:
+                self._process.terminate()
+        self._thread.join(timeout=15)
+        self.is_recording = False
+        return self.queue.submit_task(self.video_path_local, assemble_segments, list(self.segments),
+                                      self.video_path_local, list(self.durations), self.frame_rate, self.ffmpeg)
@@ -0,0 +1,226 @@
+"""
+Esperas por condición para sustituir los time.sleep fijos de los tests
+    - until_visible: un elemento (nombre lógico, XPaths o locator) visible
+    - until_gone:    un elemento deja de estar en pantalla
+    - until_screen:  aparece alguno de los marcadores de una pantalla
+    - until_stable:  la jerarquía deja de cambiar (fin de animaciones/transiciones)
+
+El sondeo usa backoff adaptativo (empieza en 50 ms y crece hasta ``max_poll``).
+Con un solo locator se delega la espera al servidor mediante el implicit wait de
+UiAutomator2, que sondea en el dispositivo sin idas y vueltas extra.
+
+Sin timeout explícito, cada espera usa el presupuesto aprendido para su
+elemento o pantalla (utils/timeout_budgets.py) y registra cuánto tardó.
+
+Cada espera puede declarar ``legacy_sleep``: los segundos de sleep fijo que
+sustituye. Así se informa por test del tiempo que se habría dormido frente al
+que realmente se esperó.
+"""
+
+import hashlib
+import time
+from contextlib import contextmanager
+
+from utils.driver_instrumentation import get_instrumentation
+from utils.timeout_budgets import LOCATOR, SCREEN
+
+
+class WaitTimeout(TimeoutError):
+    """La condición no se cumplió antes del timeout"""
+
+
+class Waiter:
+    """Esperas por condición sobre el driver, el registro de localizadores y la instantánea"""
+
+    def __init__(self, driver, registry=None, engine=None, default_timeout=10.0,
+                 initial_poll=0.05, max_poll=0.5, backoff=1.5, implicit_wait=5.0, budgets=None):
+        self.driver = driver
+        self.registry = registry
+        self.engine = engine
+        self.budgets = budgets
+        self.default_timeout = default_timeout
+        self.initial_poll = initial_poll
+        self.max_poll = max_poll
+        self.backoff = backoff
+        self.implicit_wait = implicit_wait
+        self.records = []
+        # on_step(pantalla): se llama al terminar una espera con screen=... (frontera de paso)
+        self.on_step = None
+
+    # -- Informe -------------------------------------------------------------
+
+    def totals(self):
+        """(segundos de sleep fijo sustituidos, segundos realmente esperados)"""
+        legacy = sum(r["legacy"] for r in self.records)
+        actual = sum(r["actual"] for r in self.records)
+        return legacy, actual
+
+    def _timeout(self, timeout, kind, key):
+        """(timeout, clave a aprender): el presupuesto solo se aplica y aprende sin timeout explícito"""
+        if timeout is not None or key is None:
+            return (self.default_timeout if timeout is None else timeout), None
+        if self.budgets is None:
+            return self.default_timeout, None
+        return self.budgets.budget(kind, key, self.default_timeout), (kind, key)
+
+    @contextmanager
+    def _measure(self, label, legacy_sleep, learn=None):
+        record = {"label": label, "legacy": legacy_sleep, "actual": 0.0, "ok": False}
+        self.records.append(record)
+        instrumentation = get_instrumentation(self.driver)
+        start = time.perf_counter()
+        try:
+            if instrumentation is not None:
+                with instrumentation.waiting():
+                    yield record
+            else:
+                yield record
+            record["ok"] = True
+        finally:
+            record["actual"] = time.perf_counter() - start
+            if record["ok"] and learn is not None:
+                self.budgets.record(*learn, record["actual"])
+
+    # -- Sondeo --------------------------------------------------------------
+
+    def _poll(self, condition, timeout, description, deadline=None):
+        """Evalúa condition() con backoff hasta que devuelva algo distinto de None/False.
+
+        ``deadline`` (monotonic) permite continuar una espera que ya consumió parte de ``timeout``.
+        """
+        if deadline is None:
+            deadline = time.monotonic() + timeout
+        interval = self.initial_poll
+        while True:
+            result = condition()
+            if result is not None and result is not False:
+                return result
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise WaitTimeout(f"{description} no se cumplió en {timeout:.1f}s")
+            time.sleep(min(interval, remaining))
+            interval = min(interval * self.backoff, self.max_poll)
+            if self.engine is not None:
+                self.engine.invalidate()
+
+    def _find(self, target):
+        """Elemento del objetivo o None, sin consumir implicit wait"""
+        if isinstance(target, str):
+            if self.registry is None:
+                raise ValueError("Para buscar por nombre lógico hace falta el registro de localizadores")
+            return self.registry.find(target, timeout=0)
+        if isinstance(target, tuple):
+            self.driver.implicitly_wait(0)
+            try:
+                elements = self.driver.find_elements(*target)
+            finally:
+                self.driver.implicitly_wait(self.implicit_wait)
+            return elements[0] if elements else None
+        element, _xpath = self.engine.find_first(list(target), timeout=0)
+        return element
+
+    @staticmethod
+    def _is_displayed(element):
+        try:
+            return element.is_displayed()
+        except Exception:
+            return False
+
+    # -- Esperas ---------------------------------------------------------------
+
+    def until_visible(self, target, timeout=None, legacy_sleep=0.0):
+        """Espera a que el objetivo esté visible y lo devuelve.
+
+        ``target`` es un nombre lógico del registro, una lista de XPaths o una
+        tupla (estrategia, valor); esta última se espera en el servidor.
+        """
+        timeout, learn = self._timeout(timeout, LOCATOR, target if isinstance(target, str) else None)
+        with self._measure(f"visible {target}", legacy_sleep, learn):
+            # Un solo plazo para la búsqueda en el servidor y el sondeo posterior
+            deadline = time.monotonic() + timeout
+            if isinstance(target, tuple):
+                element = self._server_side_find(target, timeout)
+                if element is not None and self._is_displayed(element):
+                    return element
+                if element is None and time.monotonic() >= deadline:
+                    # El servidor ya esperó todo el presupuesto: sondear sería esperar el doble
+                    raise WaitTimeout(f"visible {target} no se cumplió en {timeout:.1f}s")
+
+            def visible():
+                element = self._find(target)
+                return element if element is not None and self._is_displayed(element) else None
+
+            return self._poll(visible, timeout, f"visible {target}", deadline=deadline)
+
+    def _server_side_find(self, locator, timeout):
+        self.driver.implicitly_wait(timeout)
+        try:
+            elements = self.driver.find_elements(*locator)
+        finally:
+            self.driver.implicitly_wait(self.implicit_wait)
+        return elements[0] if elements else None
+
+    def until_gone(self, target, timeout=None, legacy_sleep=0.0):
+        """Espera a que el objetivo desaparezca de la pantalla"""
+        timeout, learn = self._timeout(timeout, LOCATOR, f"{target} (gone)" if isinstance(target, str) else None)
+        with self._measure(f"gone {target}", legacy_sleep, learn):
+            if isinstance(target, (list, str)) and self._snapshot_available():
+                xpaths = target if isinstance(target, list) else self._registry_xpaths(target)
+                if xpaths:
+                    return self._poll(lambda: self.engine.first_present(xpaths) is None, timeout,
+                                      f"gone {target}")
+            return self._poll(lambda: self._find(target) is None, timeout, f"gone {target}")
+
+    def _registry_xpaths(self, name):
+        candidates = self.registry.locators.get(name, []) if self.registry is not None else []
+        # Solo si todas las estrategias son XPath se puede decidir sobre la instantánea
+        if candidates and all(strategy == "xpath" for strategy, _value in candidates):
+            return [value for _strategy, value in candidates]
+        return None
+
+    def until_screen(self, markers, timeout=None, legacy_sleep=0.0, screen=None):
+        """Espera a que aparezca alguno de los XPaths marcadores y devuelve el que coincidió"""
+        key = screen or markers[0]
+        timeout, learn = self._timeout(timeout, SCREEN, key)
+        with self._measure(f"screen {key}", legacy_sleep, learn):
+            if self._snapshot_available():
+                marker = self._poll(lambda: self.engine.first_present(markers), timeout, "screen")
+            else:
+                marker = self._poll(lambda: next((m for m in markers if self._find(("xpath", m)) is not None), None),
+                                    timeout, "screen")
+        self._step(screen)
+        return marker
+
+    def until_stable(self, timeout=None, legacy_sleep=0.0, quiet_period=0.3, screen=None):
+        """Espera a que la jerarquía no cambie durante ``quiet_period`` segundos.
+
+        ``screen`` nombra la transición para aprender su presupuesto de timeout.
+        """
+        timeout, learn = self._timeout(timeout, SCREEN, f"{screen} (stable)" if screen else None)
+        state = {"digest": None, "since": None}
+
+        def stable():
+            digest = hashlib.sha1(self._page_source().encode("utf-8")).hexdigest()
+            now = time.monotonic()
+            if digest != state["digest"]:
+                state["digest"], state["since"] = digest, now
+                return False
+            return now - state["since"] >= quiet_period
+
+        with self._measure(f"stable {screen or ''}".strip(), legacy_sleep, learn):
+            result = self._poll(stable, timeout, "stable")
+        self._step(screen)
+        return result
+
+    def _step(self, screen):
+        if screen and self.on_step is not None:
+            self.on_step(screen)
+
+    def _snapshot_available(self):
+        return self.engine is not None and self.engine.available
+
+    def _page_source(self):
+        if self.engine is not None:
+            # La instantánea queda lista para la siguiente búsqueda
+            return self.engine.snapshot(refresh=True).source
+        return self.driver.page_source